@@ -1,16 +1,205 @@
 import os
+import json
+import sqlite3
 import requests
 import tzlocal
 import time
+import threading
+import activity
+import metrics
+import page_cache
+import rate_limit
+import tracing
 
-def get_lifelogs(api_key, api_url=os.getenv("LIMITLESS_API_URL") or "https://api.limitless.ai", endpoint="v1/lifelogs", limit=50, batch_size=10, includeMarkdown=True, includeHeadings=False, date=None, timezone=None, direction="asc", max_retries=3, retry_delay=5):
-    all_lifelogs = []
-    cursor = None
+# Seconds a fetched page is reused by repeat requests in this process (0 disables the cache)
+CACHE_TTL = float(os.getenv("CLIENT_CACHE_TTL") or 30)
+
+# key -> (fetched at, response body) and key -> in-flight call shared by concurrent callers
+_cache = {}
+_inflight = {}
+_cache_lock = threading.Lock()
+
+# Transport used for every outbound HTTP call, same signature as requests.request
+# (swapped out by cassette.py to record or replay sessions)
+_transport = requests.request
+
+# Whether pages may be answered from the in-memory and on-disk caches instead of the
+# transport (off while a cassette records or replays, so it sees every request)
+_transport_cached = True
+
+# Whether requests wait for the shared rate limiter (off for a replaying cassette,
+# which never reaches the API)
+_transport_rate_limited = True
+
+def set_transport(transport, cached=True, rate_limited=True):
+    """
+    Replace the HTTP transport and return the previous one
+
+    With cached=False every page fetch goes to the transport, bypassing both page caches.
+    With rate_limited=False requests skip the cross-process rate limiter.
+    """
+    global _transport, _transport_cached, _transport_rate_limited
+    previous = _transport
+    _transport = transport
+    _transport_cached = cached
+    _transport_rate_limited = rate_limited
+    return previous
+
+def request(method, url, **kwargs):
+    """
+    Send an HTTP request through the shared transport and record its metrics
+
+    Waits for the cross-process rate limiter first (see rate_limit.py), unless the
+    transport opted out.
+    """
+    api = metrics.api_for_url(url)
+    bytes_sent = len(json.dumps(kwargs["json"])) if kwargs.get("json") is not None else 0
+    # Shared with every other process on this machine, so together they stay within the API's limits
+    if _transport_rate_limited:
+        rate_limit.acquire(api)
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"http {api}", method=method):
+            response = _transport(method, url, **kwargs)
+    except Exception:
+        metrics.record_request(api, method, "exception", time.perf_counter() - started, bytes_sent)
+        raise
+    metrics.record_request(
+        api, method, response.status_code, time.perf_counter() - started,
+        bytes_sent, len(response.content or b"")
+    )
+    return response
+
+def fetch_page(api_key, api_url, endpoint, params, max_retries=3, retry_delay=5, cache_ttl=None):
+    """
+    Fetch a single page of lifelogs, retrying 504s and network errors
+
+    Identical requests from several threads at once share one upstream call, and a repeat
+    fetched less than `cache_ttl` seconds ago (default CLIENT_CACHE_TTL) is answered from
+    memory. Otherwise the on-disk page cache is tried before the API. Pass cache_ttl=0
+    when polling for changes; it skips both caches. Each caller gets its own copy.
+    """
+    if not _transport_cached:
+        return json.loads(_fetch_page_text(api_key, api_url, endpoint, params, max_retries, retry_delay))
+
+    # Only an explicit cache_ttl=0 also skips the on-disk cache (reads and writes)
+    use_disk = cache_ttl != 0
+    cache_ttl = CACHE_TTL if cache_ttl is None else cache_ttl
+    key = (api_key, f"{api_url}/{endpoint}", tuple(sorted((k, str(v)) for k, v in params.items() if v is not None)))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and time.monotonic() - cached[0] < cache_ttl:
+            metrics.inc("client_cache_requests_total", result="hit")
+            return json.loads(cached[1])
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = {"done": threading.Event(), "text": None, "error": None}
+
+    if not leader:
+        metrics.inc("client_cache_requests_total", result="coalesced")
+        call["done"].wait()
+        if call["error"]:
+            raise call["error"]
+        return json.loads(call["text"])
+
+    metrics.inc("client_cache_requests_total", result="miss")
+    try:
+        call["text"] = _fetch_page_cached(api_key, api_url, endpoint, params, max_retries, retry_delay, use_disk)
+    except Exception as e:
+        call["error"] = e
+        raise
+    finally:
+        with _cache_lock:
+            del _inflight[key]
+            max_age = max(CACHE_TTL, cache_ttl)
+            if call["text"] is not None and max_age > 0:
+                now = time.monotonic()
+                _cache[key] = (now, call["text"])
+                # Drop expired entries so a long-running process does not accumulate pages
+                if len(_cache) > 256:
+                    for stale in [k for k, (fetched_at, _) in _cache.items() if now - fetched_at >= max_age]:
+                        del _cache[stale]
+        call["done"].set()
+    return json.loads(call["text"])
+
+def _fetch_page_cached(api_key, api_url, endpoint, params, max_retries, retry_delay, use_disk):
+    """
+    Fetch a page through the on-disk page cache (see page_cache.py)
+    """
+    disk = page_cache.shared() if use_disk else None
+    if not disk:
+        return _fetch_page_text(api_key, api_url, endpoint, params, max_retries, retry_delay)
+
+    key = page_cache.cache_key(api_key, f"{api_url}/{endpoint}", params)
+    try:
+        text = disk.get(key)
+    except sqlite3.Error as e:
+        print(f"Error reading page cache: {e}")
+        text = None
+    if text is not None:
+        return text
+
+    text = _fetch_page_text(api_key, api_url, endpoint, params, max_retries, retry_delay)
+    try:
+        disk.put(key, text, page_cache.ttl_for(params))
+    except sqlite3.Error as e:
+        print(f"Error writing page cache: {e}")
+    return text
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+def _fetch_page_text(api_key, api_url, endpoint, params, max_retries=3, retry_delay=5):
+    """
+    Fetch a single page from the API and return the response body
+    """
+    retries = 0
+    while retries < max_retries:
+        try:
+            response = request(
+                "GET",
+                f"{api_url}/{endpoint}",
+                headers={"X-API-Key": api_key},
+                params=params,
+                timeout=30  # Add a timeout to prevent hanging requests
+            )
+            
+            if response.ok:
+                break  # Success, exit retry loop
+            elif response.status_code == 504:  # Gateway Timeout
+                retries += 1
+                metrics.inc("http_retries_total", api="limitless", reason="504")
+                print(f"Received 504 Gateway Timeout. Retry {retries}/{max_retries}...")
+                if retries < max_retries:
+                    time.sleep(retry_delay)  # Wait before retrying
+                else:
+                    raise Exception(f"HTTP error after {max_retries} retries! Status: {response.status_code}")
+            else:
+                # For other errors, don't retry
+                raise Exception(f"HTTP error! Status: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            retries += 1
+            metrics.inc("http_retries_total", api="limitless", reason="exception")
+            print(f"Request exception: {e}. Retry {retries}/{max_retries}...")
+            if retries < max_retries:
+                time.sleep(retry_delay)  # Wait before retrying
+            else:
+                raise Exception(f"Request failed after {max_retries} retries: {e}")
     
-    # If limit is None, fetch all available lifelogs
-    # Otherwise, set a batch size (e.g., 10) and fetch until we reach the limit
-    if limit is not None:
-        batch_size = min(batch_size, limit)
+    if not response.ok:
+        raise Exception(f"HTTP error! Status: {response.status_code}")
+
+    return response.text
+
+def iter_lifelog_pages(api_key, api_url=os.getenv("LIMITLESS_API_URL") or "https://api.limitless.ai", endpoint="v1/lifelogs", batch_size=10, includeMarkdown=True, includeHeadings=False, date=None, timezone=None, direction="asc", max_retries=3, retry_delay=5, start=None, end=None, cursor=None, cache_ttl=None):
+    """
+    Yield (lifelogs, next_cursor) for each page; next_cursor is None on the last page
+
+    Pass the `cursor` of the last page that was handled to resume a fetch after it.
+    """
+    page = 0
     
     while True:
         params = {  
@@ -22,63 +211,134 @@ def get_lifelogs(api_key, api_url=os.getenv("LIMITLESS_API_URL") or "https://api
             "timezone": timezone if timezone else str(tzlocal.get_localzone())
         }
         
+        # Bound by start/end datetimes ("YYYY-MM-DD HH:MM:SS" in `timezone`) instead of a date
+        if start:
+            params["start"] = start
+        if end:
+            params["end"] = end
+        
         # Add cursor for pagination if we have one
         if cursor:
             params["cursor"] = cursor
-            
-        # Add retry logic
-        retries = 0
-        while retries < max_retries:
-            try:
-                response = requests.get(
-                    f"{api_url}/{endpoint}",
-                    headers={"X-API-Key": api_key},
-                    params=params,
-                    timeout=30  # Add a timeout to prevent hanging requests
-                )
-                
-                if response.ok:
-                    break  # Success, exit retry loop
-                elif response.status_code == 504:  # Gateway Timeout
-                    retries += 1
-                    print(f"Received 504 Gateway Timeout. Retry {retries}/{max_retries}...")
-                    if retries < max_retries:
-                        time.sleep(retry_delay)  # Wait before retrying
-                    else:
-                        raise Exception(f"HTTP error after {max_retries} retries! Status: {response.status_code}")
-                else:
-                    # For other errors, don't retry
-                    raise Exception(f"HTTP error! Status: {response.status_code}")
-            except requests.exceptions.RequestException as e:
-                retries += 1
-                print(f"Request exception: {e}. Retry {retries}/{max_retries}...")
-                if retries < max_retries:
-                    time.sleep(retry_delay)  # Wait before retrying
-                else:
-                    raise Exception(f"Request failed after {max_retries} retries: {e}")
         
-        if not response.ok:
-            raise Exception(f"HTTP error! Status: {response.status_code}")
-
-        data = response.json()
+        page += 1
+        with tracing.span("page", page=page):
+            data = fetch_page(api_key, api_url, endpoint, params, max_retries, retry_delay, cache_ttl)
         lifelogs = data.get("data", {}).get("lifelogs", [])
         
-        # Add transcripts from this batch
-        for lifelog in lifelogs:
-            all_lifelogs.append(lifelog)
-        
-        # Check if we've reached the requested limit
-        if limit is not None and len(all_lifelogs) >= limit:
-            return all_lifelogs[:limit]
+        # Track arrivals for adaptive polling (only when LIMITLESS_ACTIVITY_FILE is set)
+        activity.record_lifelogs(lifelogs)
         
         # Get the next cursor from the response
         next_cursor = data.get("meta", {}).get("lifelogs", {}).get("nextCursor")
         
         # If there's no next cursor or we got fewer results than requested, we're done
         if not next_cursor or len(lifelogs) < batch_size:
-            break
+            next_cursor = None
+        
+        yield lifelogs, next_cursor
+        
+        if next_cursor is None:
+            return
             
         print(f"Fetched {len(lifelogs)} lifelogs, next cursor: {next_cursor}")
         cursor = next_cursor
+
+def _load_page_checkpoint(path, query):
+    """
+    Read the pages saved by an interrupted fetch of the same query: (lifelogs, cursor) or None
+    """
+    if not os.path.exists(path):
+        return None
+    lifelogs = []
+    cursor = None
+    with open(path) as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+        if header.get("query") != query:
+            print(f"Ignoring page checkpoint {path}: it belongs to a different query")
+            return None
+        for line in f:
+            try:
+                page = json.loads(line)
+            except ValueError:
+                break  # A page cut short by a crash, everything before it is good
+            lifelogs.extend(page["lifelogs"])
+            cursor = page["cursor"]
+    return (lifelogs, cursor) if cursor else None
+
+@tracing.traced("get_lifelogs")
+def get_lifelogs(api_key, api_url=os.getenv("LIMITLESS_API_URL") or "https://api.limitless.ai", endpoint="v1/lifelogs", limit=50, batch_size=10, includeMarkdown=True, includeHeadings=False, date=None, timezone=None, direction="asc", max_retries=3, retry_delay=5, start=None, end=None, checkpoint=None, on_page=None, cache_ttl=None):
+    """
+    Fetch lifelogs, following pagination until `limit` (None for all)
+
+    With `checkpoint` (a file path), each page is appended to that file as it arrives. If the
+    fetch fails, calling again with the same query resumes after the last saved page instead
+    of starting over; the file is removed once the fetch completes. `on_page(lifelogs, next_cursor)`
+    is called for every page, to stream results somewhere as they arrive. `cache_ttl` is
+    passed to fetch_page.
+    """
+    all_lifelogs = []
+    cursor = None
+    
+    # If limit is None, fetch all available lifelogs
+    # Otherwise, set a batch size (e.g., 10) and fetch until we reach the limit
+    if limit is not None:
+        batch_size = min(batch_size, limit)
+    
+    query = {
+        "endpoint": endpoint, "limit": limit, "batch_size": batch_size,
+        "includeMarkdown": includeMarkdown, "includeHeadings": includeHeadings,
+        "date": date, "timezone": timezone, "direction": direction, "start": start, "end": end,
+    }
+    checkpoint_file = None
+    if checkpoint:
+        saved = _load_page_checkpoint(checkpoint, query)
+        if saved:
+            all_lifelogs, cursor = saved
+            print(f"Resuming fetch after {len(all_lifelogs)} lifelogs saved in {checkpoint}")
+            checkpoint_file = open(checkpoint, "a")
+        else:
+            checkpoint_file = open(checkpoint, "w")
+            checkpoint_file.write(json.dumps({"query": query}) + "\n")
+            checkpoint_file.flush()
+    
+    try:
+        pages = iter_lifelog_pages(
+            api_key, api_url, endpoint, batch_size, includeMarkdown, includeHeadings,
+            date, timezone, direction, max_retries, retry_delay, start, end, cursor, cache_ttl
+        )
+        for lifelogs, next_cursor in pages:
+            # Add transcripts from this batch
+            all_lifelogs.extend(lifelogs)
+            
+            if on_page:
+                on_page(lifelogs, next_cursor)
+            
+            # Check if we've reached the requested limit
+            if limit is not None and len(all_lifelogs) >= limit:
+                all_lifelogs = all_lifelogs[:limit]
+                break
+            
+            if checkpoint_file and next_cursor:
+                checkpoint_file.write(json.dumps({"cursor": next_cursor, "lifelogs": lifelogs}) + "\n")
+                checkpoint_file.flush()
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+    
+    # Finished, nothing left to resume
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
     
     return all_lifelogs
+
+# Report this process's metrics to a parent scheduler when LIMITLESS_METRICS_FILE is set
+metrics.install_from_env()
+
+# Record or replay a cassette for the whole process when LIMITLESS_CASSETTE is set
+if os.getenv("LIMITLESS_CASSETTE"):
+    import cassette
+    cassette.install_from_env()
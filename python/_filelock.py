@@ -0,0 +1,78 @@
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on a file, shared between processes
+
+        with FileLock("job.lock", timeout=30):
+            ...
+
+    Uses flock() on POSIX and msvcrt.locking() on Windows. The lock is released when
+    the holder exits or crashes, so a stale lock file never blocks later runs.
+    """
+    def __init__(self, path, timeout=None, poll_interval=0.1):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def _try_lock(self):
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Block until the lock is held; raise LockTimeout after `timeout` seconds (None waits forever)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl and timeout is None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            return self
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock():
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(self._fd)
+                self._fd = None
+                raise LockTimeout(f"Timed out after {timeout}s waiting for {self.path}")
+            time.sleep(self.poll_interval)
+        return self
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
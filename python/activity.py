@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import metrics
+from _filelock import FileLock
+from timer_scheduler import IntervalSpec
+
+# How far back conversations count towards the arrival rate, in seconds
+RATE_WINDOW = 60 * 60
+
+# Lifelogs first seen longer ago than this are dropped from the activity file
+RETENTION = 24 * 60 * 60
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"lifelogs": {}}
+
+
+def record_lifelogs(lifelogs, path=None):
+    """
+    Remember when each lifelog ended and when the client first saw it
+
+    Does nothing unless LIMITLESS_ACTIVITY_FILE (or `path`) is set. Every sync job fetching
+    lifelogs adds to the same file, so all pollers see activity found by any of them.
+    Lifelogs that ended before the rate window (pages of a backfill, an archive import or
+    an index run) are not activity; a page of only those does not touch the file at all.
+    """
+    path = path or os.getenv("LIMITLESS_ACTIVITY_FILE")
+    if not path or not lifelogs:
+        return
+
+    now = time.time()
+    recent = []
+    for lifelog in lifelogs:
+        end = _timestamp(lifelog.get("endTime")) or now
+        if lifelog.get("id") and end >= now - RATE_WINDOW:
+            recent.append((lifelog["id"], end))
+    if not recent:
+        return
+
+    with FileLock(f"{path}.lock"):
+        data = _load(path)
+        seen = data.setdefault("lifelogs", {})
+        for lifelog_id, end in recent:
+            if lifelog_id not in seen:
+                seen[lifelog_id] = {"end": end, "first_seen": now}
+                # Time from the end of a conversation until a sync first picked it up
+                metrics.observe("lifelog_freshness_seconds", max(now - end, 0), buckets=metrics.RUN_BUCKETS)
+        data["lifelogs"] = {
+            lifelog_id: entry for lifelog_id, entry in seen.items()
+            if entry["first_seen"] >= now - RETENTION
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+def recent_activity(path=None, since=None, window=RATE_WINDOW, now=None):
+    """
+    Return (lifelogs per hour that ended within `window`, lifelogs first seen after `since`)
+    """
+    path = path or os.getenv("LIMITLESS_ACTIVITY_FILE")
+    if not path:
+        return 0.0, 0
+    now = time.time() if now is None else now
+    entries = _load(path).get("lifelogs", {}).values()
+    recent = sum(1 for entry in entries if entry["end"] >= now - window)
+    new = sum(1 for entry in entries if since is not None and entry["first_seen"] > since)
+    return recent * 3600 / window, new
+
+
+class AdaptivePoller(IntervalSpec):
+    """
+    Interval spec that follows how fast new lifelogs are arriving
+
+    When the last poll found new lifelogs that ended recently, the interval is sized so the
+    next poll picks up about `target_per_poll` of them at the current arrival rate, but never
+    shorter than `floor`. With nothing new, each interval is `backoff` times the previous
+    one, up to `ceiling`.
+    """
+    def __init__(self, floor, ceiling, initial=None, backoff=2.0, target_per_poll=1, path=None):
+        if not 0 < floor <= ceiling:
+            raise ValueError(f"Need 0 < floor <= ceiling, got {floor} and {ceiling}")
+        super().__init__(min(max(initial or floor, floor), ceiling))
+        self.floor = floor
+        self.ceiling = ceiling
+        self.backoff = backoff
+        self.target_per_poll = target_per_poll
+        self.path = path
+        self.last_check = time.time()
+        self.rate = 0.0
+        # The interval only adapts once a poll has run since it was last computed
+        self.polled = False
+
+    def next_interval(self, now=None):
+        now = time.time() if now is None else now
+        self.rate, new = recent_activity(self.path, since=self.last_check, now=now)
+        self.last_check = now
+
+        # Lifelogs found now that ended long ago (a backfill, a late upload) do not count as activity
+        if new and self.rate:
+            interval = 3600 * self.target_per_poll / self.rate
+            self.seconds = min(max(interval, self.floor), self.ceiling)
+        else:
+            self.seconds = min(self.seconds * self.backoff, self.ceiling)
+        return self.seconds
+
+    def record_run(self):
+        self.polled = True
+
+    def next_after(self, dt):
+        if self.polled:
+            self.polled = False
+            self.next_interval()
+        return super().next_after(dt)
+
+    def __repr__(self):
+        return f"AdaptivePoller(floor={self.floor}, ceiling={self.ceiling}, interval={self.seconds:.0f})"
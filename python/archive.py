@@ -0,0 +1,452 @@
+import argparse
+import bisect
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import date, datetime, timezone
+
+import tzlocal
+from dotenv import load_dotenv
+
+from _filelock import FileLock
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.getenv("LIFELOG_ARCHIVE_DIR") or os.path.join(SCRIPT_DIR, "archive")
+
+# Record header in the data file: payload length, CRC32 of the compressed payload
+RECORD_HEADER = struct.Struct("<II")
+
+# Time index entry: startTime in epoch milliseconds, record offset, payload length
+TIME_ENTRY = struct.Struct("<qQI")
+
+# Id index entry: first 16 bytes of SHA-1(id), record offset, payload length
+ID_ENTRY = struct.Struct("<16sQI")
+
+# Journal of records appended since the sorted indexes were last written: a header with
+# the data file size the sorted indexes cover, then (id key, startTime ms, offset, length)
+JOURNAL_HEADER = struct.Struct("<Q")
+JOURNAL_ENTRY = struct.Struct("<16sqQI")
+
+# The journal is merged into the sorted indexes once it holds more entries than this, so
+# an append reads a bounded journal and the full index rewrite happens once per this many records
+JOURNAL_MAX_ENTRIES = 4096
+
+
+def _id_key(lifelog_id):
+    return hashlib.sha1(lifelog_id.encode("utf-8")).digest()[:16]
+
+
+def to_epoch_ms(value):
+    """
+    Epoch milliseconds for an ISO 8601 string or datetime (naive means UTC); None stays None
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+class _MappedIndex:
+    """
+    Read-only view of a sorted fixed-width index file; indexing returns the sort key
+    (so the bisect module can search it in place)
+    """
+    def __init__(self, path, entry):
+        self.entry = entry
+        self.count = 0
+        self.mm = None
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = len(self.mm) // entry.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.entry.unpack_from(self.mm, i * self.entry.size)[0]
+
+    def at(self, i):
+        return self.entry.unpack_from(self.mm, i * self.entry.size)
+
+    def entries(self):
+        return [self.at(i) for i in range(self.count)]
+
+    def close(self):
+        if self.mm:
+            self.mm.close()
+
+
+class LifelogArchive:
+    """
+    Append-only lifelog archive with sorted id and time indexes, read through mmap
+
+    `lifelogs.dat` holds one zlib-compressed JSON record per lifelog version. Two sorted
+    fixed-width index files map startTime and id to record offsets, so a lookup by id or
+    a time range costs a binary search over the mapped index plus one slice per record,
+    without loading the archive into Python objects.
+
+    Appends take a cross-process lock, write the records, then add them to a small
+    journal (`lifelogs.jidx`) that readers consult before the sorted indexes. The journal
+    is merged into the sorted indexes once it grows past JOURNAL_MAX_ENTRIES. Records left unindexed by a crash are indexed by the next append, and
+    a torn record at the end of the data file is truncated before anything is written after it.
+    """
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, "lifelogs.dat")
+        self.time_path = os.path.join(directory, "lifelogs.tidx")
+        self.id_path = os.path.join(directory, "lifelogs.iidx")
+        self.journal_path = os.path.join(directory, "lifelogs.jidx")
+        self.lock_path = os.path.join(directory, ".lock")
+        self._data = None
+        self._time = None
+        self._ids = None
+        self._mapped_at = None
+        # Journal state: id key -> (start_ms, offset, length), journal entries by start time,
+        # sorted-index offsets replaced by the journal, and the data size the indexes cover
+        self._journal = {}
+        self._journal_times = []
+        self._superseded = set()
+        self._indexed_end = None
+
+    def _refresh(self):
+        """
+        (Re)map the files if another process or an append changed them
+        """
+        paths = (self.data_path, self.time_path, self.id_path, self.journal_path)
+        stamp = tuple((os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else 0
+                      for path in paths)
+        if stamp == self._mapped_at:
+            return
+        self.close()
+        if os.path.exists(self.data_path) and os.path.getsize(self.data_path):
+            with open(self.data_path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._time = _MappedIndex(self.time_path, TIME_ENTRY)
+        self._ids = _MappedIndex(self.id_path, ID_ENTRY)
+        self._load_journal()
+        self._mapped_at = stamp
+
+    def _load_journal(self):
+        self._journal = {}
+        self._indexed_end = None
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                raw = f.read()
+            if len(raw) >= JOURNAL_HEADER.size:
+                self._indexed_end = JOURNAL_HEADER.unpack_from(raw)[0]
+                # A half-written entry at the end (crash during an append) is ignored
+                count = (len(raw) - JOURNAL_HEADER.size) // JOURNAL_ENTRY.size
+                for i in range(count):
+                    key, start_ms, offset, length = JOURNAL_ENTRY.unpack_from(raw, JOURNAL_HEADER.size + i * JOURNAL_ENTRY.size)
+                    self._journal[key] = (start_ms, offset, length)
+                    self._indexed_end = max(self._indexed_end, offset + RECORD_HEADER.size + length)
+        self._journal_times = sorted(self._journal.values())
+        self._superseded = set()
+        for key, (_, offset, _) in self._journal.items():
+            entry = self._find_sorted(key)
+            # Same offset: a merge was interrupted before the journal was reset
+            if entry is not None and entry[1] != offset:
+                self._superseded.add(entry[1])
+
+    def close(self):
+        for index in (self._time, self._ids):
+            if index:
+                index.close()
+        if self._data:
+            self._data.close()
+        self._data = self._time = self._ids = self._mapped_at = None
+
+    def __len__(self):
+        self._refresh()
+        return len(self._ids) + len(self._journal) - len(self._superseded)
+
+    def _read(self, offset, length):
+        start = offset + RECORD_HEADER.size
+        return json.loads(zlib.decompress(self._data[start:start + length]))
+
+    def _find_sorted(self, key):
+        i = bisect.bisect_left(self._ids, key)
+        if i < len(self._ids) and self._ids[i] == key:
+            return self._ids.at(i)
+        return None
+
+    def _find(self, key):
+        """
+        (offset, length) of the current record for an id key, or None
+        """
+        if key in self._journal:
+            return self._journal[key][1:]
+        entry = self._find_sorted(key)
+        return entry[1:] if entry is not None else None
+
+    def get(self, lifelog_id):
+        """
+        The latest archived version of a lifelog, or None
+        """
+        self._refresh()
+        entry = self._find(_id_key(lifelog_id))
+        if entry is None:
+            return None
+        lifelog = self._read(*entry)
+        # 128-bit hash collisions are not a practical concern, but never return the wrong lifelog
+        return lifelog if lifelog.get("id") == lifelog_id else None
+
+    def range(self, start=None, end=None):
+        """
+        Yield lifelogs with start <= startTime < end, oldest first
+
+        `start` and `end` are datetimes, dates or ISO 8601 strings (naive means UTC); None is unbounded.
+        """
+        self._refresh()
+        start_ms = None if start is None else to_epoch_ms(start)
+        end_ms = None if end is None else to_epoch_ms(end)
+        lo = 0 if start_ms is None else bisect.bisect_left(self._time, start_ms)
+        hi = len(self._time) if end_ms is None else bisect.bisect_left(self._time, end_ms)
+        sorted_entries = (self._time.at(i) for i in range(lo, hi))
+        journal_entries = (
+            entry for entry in self._journal_times
+            if (start_ms is None or entry[0] >= start_ms) and (end_ms is None or entry[0] < end_ms)
+        )
+        for _, offset, length in heapq.merge(sorted_entries, journal_entries):
+            if offset in self._superseded:
+                continue
+            yield self._read(offset, length)
+
+    def _scan(self, offset):
+        """
+        Read the valid records from `offset` on: ([(key, start_ms, offset, length, crc)], end of the last valid record)
+        """
+        records = []
+        if not os.path.exists(self.data_path):
+            return records, 0
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                try:
+                    lifelog = json.loads(zlib.decompress(payload))
+                except (zlib.error, ValueError):
+                    break
+                records.append((_id_key(lifelog["id"]), to_epoch_ms(lifelog.get("startTime")) or 0, offset, length, crc))
+                offset += RECORD_HEADER.size + length
+        return records, offset
+
+    def _truncate(self, offset):
+        size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        if offset < size:
+            print(f"Truncating {size - offset} bytes of incomplete records")
+            # Unmap first: the mapping must not outlive the bytes it covers
+            self.close()
+            with open(self.data_path, "r+b") as f:
+                f.truncate(offset)
+
+    def _recover_tail(self):
+        """
+        Index valid records past the indexed end and truncate a torn one; returns new journal entries
+        """
+        indexed_end = self._indexed_end
+        if indexed_end is None:
+            # Archive written before the journal existed: the sorted indexes cover everything they point to
+            indexed_end = max((offset + RECORD_HEADER.size + length for _, offset, length in self._time.entries()), default=0)
+            self._write_journal_header(indexed_end)
+        records, valid_end = self._scan(indexed_end)
+        if records:
+            print(f"Indexing {len(records)} records written before an interrupted append")
+        self._truncate(valid_end)
+        return records
+
+    def _write_journal_header(self, indexed_end):
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(JOURNAL_HEADER.pack(indexed_end))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _append_journal(self, records):
+        with open(self.journal_path, "ab") as f:
+            f.write(b"".join(JOURNAL_ENTRY.pack(key, start_ms, offset, length) for key, start_ms, offset, length, _ in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, lifelogs):
+        """
+        Archive lifelogs; returns how many were new or changed
+
+        A changed lifelog is appended again and the indexes point to the new record.
+        """
+        with FileLock(self.lock_path):
+            self._refresh()
+            recovered = self._recover_tail()
+            if recovered:
+                self._append_journal(recovered)
+            self._refresh()
+
+            added = 0
+            # CRCs of records written by this call or recovered, which are not mapped yet
+            written = {key: crc for key, _, _, _, crc in recovered}
+            records = []
+            with open(self.data_path, "ab") as f:
+                offset = f.tell()
+                for lifelog in lifelogs:
+                    payload = zlib.compress(json.dumps(lifelog, separators=(",", ":")).encode("utf-8"))
+                    crc = zlib.crc32(payload)
+                    key = _id_key(lifelog["id"])
+                    previous_crc = written.get(key)
+                    if previous_crc is None:
+                        previous = self._find(key)
+                        if previous:
+                            previous_crc = RECORD_HEADER.unpack_from(self._data, previous[0])[1]
+                    if previous_crc == crc:
+                        continue  # Unchanged
+
+                    f.write(RECORD_HEADER.pack(len(payload), crc))
+                    f.write(payload)
+                    records.append((key, to_epoch_ms(lifelog.get("startTime")) or 0, offset, len(payload), crc))
+                    written[key] = crc
+                    offset += RECORD_HEADER.size + len(payload)
+                    added += 1
+                f.flush()
+                os.fsync(f.fileno())
+
+            if records:
+                self._append_journal(records)
+            self._refresh()
+            if len(self._journal) > JOURNAL_MAX_ENTRIES:
+                self._compact()
+            self.close()
+        return added
+
+    def _compact(self):
+        """
+        Merge the journal into the sorted indexes (caller holds the lock)
+        """
+        ids = {key: (offset, length) for key, offset, length in self._ids.entries()}
+        times = {offset: (start_ms, length) for start_ms, offset, length in self._time.entries()
+                 if offset not in self._superseded}
+        for key, (start_ms, offset, length) in self._journal.items():
+            ids[key] = (offset, length)
+            times[offset] = (start_ms, length)
+        indexed_end = self._indexed_end
+        self.close()
+        self._write_indexes(ids, times)
+        self._write_journal_header(indexed_end)
+
+    def _write_indexes(self, ids, times):
+        for path, entry, rows in (
+            (self.id_path, ID_ENTRY, sorted((key, offset, length) for key, (offset, length) in ids.items())),
+            (self.time_path, TIME_ENTRY, sorted((start_ms, offset, length) for offset, (start_ms, length) in times.items())),
+        ):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(entry.pack(*row) for row in rows))
+            os.replace(tmp_path, path)
+
+    def rebuild_index(self):
+        """
+        Rebuild both indexes by scanning the data file (the last record of each id wins)
+
+        Returns the number of lifelogs indexed. A torn record at the end is truncated.
+        """
+        with FileLock(self.lock_path):
+            self.close()
+            ids = {}
+            times = {}
+            records, end = self._scan(0)
+            for key, start_ms, offset, length, _ in records:
+                if key in ids:
+                    times.pop(ids[key][0], None)
+                ids[key] = (offset, length)
+                times[offset] = (start_ms, length)
+            self._truncate(end)
+            self._write_indexes(ids, times)
+            self._write_journal_header(end)
+        return len(ids)
+
+    def stats(self):
+        self._refresh()
+        data_bytes = len(self._data) if self._data else 0
+        starts = [self._time[0], self._time[len(self._time) - 1]] if len(self._time) else []
+        starts += [entry[0] for entry in self._journal_times[:1] + self._journal_times[-1:]]
+        first = min(starts) if starts else None
+        last = max(starts) if starts else None
+        return {
+            "lifelogs": len(self),
+            "data_bytes": data_bytes,
+            "journal_entries": len(self._journal),
+            "first": datetime.fromtimestamp(first / 1000, timezone.utc).isoformat() if first is not None else None,
+            "last": datetime.fromtimestamp(last / 1000, timezone.utc).isoformat() if last is not None else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local append-only archive of Limitless lifelogs")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="Archive directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Fetch days from the API into the archive")
+    import_parser.add_argument("--start", required=True, help="First day (YYYY-MM-DD)")
+    import_parser.add_argument("--end", default=date.today().isoformat(), help="Last day, inclusive (default: today)")
+    import_parser.add_argument("--timezone", help="IANA timezone for the days (default: local)")
+
+    get_parser = subparsers.add_parser("get", help="Print one lifelog as JSON")
+    get_parser.add_argument("id")
+
+    range_parser = subparsers.add_parser("range", help="List lifelogs that started in a time range")
+    range_parser.add_argument("--start", help="ISO 8601 time or date (naive means UTC)")
+    range_parser.add_argument("--end", help="ISO 8601 time or date, exclusive")
+    range_parser.add_argument("--json", action="store_true", help="Print each lifelog as a JSON line")
+
+    subparsers.add_parser("stats", help="Show archive size and time span")
+    subparsers.add_parser("rebuild", help="Rebuild the indexes from the data file")
+    args = parser.parse_args()
+
+    archive = LifelogArchive(args.dir)
+    if args.command == "import":
+        from _client import get_lifelogs
+        from backfill import day_windows
+
+        timezone_name = args.timezone or str(tzlocal.get_localzone())
+        for day in day_windows(date.fromisoformat(args.start), date.fromisoformat(args.end)):
+            lifelogs = get_lifelogs(api_key=os.getenv("LIMITLESS_API_KEY"), date=day, limit=None,
+                                    timezone=timezone_name, direction="asc")
+            print(f"[{day}] {len(lifelogs)} lifelogs, {archive.append(lifelogs)} new or changed")
+    elif args.command == "get":
+        lifelog = archive.get(args.id)
+        if lifelog is None:
+            print(f"Not in the archive: {args.id}")
+        else:
+            print(json.dumps(lifelog, indent=2))
+    elif args.command == "range":
+        for lifelog in archive.range(args.start, args.end):
+            if args.json:
+                print(json.dumps(lifelog))
+            else:
+                print(f"{lifelog.get('startTime', '')}  {lifelog.get('title') or 'Untitled'} ({lifelog['id']})")
+    elif args.command == "stats":
+        print(json.dumps(archive.stats(), indent=2))
+    else:
+        print(f"Indexed {archive.rebuild_index()} lifelogs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import tzlocal
+from dotenv import load_dotenv
+
+import sinks
+from _client import get_lifelogs
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE_FILE = os.path.join(SCRIPT_DIR, "backfill_state.json")
+
+
+class Throttle:
+    """
+    Spaces out sink deliveries to at most `rate` lifelogs per second
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, count=1):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = max(self.next_time - now, 0)
+            self.next_time = max(self.next_time, now) + self.interval * count
+        if delay:
+            time.sleep(delay)
+
+
+def day_windows(start, end):
+    """
+    Dates from `start` to `end` inclusive, as YYYY-MM-DD strings
+    """
+    days = []
+    current = start
+    while current <= end:
+        days.append(current.isoformat())
+        current += timedelta(days=1)
+    return days
+
+
+class BackfillState:
+    """
+    Per-window progress, saved after every change so a crashed backfill can resume
+
+    A window is "done" once all of its lifelogs reached every sink. For a window that was
+    interrupted mid-delivery or whose delivery failed, the ids already delivered to each
+    sink are kept and skipped on resume. A day that has not ended yet is left "open" the
+    same way, so a later run picks up the lifelogs recorded since.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = {"windows": {}}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading backfill state, starting over: {e}")
+
+    def window(self, day):
+        return self.data["windows"].setdefault(day, {"status": "pending", "delivered": {}})
+
+    def is_done(self, day):
+        return self.data["windows"].get(day, {}).get("status") == "done"
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def fetch_window(day, timezone, state_file):
+    started = time.perf_counter()
+    lifelogs = get_lifelogs(
+        api_key=os.getenv("LIMITLESS_API_KEY"),
+        date=day,
+        limit=None,
+        timezone=timezone,
+        direction="asc",
+        # A window that fails mid-pagination resumes from its last good page on the next run
+        checkpoint=f"{state_file}.{day}.pages.jsonl"
+    )
+    return day, lifelogs, time.perf_counter() - started
+
+
+def deliver_window(day, lifelogs, state, sink_names, throttle, batch_size, finished=True):
+    """
+    Deliver a window's lifelogs to every sink; returns how many lifelogs needed delivery
+
+    Raises sinks.DeliveryError if a sink failed. The window then stays unfinished, with
+    the ids each sink did receive, so the next run retries only what is missing. Pass
+    finished=False for a day that is still going on: it is kept "open" instead of "done".
+    """
+    window = state.window(day)
+    # State files from before per-sink tracking kept one list for all sinks
+    legacy = window.pop("delivered_ids", [])
+    saved = window.setdefault("delivered", {})
+    delivered = {name: set(saved.get(name, [])) | set(legacy) for name in sink_names}
+    remaining = [
+        lifelog for lifelog in lifelogs
+        if any(lifelog.get("id") not in delivered[name] for name in sink_names)
+    ]
+
+    errors = {}
+    for i in range(0, len(remaining), batch_size):
+        batch = remaining[i:i + batch_size]
+        throttle.wait(len(batch))
+        for name in sink_names:
+            # A sink that failed gets no more of this window until the next run
+            todo = [lifelog for lifelog in batch if lifelog.get("id") not in delivered[name]]
+            if name in errors or not todo:
+                continue
+            try:
+                # Backfilled history must not move the pollers' last processed checkpoints
+                sinks.deliver(todo, [name], update_checkpoint=False, raise_errors=True)
+            except sinks.DeliveryError as e:
+                errors.update(e.errors)
+                continue
+            delivered[name].update(lifelog["id"] for lifelog in todo if lifelog.get("id"))
+            saved[name] = sorted(delivered[name])
+        state.save()
+
+    if errors:
+        window.update({"status": "failed", "error": "; ".join(f"{name}: {e}" for name, e in errors.items())})
+        state.save()
+        raise sinks.DeliveryError(errors, {})
+
+    if not finished:
+        window.update({"status": "open", "lifelogs": len(lifelogs)})
+        window.pop("error", None)
+        state.save()
+        return len(remaining)
+
+    window.update({
+        "status": "done",
+        "lifelogs": len(lifelogs),
+        "completed_at": datetime.now().isoformat(timespec="seconds"),
+        "delivered": {},
+    })
+    window.pop("error", None)
+    state.save()
+    return len(remaining)
+
+
+def run_backfill(start, end, sink_names, workers=4, rate=2.0, batch_size=10, timezone=None, state_file=DEFAULT_STATE_FILE,
+                 max_pending=None):
+    """
+    Fetch every day window in [start, end] in parallel and deliver it to the sinks
+
+    Fetches run on up to `workers` threads. Deliveries happen one window at a time on the
+    calling thread, throttled to `rate` lifelogs per second. At most `max_pending` windows
+    (default twice the workers) are fetching or waiting for delivery at once, so a slow
+    sink holds back the fetches instead of letting fetched days pile up in memory.
+    Returns a summary dict.
+    """
+    timezone = timezone or str(tzlocal.get_localzone())
+    state = BackfillState(state_file)
+    days = day_windows(start, end)
+    todo = [day for day in days if not state.is_done(day)]
+    print(f"Backfilling {len(days)} days ({len(days) - len(todo)} already done) with {workers} workers...")
+
+    throttle = Throttle(rate)
+    # Days that have not ended in `timezone` can still get lifelogs, so they are never done
+    today = datetime.now(ZoneInfo(timezone)).date().isoformat()
+    started = time.perf_counter()
+    fetched = delivered = failed = 0
+
+    max_pending = max_pending or workers * 2
+    queued = iter(todo)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+
+        def submit_next():
+            day = next(queued, None)
+            if day is not None:
+                futures[executor.submit(fetch_window, day, timezone, state_file)] = day
+
+        for _ in range(max_pending):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                day = futures.pop(future)
+                try:
+                    day, lifelogs, fetch_seconds = future.result()
+                except Exception as e:
+                    failed += 1
+                    state.window(day).update({"status": "failed", "error": str(e)})
+                    state.save()
+                    print(f"[{day}] fetch failed: {e}")
+                    submit_next()
+                    continue
+
+                fetched += len(lifelogs)
+                try:
+                    delivered += deliver_window(day, lifelogs, state, sink_names, throttle, batch_size, day < today)
+                except sinks.DeliveryError as e:
+                    failed += 1
+                    print(f"[{day}] delivery failed: {e}")
+                submit_next()
+                elapsed = time.perf_counter() - started
+                print(f"[{day}] {len(lifelogs)} lifelogs (fetched in {fetch_seconds:.1f}s), "
+                      f"total {fetched} at {fetched / elapsed:.1f} lifelogs/s")
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "days": len(days),
+        "skipped": len(days) - len(todo),
+        "failed": failed,
+        "lifelogs": fetched,
+        "delivered": delivered,
+        "seconds": round(elapsed, 2),
+        "lifelogs_per_second": round(fetched / elapsed, 2) if elapsed else 0.0,
+    }
+    print(f"Backfill complete: {fetched} lifelogs in {elapsed:.1f}s ({summary['lifelogs_per_second']} lifelogs/s), "
+          f"{failed} failed windows")
+    if failed:
+        print("Run the same command again to retry the failed windows.")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill historical Limitless conversations into the sync sinks")
+    parser.add_argument("--start", required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="Last day, inclusive (default: today)")
+    parser.add_argument("--sinks", default="notion", help=f"Comma-separated sinks ({', '.join(sinks.SINKS)})")
+    parser.add_argument("--workers", type=int, default=4, help="Day windows fetched in parallel")
+    parser.add_argument("--rate", type=float, default=2.0, help="Max lifelogs delivered per second (0 for no limit)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Lifelogs per sink call")
+    parser.add_argument("--timezone", help="IANA timezone for the day windows (default: local)")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE, help="Progress file used to resume")
+    parser.add_argument("--reset", action="store_true", help="Forget previous progress and start over")
+    args = parser.parse_args()
+
+    try:
+        sink_names = sinks.parse_names(args.sinks)
+        start = date.fromisoformat(args.start)
+        end = date.fromisoformat(args.end)
+    except ValueError as e:
+        parser.error(str(e))
+    if end < start:
+        parser.error("--end is before --start")
+    if not os.getenv("LIMITLESS_API_KEY"):
+        print("Error: Missing environment variable: LIMITLESS_API_KEY")
+        return
+
+    if args.reset and os.path.exists(args.state):
+        os.remove(args.state)
+
+    run_backfill(start, end, sink_names, args.workers, args.rate, args.batch_size, args.timezone, args.state)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must not be imported just to load these scripts (only the GUI/chart paths need them)
+HEAVY_MODULES = ("tkinter", "matplotlib", "pandas", "numpy")
+
+# Modules whose import time is tracked
+DEFAULT_MODULES = ("sync_monitor", "_client", "daily_notion_sync", "limitless_to_mem_smart")
+
+
+def measure_import(module, runs=3):
+    """
+    Import `module` in fresh interpreters with -X importtime
+
+    Returns the best total import time and the slowest direct dependencies from that run.
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SCRIPT_DIR, capture_output=True, text=True, check=True,
+            env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+        )
+        imports = []
+        for line in result.stderr.splitlines():
+            # Format: "import time:  self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            self_us, cumulative_us, name = line.replace("import time:", "", 1).split("|", 2)
+            # Nesting is shown by two spaces of indentation per level after the single separator space
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            imports.append({"name": name.strip(), "depth": depth,
+                            "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+
+        # Interpreter startup (site, encodings) is excluded, only the module and what it pulls in counts
+        total_us = next(entry["cumulative_us"] for entry in imports if entry["depth"] == 0 and entry["name"] == module)
+        dependencies = [entry for entry in imports if entry["depth"] == 1]
+        if best is None or total_us < best["total_us"]:
+            heavy = sorted({
+                entry["name"].split(".")[0] for entry in imports
+                if entry["name"].split(".")[0] in HEAVY_MODULES
+            })
+            best = {
+                "module": module,
+                "total_us": total_us,
+                "heavy_modules": heavy,
+                "slowest": sorted(dependencies, key=lambda entry: -entry["cumulative_us"])[:5],
+            }
+    return best
+
+
+def measure_command(args, runs=3):
+    """
+    Best wall time of a full command in a fresh interpreter, in seconds
+    """
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SCRIPT_DIR, capture_output=True, check=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and cold start of the sync scripts")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="Comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if any module takes longer than this to import")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [measure_import(module.strip(), args.runs) for module in args.modules.split(",") if module.strip()]
+    status_seconds = measure_command(["sync_monitor.py", "--status", "--days", "0"], args.runs)
+
+    failures = []
+    for result in results:
+        if result["module"] == "sync_monitor" and result["heavy_modules"]:
+            failures.append(f"sync_monitor imports {', '.join(result['heavy_modules'])} at module load")
+        if args.max_ms is not None and result["total_us"] / 1000 > args.max_ms:
+            failures.append(f"{result['module']} took {result['total_us'] / 1000:.0f}ms to import (max {args.max_ms:.0f}ms)")
+
+    if args.json:
+        print(json.dumps({"imports": results, "status_cold_start_seconds": status_seconds, "failures": failures}, indent=2))
+    else:
+        for result in results:
+            heavy = f"  heavy: {', '.join(result['heavy_modules'])}" if result["heavy_modules"] else ""
+            print(f"{result['module']:<24} {result['total_us'] / 1000:>8.1f}ms{heavy}")
+            for entry in result["slowest"]:
+                print(f"    {entry['name']:<28} {entry['cumulative_us'] / 1000:>8.1f}ms")
+        print(f"\nsync_monitor.py --status cold start: {status_seconds * 1000:.0f}ms")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
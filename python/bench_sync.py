@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from mock_server import generate_corpus, start_mock_server, start_sink_server
+
+# Sync entry points that can be benchmarked: name -> module with main() and LAST_PROCESSED_FILE
+SYNCS = {
+    "notion": "daily_notion_sync",
+    "mem": "limitless_to_mem",
+    "mem_smart": "limitless_to_mem_smart",
+}
+
+# The sync scripts fetch "today" in this timezone, so the backlog has to land there
+SYNC_TIMEZONE = "America/New_York"
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results.jsonl")
+
+
+def _peak_rss_kb():
+    """
+    Peak resident set size of this process in KB (ru_maxrss is bytes on macOS, KB on Linux)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_child(sync_name, result_path, checkpoint_path):
+    """
+    Run one sync entry point in this (fresh) process and write timings to result_path
+    """
+    module = __import__(SYNCS[sync_name])
+    module.LAST_PROCESSED_FILE = checkpoint_path
+
+    # The sync scripts are chatty, keep their output out of the benchmark report
+    with open(os.devnull, "w") as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            started = time.perf_counter()
+            module.main()
+            wall = time.perf_counter() - started
+        finally:
+            sys.stdout = stdout
+
+    with open(result_path, "w") as f:
+        json.dump({"wall_seconds": wall, "peak_rss_kb": _peak_rss_kb()}, f)
+
+
+def run_scenario(sync_name, size, args):
+    """
+    Run one sync over a synthetic backlog of `size` conversations and return its result record
+    """
+    # Place the whole backlog on "today" in the timezone the sync scripts query
+    now = datetime.now(timezone.utc)
+    local_midnight = now.astimezone(ZoneInfo(SYNC_TIMEZONE)).replace(hour=0, minute=0, second=0, microsecond=0)
+    corpus = generate_corpus(
+        count=size,
+        start=local_midnight.astimezone(timezone.utc),
+        end=max(now, local_midnight.astimezone(timezone.utc) + timedelta(hours=1)),
+        seed=args.seed,
+        payload_bytes=args.payload_bytes,
+    )
+
+    limitless = start_mock_server(
+        corpus,
+        latency=args.limitless_latency,
+        error_rate=args.limitless_error_rate,
+    )
+    sink = start_sink_server(
+        latency=args.sink_latency,
+        rate_limit=args.sink_rate_limit,
+        burst=args.sink_burst,
+    )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        checkpoint_path = os.path.join(workdir, "last_processed.json")
+        result_path = os.path.join(workdir, "result.json")
+
+        # Seed the checkpoint with an id that is not in the backlog so every conversation is new
+        with open(checkpoint_path, "w") as f:
+            json.dump({"last_id": "bench-seed", "last_timestamp": now.isoformat()}, f)
+
+        env = dict(os.environ)
+        env.update({
+            "LIMITLESS_API_URL": limitless.url,
+            "LIMITLESS_API_KEY": "bench",
+            "NOTION_API_URL": sink.url,
+            "NOTION_API_KEY": "bench",
+            "NOTION_DATABASE_ID": "bench",
+            "MEM_API_URL": sink.url,
+            "MEM_API_KEY": "bench",
+            # Measure the sync itself: no shared limiter (the sink stand-in simulates rate
+            # limits with --sink-rate-limit) and no page cache
+            "RATE_LIMITS": "off",
+            "PAGE_CACHE": "off",
+        })
+
+        cmd = [
+            sys.executable, os.path.abspath(__file__),
+            "--child", sync_name,
+            "--result", result_path,
+            "--checkpoint", checkpoint_path,
+        ]
+        started = time.perf_counter()
+        subprocess.run(cmd, env=env, check=True)
+        process_wall = time.perf_counter() - started
+
+        with open(result_path) as f:
+            child = json.load(f)
+
+    limitless.shutdown()
+    sink.shutdown()
+
+    return {
+        "timestamp": now.isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "sync": sync_name,
+        "conversations": size,
+        "wall_seconds": round(child["wall_seconds"], 4),
+        "process_wall_seconds": round(process_wall, 4),
+        "peak_rss_kb": child["peak_rss_kb"],
+        "limitless": {
+            "requests": limitless.stats["requests"],
+            "bytes": limitless.stats["bytes"],
+            "statuses": limitless.stats["statuses"],
+        },
+        "sink": {
+            "requests": sink.stats["requests"],
+            "bytes_sent": sink.stats["bytes_received"],
+            "bytes_received": sink.stats["bytes_sent"],
+            "statuses": sink.stats["statuses"],
+        },
+        "settings": {
+            "payload_bytes": args.payload_bytes,
+            "limitless_latency": args.limitless_latency,
+            "limitless_error_rate": args.limitless_error_rate,
+            "sink_latency": args.sink_latency,
+            "sink_rate_limit": args.sink_rate_limit,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the sync entry points against local stand-ins")
+    parser.add_argument("--syncs", default="notion,mem_smart", help=f"Comma-separated syncs to run ({', '.join(SYNCS)})")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated backlog sizes")
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="Approximate markdown size per conversation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limitless-latency", type=float, default=0.05, help="Mock Limitless latency per request (s)")
+    parser.add_argument("--limitless-error-rate", type=float, default=0.0, help="Fraction of Limitless requests that fail")
+    parser.add_argument("--sink-latency", type=float, default=0.05, help="Notion/Mem stand-in latency per request (s)")
+    parser.add_argument("--sink-rate-limit", type=float, default=None, help="Notion/Mem stand-in requests per second")
+    parser.add_argument("--sink-burst", type=int, default=None, help="Notion/Mem stand-in burst size")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON Lines file to append results to")
+    # Internal: run a single sync inside a fresh interpreter
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--checkpoint", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.result, args.checkpoint)
+        return
+
+    syncs = [name.strip() for name in args.syncs.split(",") if name.strip()]
+    unknown = [name for name in syncs if name not in SYNCS]
+    if unknown:
+        parser.error(f"Unknown syncs: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    print(f"{'sync':<10} {'size':>6} {'wall (s)':>9} {'req':>6} {'MB':>8} {'RSS (MB)':>9}")
+    with open(args.output, "a") as out:
+        for sync_name in syncs:
+            for size in sizes:
+                result = run_scenario(sync_name, size, args)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+
+                requests_total = result["limitless"]["requests"] + result["sink"]["requests"]
+                megabytes = (
+                    result["limitless"]["bytes"]
+                    + result["sink"]["bytes_sent"]
+                    + result["sink"]["bytes_received"]
+                ) / 1e6
+                print(f"{sync_name:<10} {size:>6} {result['wall_seconds']:>9.2f} {requests_total:>6} "
+                      f"{megabytes:>8.2f} {result['peak_rss_kb'] / 1024:>9.1f}")
+
+    print(f"\nResults appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlsplit, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import _client
+
+CASSETTE_VERSION = 1
+
+# Headers that carry credentials; their values are scrubbed everywhere in the cassette
+SECRET_HEADERS = ("X-API-Key", "Authorization")
+
+# Environment variables whose values must never end up in a cassette
+SECRET_ENV_VARS = ("LIMITLESS_API_KEY", "NOTION_API_KEY", "NOTION_DATABASE_ID", "MEM_API_KEY", "OPENAI_API_KEY")
+
+# Request parameters and JSON body fields that are scrubbed by name
+SECRET_FIELDS = ("api_key", "apikey", "token", "database_id")
+
+# Response headers worth keeping, everything else is dropped to keep cassettes compact
+KEPT_RESPONSE_HEADERS = ("Content-Type", "Retry-After")
+
+SCRUBBED = "<scrubbed>"
+
+# Shorter secret values are not scrubbed: replacing them would mangle unrelated text
+MIN_SECRET_LENGTH = 4
+
+MODES = ("record", "replay", "replay-fast")
+
+
+class CassetteMiss(Exception):
+    """
+    Raised on replay when a request has no matching recorded interaction
+    """
+
+
+def _request_key(method, url, params=None):
+    """
+    Match requests on method, path and query only, so a cassette recorded against the
+    production API replays against any base URL
+    """
+    parts = urlsplit(url)
+    query = dict(params or {})
+    return f"{method.upper()} {parts.path}?{urlencode(sorted(query.items()))}"
+
+
+def _scrub_fields(value):
+    if isinstance(value, dict):
+        return {
+            key: SCRUBBED if key.lower() in SECRET_FIELDS else _scrub_fields(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_scrub_fields(item) for item in value]
+    return value
+
+
+class Cassette:
+    """
+    A recorded HTTP session stored as gzipped JSON Lines
+
+    The first line is a header, every following line is one interaction in the order it happened.
+    """
+    def __init__(self, path, mode="replay"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.interactions = []
+        self._queues = defaultdict(deque)
+        self._secrets = set()
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._real_transport = None
+
+        if mode != "record":
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version: {header.get('version')}")
+            self.interactions = [json.loads(line) for line in f if line.strip()]
+
+        for interaction in self.interactions:
+            self._queues[interaction["key"]].append(interaction)
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CASSETTE_VERSION, "interactions": len(self.interactions)}) + "\n")
+            for interaction in self.interactions:
+                f.write(json.dumps(self._scrub(interaction), separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _scrub(self, value):
+        """
+        Replace every known secret inside the string values of an interaction (the URL,
+        query, body and response text); keys and the cassette's structure are left alone
+        """
+        if isinstance(value, dict):
+            return {key: self._scrub(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._scrub(item) for item in value]
+        if isinstance(value, str):
+            for secret in sorted(self._secrets, key=len, reverse=True):
+                value = value.replace(secret, SCRUBBED)
+        return value
+
+    def _add_secret(self, value):
+        if value and len(value) >= MIN_SECRET_LENGTH:
+            self._secrets.add(value)
+
+    def _remember_secrets(self, headers):
+        for name in SECRET_ENV_VARS:
+            self._add_secret(os.getenv(name))
+        for name, value in (headers or {}).items():
+            if name.lower() in (h.lower() for h in SECRET_HEADERS) and value:
+                self._add_secret(str(value))
+                # Bearer tokens: scrub the bare token too
+                self._add_secret(str(value).split(" ")[-1])
+
+    def record(self, method, url, **kwargs):
+        """
+        Transport that performs the real request and records it
+        """
+        self._remember_secrets(kwargs.get("headers"))
+        interaction = {
+            "key": _request_key(method, url, _scrub_fields(kwargs.get("params"))),
+            "method": method.upper(),
+            "url": url,
+            "body": _scrub_fields(kwargs.get("json")),
+            "offset": round(time.monotonic() - self._started, 4),
+        }
+
+        started = time.monotonic()
+        try:
+            response = self._real_transport(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            interaction["elapsed"] = round(time.monotonic() - started, 4)
+            interaction["error"] = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self.interactions.append(interaction)
+            raise
+
+        interaction["elapsed"] = round(time.monotonic() - started, 4)
+        interaction["status"] = response.status_code
+        interaction["reason"] = response.reason
+        interaction["headers"] = {
+            name: response.headers[name] for name in KEPT_RESPONSE_HEADERS if name in response.headers
+        }
+        interaction["response"] = response.text
+        with self._lock:
+            self.interactions.append(interaction)
+        return response
+
+    def replay(self, method, url, **kwargs):
+        """
+        Transport that answers from the recorded interactions in order
+        """
+        key = _request_key(method, url, _scrub_fields(kwargs.get("params")))
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteMiss(f"No recorded interaction left for {key}")
+            interaction = queue.popleft()
+
+        if self.mode == "replay":
+            time.sleep(interaction.get("elapsed", 0))
+
+        if "error" in interaction:
+            raise requests.exceptions.ConnectionError(interaction["error"])
+
+        response = requests.models.Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction.get("reason")
+        response.headers = CaseInsensitiveDict(interaction.get("headers", {}))
+        response._content = interaction["response"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        response.elapsed = timedelta(seconds=interaction.get("elapsed", 0))
+        return response
+
+    def install(self):
+        """
+        Route the shared client transport through this cassette
+        """
+        transport = self.record if self.mode == "record" else self.replay
+        # Cached pages would never reach the cassette: nothing recorded, or misses on replay.
+        # Replay never touches the API, so it is not rate limited either.
+        self._real_transport = _client.set_transport(transport, cached=False, rate_limited=self.mode == "record")
+
+    def uninstall(self):
+        _client.set_transport(self._real_transport)
+        if self.mode == "record":
+            self.save()
+
+    def unused(self):
+        """
+        Number of recorded interactions that were never replayed
+        """
+        return sum(len(queue) for queue in self._queues.values())
+
+
+@contextmanager
+def use_cassette(path, mode="replay"):
+    """
+    Record or replay all client HTTP traffic inside the block
+
+    mode is "record", "replay" (at recorded speed) or "replay-fast" (no delays).
+    """
+    cassette = Cassette(path, mode)
+    cassette.install()
+    try:
+        yield cassette
+    finally:
+        cassette.uninstall()
+
+
+def install_from_env():
+    """
+    Install a process-wide cassette from LIMITLESS_CASSETTE and LIMITLESS_CASSETTE_MODE
+    """
+    import atexit
+
+    cassette = Cassette(os.environ["LIMITLESS_CASSETTE"], os.getenv("LIMITLESS_CASSETTE_MODE") or "replay")
+    cassette.install()
+    atexit.register(cassette.uninstall)
+    return cassette
+
+
+def main():
+    import argparse
+    import runpy
+    import sys
+
+    parser = argparse.ArgumentParser(description="Run a script while recording or replaying its HTTP traffic")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("cassette", help="Cassette file (gzipped JSON Lines)")
+    parser.add_argument("script", help="Python script to run, e.g. daily_notion_sync.py")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    sys.argv = [args.script] + args.script_args
+    started = time.perf_counter()
+    with use_cassette(args.cassette, args.mode) as cassette:
+        runpy.run_path(args.script, run_name="__main__")
+    elapsed = time.perf_counter() - started
+
+    if args.mode == "record":
+        print(f"Recorded {len(cassette.interactions)} interactions to {args.cassette} in {elapsed:.2f}s")
+    else:
+        print(f"Replayed {len(cassette.interactions) - cassette.unused()} of {len(cassette.interactions)} "
+              f"interactions in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
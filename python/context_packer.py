@@ -0,0 +1,251 @@
+import argparse
+import math
+import os
+import re
+from collections import Counter
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import tzlocal
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Tokens available for transcripts in one summarization call (the rest of a 128k window
+# is left for the prompt and the reply)
+DEFAULT_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET") or 100000)
+
+# A section without headings is split after this many lines
+SEGMENT_MAX_LINES = 30
+
+# How much each normalized feature counts towards a segment's score
+WEIGHTS = {"duration": 1.0, "speakers": 0.5, "keywords": 1.0, "query": 3.0}
+
+# The day's most common words (that appear in more than one segment) count as keywords
+KEYWORD_COUNT = 50
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = set("""
+a about after all also am an and any are as at be because been but by can could did do does
+don't for from get go going got had has have he her here him his how i i'm if in into is it
+it's just know like me my no not now of oh ok okay on one or our out really right say said
+she so some that that's the their them then there they think this to up us was we well were
+what when where which who will with would yeah yes you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (about four characters per token for English)
+    """
+    return len(text) // 4 + 1
+
+
+def _terms(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+def _walk(nodes):
+    for node in nodes or []:
+        yield node
+        yield from _walk(node.get("children"))
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def segments(lifelogs, max_lines=SEGMENT_MAX_LINES):
+    """
+    Split lifelogs into transcript segments, one per heading2 section (or every `max_lines` lines)
+
+    Each segment is a dict with title, heading, start (datetime or None), duration_s,
+    speakers and lines ([(speaker, text)]). Lifelogs without `contents` become one
+    segment of their markdown.
+    """
+    result = []
+    for lifelog in lifelogs:
+        lifelog_start = _parse_time(lifelog.get("startTime"))
+        current = None
+
+        def close():
+            if current and current["lines"]:
+                offsets = current.pop("offsets")
+                if offsets:
+                    current["duration_s"] = (max(end for _, end in offsets) - min(start for start, _ in offsets)) / 1000
+                    if lifelog_start and current["start"] is None:
+                        current["start"] = lifelog_start + timedelta(milliseconds=min(start for start, _ in offsets))
+                current["speakers"] = len({speaker for speaker, _ in current["lines"]})
+                result.append(current)
+
+        def new_segment(heading):
+            return {"title": lifelog.get("title") or "Untitled", "heading": heading, "start": None,
+                    "duration_s": 0.0, "lines": [], "offsets": []}
+
+        for node in _walk(lifelog.get("contents")):
+            if node.get("type") in ("heading1", "heading2", "heading3"):
+                if node.get("type") != "heading1" or current is None:
+                    close()
+                    current = new_segment(node.get("content"))
+                continue
+            if node.get("type") != "blockquote" or not node.get("content"):
+                continue
+            if current is None or len(current["lines"]) >= max_lines:
+                close()
+                current = new_segment(current["heading"] if current else None)
+            current["lines"].append((node.get("speakerName") or "Unknown", node["content"]))
+            if current["start"] is None:
+                current["start"] = _parse_time(node.get("startTime"))
+            if node.get("startOffsetMs") is not None and node.get("endOffsetMs") is not None:
+                current["offsets"].append((node["startOffsetMs"], node["endOffsetMs"]))
+        close()
+
+        if current is None and lifelog.get("markdown"):
+            end = _parse_time(lifelog.get("endTime"))
+            result.append({
+                "title": lifelog.get("title") or "Untitled",
+                "heading": None,
+                "start": lifelog_start,
+                "duration_s": (end - lifelog_start).total_seconds() if end and lifelog_start else 0.0,
+                "speakers": 0,
+                "lines": [(None, lifelog["markdown"])],
+            })
+    return result
+
+
+def render(segment, timezone=None):
+    """
+    A segment as a "## HH:MM title / heading" header and its lines, with the time in `timezone` (default: local)
+    """
+    tz = ZoneInfo(timezone) if timezone else tzlocal.get_localzone()
+    start = segment["start"].astimezone(tz).strftime("%H:%M") if segment["start"] else "--:--"
+    header = f"## {start} {segment['title']}"
+    if segment["heading"] and segment["heading"] != segment["title"]:
+        header += f" / {segment['heading']}"
+    lines = [text if speaker is None else f"{speaker}: {text}" for speaker, text in segment["lines"]]
+    return header + "\n" + "\n".join(lines)
+
+
+def score_segments(items, query=None):
+    """
+    Score segments in place for relevance and information density
+
+    Features, each scaled to 0..1 across the day: duration, number of speakers, density
+    of the day's recurring keywords and, with a query, BM25 against the query.
+    """
+    terms = [_terms(" ".join(text for _, text in segment["lines"])) for segment in items]
+    counts = [Counter(doc) for doc in terms]
+
+    document_frequency = Counter()
+    for doc in counts:
+        document_frequency.update(doc.keys())
+    totals = Counter()
+    for doc in counts:
+        totals.update(doc)
+    keywords = {word for word, _ in Counter(
+        {word: n for word, n in totals.items() if document_frequency[word] > 1}
+    ).most_common(KEYWORD_COUNT)}
+
+    query_terms = _terms(query) if query else []
+    average_length = sum(len(doc) for doc in terms) / len(terms) if terms else 0.0
+    features = []
+    for doc, count in zip(terms, counts):
+        bm25 = 0.0
+        for term in query_terms:
+            tf = count.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(terms) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length) if average_length else BM25_K1
+            bm25 += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        features.append({
+            "keywords": sum(count[word] for word in keywords) / len(doc) if doc else 0.0,
+            "query": bm25,
+        })
+    for segment, feature in zip(items, features):
+        # Long monologues shouldn't outrank everything else, so duration grows logarithmically
+        feature["duration"] = math.log1p(segment["duration_s"])
+        feature["speakers"] = segment["speakers"]
+
+    for name in WEIGHTS:
+        top = max((feature[name] for feature in features), default=0.0)
+        for segment, feature in zip(items, features):
+            segment.setdefault("features", {})[name] = feature[name] / top if top else 0.0
+    for segment in items:
+        segment["score"] = sum(WEIGHTS[name] * value for name, value in segment["features"].items())
+    return items
+
+
+def pack(lifelogs, budget=DEFAULT_BUDGET, query=None, timezone=None):
+    """
+    Pack the most relevant segments of `lifelogs` into `budget` tokens
+
+    Returns (text, stats). Segments are chosen best score first, skipping any that no
+    longer fit, and then written in chronological order so the transcript still reads
+    as a day. Segment times are shown in `timezone` (default: local).
+    """
+    items = score_segments(segments(lifelogs), query)
+    for segment in items:
+        segment["text"] = render(segment, timezone)
+        segment["tokens"] = estimate_tokens(segment["text"])
+
+    chosen = []
+    used = 0
+    for segment in sorted(items, key=lambda s: s["score"], reverse=True):
+        if used + segment["tokens"] <= budget:
+            chosen.append(segment)
+            used += segment["tokens"]
+
+    # Segments without a time keep their original order after the timed ones
+    order = {id(segment): i for i, segment in enumerate(items)}
+    chosen.sort(key=lambda s: (s["start"] is None, s["start"].timestamp() if s["start"] else 0, order[id(s)]))
+    text = "\n\n".join(segment["text"] for segment in chosen)
+    omitted = len(items) - len(chosen)
+    if omitted:
+        text += f"\n\n[{omitted} lower-ranked segments omitted to fit the context window]"
+
+    return text, {
+        "segments": len(items),
+        "packed": len(chosen),
+        "tokens": used,
+        "total_tokens": sum(segment["tokens"] for segment in items),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview which parts of a day fit into a summarization token budget")
+    parser.add_argument("--date", default=date.today().isoformat(), help="Day to pack (YYYY-MM-DD, default: today)")
+    parser.add_argument("--timezone", help="IANA timezone for the day (default: local)")
+    parser.add_argument("--query", help="Prefer segments about this")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="Token budget")
+    parser.add_argument("--print", action="store_true", help="Print the packed context")
+    args = parser.parse_args()
+
+    from _client import get_lifelogs
+
+    timezone = args.timezone or str(tzlocal.get_localzone())
+    lifelogs = get_lifelogs(
+        api_key=os.getenv("LIMITLESS_API_KEY"),
+        date=args.date,
+        timezone=timezone,
+        limit=None,
+        includeHeadings=True,
+    )
+    text, stats = pack(lifelogs, args.budget, args.query, timezone)
+    if args.print:
+        print(text)
+    print(f"Packed {stats['packed']} of {stats['segments']} segments from {len(lifelogs)} lifelogs: "
+          f"{stats['tokens']} of {stats['total_tokens']} tokens (budget {args.budget})")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import argparse
 import os
-import requests
 import json
 from datetime import datetime, timedelta
-from _client import get_lifelogs
+from _client import get_lifelogs, request
+import tracing
+import dead_letter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +13,10 @@ load_dotenv()
 # File to store the last processed conversation timestamp
 LAST_PROCESSED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_processed.json")
 
+# Base URL for the Notion API (override to point at a local stand-in)
+NOTION_API_URL = os.getenv("NOTION_API_URL") or "https://api.notion.com"
+
+@tracing.traced("format")
 def format_for_notion(lifelogs):
     """
     Format lifelogs for insertion into a Notion database
@@ -38,74 +44,118 @@ def format_for_notion(lifelogs):
     
     return formatted_entries
 
-def send_to_notion(entries, notion_api_key, database_id):
+def create_notion_page(data, notion_api_key):
     """
-    Send formatted entries to a Notion database
+    Create one Notion page from a request body and return the response
     """
-    if not entries:
-        print("No new entries to add to Notion")
-        return
-        
     headers = {
         "Authorization": f"Bearer {notion_api_key}",
         "Content-Type": "application/json",
         "Notion-Version": "2022-06-28"
     }
-    
-    for entry in entries:
-        # Construct Notion page properties based on your database schema
-        # Adjust property names and types to match your Notion database
-        properties = {
-            "Name": {
-                "title": [
-                    {
-                        "text": {
-                            "content": entry["title"]
-                        }
-                    }
-                ]
-            },
-            "Content": {
-                "rich_text": [
-                    {
-                        "text": {
-                            "content": entry["content"][:2000] if len(entry["content"]) > 2000 else entry["content"]
-                        }
+    return request("POST", f"{NOTION_API_URL}/v1/pages", headers=headers, json=data)
+
+def retry_notion_page(data):
+    """
+    Dead-letter retry handler: re-send a page body that failed before
+    """
+    response = create_notion_page(data, os.getenv("NOTION_API_KEY"))
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+def notion_page_data(entry, database_id):
+    """
+    Build the request body that creates a Notion page for a formatted entry
+    """
+    # Construct Notion page properties based on your database schema
+    # Adjust property names and types to match your Notion database
+    properties = {
+        "Name": {
+            "title": [
+                {
+                    "text": {
+                        "content": entry["title"]
                     }
-                ]
-            },
-            "Start Time": {
-                "date": {
-                    "start": entry["start_time"]
                 }
-            },
-            "End Time": {
-                "date": {
-                    "start": entry["end_time"]
-                }
-            },
-            "Source": {
-                "select": {
-                    "name": "Limitless"
+            ]
+        },
+        "Content": {
+            "rich_text": [
+                {
+                    "text": {
+                        "content": entry["content"][:2000] if len(entry["content"]) > 2000 else entry["content"]
+                    }
                 }
+            ]
+        },
+        "Start Time": {
+            "date": {
+                "start": entry["start_time"]
+            }
+        },
+        "End Time": {
+            "date": {
+                "start": entry["end_time"]
+            }
+        },
+        "Source": {
+            "select": {
+                "name": "Limitless"
             }
         }
-        
-        # Create the page in Notion
-        data = {
-            "parent": {"database_id": database_id},
-            "properties": properties
-        }
-        
-        response = requests.post("https://api.notion.com/v1/pages", headers=headers, json=data)
-        
-        if response.status_code != 200:
-            print(f"Error creating Notion page: {response.status_code}")
-            print(response.json())
-        else:
-            print(f"Successfully added entry: {entry['title']}")
-            # Update last processed timestamp
-            save_last_processed(entry["id"], entry["end_time"])
+    }
+    
+    return {
+        "parent": {"database_id": database_id},
+        "properties": properties
+    }
+
+def write_notion_page(entry, data, notion_api_key):
+    """
+    Create the page for one entry; returns True on success
+
+    A failed write is added to the dead-letter queue, a successful one clears any
+    dead-letter item for the entry so the retrier does not create it again.
+    """
+    try:
+        response = create_notion_page(data, notion_api_key)
+        error = None if response.status_code == 200 else f"HTTP {response.status_code}: {response.text[:500]}"
+    except Exception as e:
+        error = str(e)
+
+    if error:
+        print(f"Error creating Notion page: {error}")
+        # Parked for the background retrier so an outage does not lose the conversation
+        dead_letter.DeadLetterQueue().add("notion", entry["id"], data, error)
+        return False
+    print(f"Successfully added entry: {entry['title']}")
+    dead_letter.DeadLetterQueue().record_delivered("notion", [entry["id"]])
+    return True
+
+@tracing.traced("deliver")
+def send_to_notion(entries, notion_api_key, database_id, update_checkpoint=True):
+    """
+    Send formatted entries to a Notion database
+
+    Returns the number of pages created. Pass update_checkpoint=False for entries that did not
+    come from the polling fetch (e.g. pushed ones) so the poller's last processed ID is kept.
+    """
+    if not entries:
+        print("No new entries to add to Notion")
+        return 0
+    
+    created = 0
+    
+    for entry in entries:
+        if write_notion_page(entry, notion_page_data(entry, database_id), notion_api_key):
+            created += 1
+    
+    # Entries arrive newest first. Failed ones are parked in the dead-letter queue, so the
+    # checkpoint moves past the whole batch and the next run does not send them again.
+    if update_checkpoint:
+        save_last_processed(entries[0]["id"], entries[0]["end_time"])
+    
+    return created
 
 def get_last_processed():
     """
@@ -132,6 +182,7 @@ def get_last_processed():
             "last_timestamp": (datetime.now() - timedelta(days=7)).isoformat()
         }
 
+@tracing.traced("checkpoint")
 def save_last_processed(conversation_id, timestamp):
     """
     Save the last processed conversation timestamp
@@ -144,6 +195,7 @@ def save_last_processed(conversation_id, timestamp):
     with open(LAST_PROCESSED_FILE, "w") as f:
         json.dump(data, f)
 
+@tracing.traced("fetch")
 def get_recent_conversations():
     """
     Get recent conversations (since last processed)
@@ -202,6 +254,7 @@ def get_recent_conversations():
     print(f"Found {len(new_lifelogs)} new conversations")
     return new_lifelogs
 
+@tracing.traced("run")
 def main():
     # Check for required environment variables
     required_vars = ["LIMITLESS_API_KEY", "NOTION_API_KEY", "NOTION_DATABASE_ID"]
@@ -234,4 +287,10 @@ def main():
     print("Sync complete!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync recent Limitless conversations to a Notion database")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    
+    finish_trace = tracing.configure(args.trace, args.profile)
+    main()
+    finish_trace() 
\ No newline at end of file
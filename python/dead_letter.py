@@ -0,0 +1,361 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.getenv("DEAD_LETTER_DB") or os.path.join(SCRIPT_DIR, "dead_letters.db")
+
+# Delay before retry N is BASE_DELAY * 2^(N-1), capped at MAX_DELAY (seconds)
+BASE_DELAY = 60
+MAX_DELAY = 6 * 60 * 60
+
+# Items still failing after this many attempts are parked as "abandoned" until retried by hand
+MAX_ATTEMPTS = 10
+
+# A claim older than this belongs to a retrier that died mid-attempt
+CLAIM_TIMEOUT = 10 * 60
+
+# Delivered item keys are remembered this long (seconds), well past any retry delay
+DELIVERED_RETENTION = 30 * 24 * 60 * 60
+
+# Function that re-delivers a payload for each sink, as "module:function"
+# (raises on failure; imported only when a retry runs)
+HANDLERS = {
+    "notion": "daily_notion_sync:retry_notion_page",
+    "mem": "limitless_to_mem:retry_mem_note",
+    "mem_smart": "limitless_to_mem_smart:retry_mem_it",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sink TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'pending',
+    first_failed_at REAL NOT NULL,
+    last_failed_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    UNIQUE (sink, item_key)
+);
+CREATE INDEX IF NOT EXISTS dead_letters_due ON dead_letters (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS delivered (
+    sink TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    delivered_at REAL NOT NULL,
+    PRIMARY KEY (sink, item_key)
+);
+CREATE INDEX IF NOT EXISTS delivered_at ON delivered (delivered_at);
+"""
+
+
+def backoff_delay(attempts):
+    """
+    Exponential backoff with +-10% jitter so items that failed together spread out
+    """
+    delay = min(BASE_DELAY * 2 ** max(attempts - 1, 0), MAX_DELAY)
+    return delay * random.uniform(0.9, 1.1)
+
+
+class DeadLetterQueue:
+    """
+    Persistent per-sink queue of payloads whose delivery failed
+
+    Backed by SQLite so the sync scripts, schedulers and retriers in different processes
+    share it. Each (sink, item_key) pair is stored once; a repeated failure updates it.
+    Keys delivered by either the live sync or a retry are remembered, so the other path
+    skips them instead of creating a duplicate.
+    """
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """
+        A connection for one transaction, committed (or rolled back) and closed on exit
+        """
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def add(self, sink, item_key, payload, error):
+        """
+        Record a failed delivery; it will be retried after a backoff delay
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO dead_letters (sink, item_key, payload, error, first_failed_at, last_failed_at, next_attempt_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (sink, item_key) DO UPDATE SET
+                    payload = excluded.payload,
+                    error = excluded.error,
+                    attempts = attempts + 1,
+                    status = 'pending',
+                    last_failed_at = excluded.last_failed_at,
+                    next_attempt_at = excluded.next_attempt_at,
+                    claimed_at = NULL
+                """,
+                (sink, str(item_key), json.dumps(payload), str(error), now, now, now + backoff_delay(1)),
+            )
+        metrics.inc("dead_letter_added_total", sink=sink)
+        print(f"Added {sink} item {item_key} to the dead-letter queue: {error}")
+
+    def record_delivered(self, sink, item_keys):
+        """
+        Remember that `item_keys` reached `sink` and drop their dead-letter rows
+        """
+        now = time.time()
+        rows = [(sink, str(key), now) for key in item_keys if key]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO delivered (sink, item_key, delivered_at) VALUES (?, ?, ?)", rows)
+            conn.executemany("DELETE FROM dead_letters WHERE sink = ? AND item_key = ?", [row[:2] for row in rows])
+            conn.execute("DELETE FROM delivered WHERE delivered_at < ?", (now - DELIVERED_RETENTION,))
+
+    def delivered_keys(self, sink, item_keys):
+        """
+        The subset of `item_keys` already delivered to `sink`
+        """
+        keys = [str(key) for key in item_keys if key]
+        delivered = set()
+        with self._connect() as conn:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                delivered.update(row["item_key"] for row in conn.execute(
+                    f"SELECT item_key FROM delivered WHERE sink = ? AND item_key IN ({','.join('?' * len(chunk))})",
+                    [sink, *chunk],
+                ))
+        return delivered
+
+    def claim_due(self, sinks=None, limit=10):
+        """
+        Atomically claim up to `limit` items that are due for a retry
+        """
+        now = time.time()
+        claimed = []
+        with self._connect() as conn:
+            query = """
+                SELECT * FROM dead_letters
+                WHERE (status = 'pending' AND next_attempt_at <= ?)
+                   OR (status = 'retrying' AND claimed_at < ?)
+            """
+            params = [now, now - CLAIM_TIMEOUT]
+            if sinks:
+                query = f"SELECT * FROM ({query}) WHERE sink IN ({','.join('?' * len(sinks))})"
+                params.extend(sinks)
+            for row in conn.execute(query + " ORDER BY next_attempt_at LIMIT ?", params + [limit]).fetchall():
+                # Only one retrier wins each row, even with several processes polling
+                updated = conn.execute(
+                    "UPDATE dead_letters SET status = 'retrying', claimed_at = ? WHERE id = ? AND status = ? AND claimed_at IS ?",
+                    (now, row["id"], row["status"], row["claimed_at"]),
+                ).rowcount
+                if updated:
+                    claimed.append(dict(row, payload=json.loads(row["payload"])))
+        return claimed
+
+    def mark_delivered(self, item_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM dead_letters WHERE id = ?", (item_id,))
+
+    def mark_failed(self, item_id, error):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM dead_letters WHERE id = ?", (item_id,)).fetchone()
+            if row is None:
+                return
+            attempts = row["attempts"] + 1
+            status = "abandoned" if attempts >= MAX_ATTEMPTS else "pending"
+            conn.execute(
+                """
+                UPDATE dead_letters
+                SET attempts = ?, status = ?, error = ?, last_failed_at = ?, next_attempt_at = ?, claimed_at = NULL
+                WHERE id = ?
+                """,
+                (attempts, status, str(error), now, now + backoff_delay(attempts), item_id),
+            )
+
+    def requeue(self, sink=None, include_abandoned=True):
+        """
+        Make items due now (e.g. after an outage is over); returns how many
+        """
+        statuses = ("pending", "abandoned") if include_abandoned else ("pending",)
+        query = f"UPDATE dead_letters SET status = 'pending', next_attempt_at = ? WHERE status IN ({','.join('?' * len(statuses))})"
+        params = [time.time(), *statuses]
+        if sink:
+            query += " AND sink = ?"
+            params.append(sink)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def next_due_at(self, sinks=None):
+        query = "SELECT MIN(next_attempt_at) FROM dead_letters WHERE status = 'pending'"
+        params = []
+        if sinks:
+            query += f" AND sink IN ({','.join('?' * len(sinks))})"
+            params.extend(sinks)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+    def items(self, sink=None):
+        query = "SELECT id, sink, item_key, error, attempts, status, first_failed_at, next_attempt_at FROM dead_letters"
+        params = []
+        if sink:
+            query += " WHERE sink = ?"
+            params.append(sink)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY first_failed_at", params)]
+
+    def counts(self):
+        """
+        {sink: {status: count}}
+        """
+        counts = {}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT sink, status, COUNT(*) AS n FROM dead_letters GROUP BY sink, status"):
+                counts.setdefault(row["sink"], {})[row["status"]] = row["n"]
+        return counts
+
+
+def _handler(sink):
+    module_name, function_name = HANDLERS[sink].split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def retry_item(queue, item):
+    """
+    Attempt one claimed item and record the outcome; returns True if it was delivered
+
+    Items the live sync delivered in the meantime are dropped without calling the handler.
+    """
+    if queue.delivered_keys(item["sink"], [item["item_key"]]):
+        queue.mark_delivered(item["id"])
+        metrics.inc("dead_letter_retries_total", sink=item["sink"], result="skipped")
+        print(f"Skipped {item['sink']} item {item['item_key']}: already delivered")
+        return True
+    try:
+        _handler(item["sink"])(item["payload"])
+    except Exception as e:
+        queue.mark_failed(item["id"], e)
+        metrics.inc("dead_letter_retries_total", sink=item["sink"], result="failure")
+        print(f"Retry of {item['sink']} item {item['item_key']} failed (attempt {item['attempts'] + 1}): {e}")
+        return False
+    queue.record_delivered(item["sink"], [item["item_key"]])
+    metrics.inc("dead_letter_retries_total", sink=item["sink"], result="success")
+    print(f"Delivered {item['sink']} item {item['item_key']} from the dead-letter queue")
+    return True
+
+
+class DeadLetterRetrier(threading.Thread):
+    """
+    Background thread that retries due items at most `rate` per second
+
+    The rate limit is separate from the live sync path, so draining a backlog after an
+    outage does not compete with new conversations for the sink's API quota.
+    """
+    def __init__(self, sinks=None, rate=None, path=DEFAULT_DB, max_sleep=60):
+        super().__init__(name="dead-letter-retrier", daemon=True)
+        self.queue = DeadLetterQueue(path)
+        self.sinks = list(sinks) if sinks else None
+        self.rate = rate if rate is not None else float(os.getenv("DEAD_LETTER_RATE") or 0.5)
+        self.max_sleep = max_sleep
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                items = self.queue.claim_due(self.sinks)
+            except sqlite3.Error as e:
+                print(f"Error reading the dead-letter queue: {e}")
+                items = []
+
+            for item in items:
+                if self.stop_event.is_set():
+                    break
+                retry_item(self.queue, item)
+                if self.rate:
+                    self.stop_event.wait(1.0 / self.rate)
+
+            if items:
+                continue
+
+            # Sleep until the next item is due (new items are picked up within max_sleep)
+            next_due = self.queue.next_due_at(self.sinks)
+            delay = self.max_sleep if next_due is None else min(max(next_due - time.time(), 0), self.max_sleep)
+            self.stop_event.wait(delay)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def start_retrier(sinks=None, rate=None):
+    """
+    Start a retrier thread unless DEAD_LETTER_RETRY is set to 0
+    """
+    if os.getenv("DEAD_LETTER_RETRY", "1").lower() in ("0", "false", "no"):
+        return None
+    retrier = DeadLetterRetrier(sinks, rate)
+    retrier.start()
+    return retrier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and retry failed sink deliveries")
+    parser.add_argument("command", choices=["list", "retry", "requeue", "run"],
+                        help="list items, retry due items once, make all items due now, or run the retrier")
+    parser.add_argument("--sink", choices=sorted(HANDLERS), help="Only this sink")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args()
+
+    queue = DeadLetterQueue(args.db)
+    sink_filter = [args.sink] if args.sink else None
+
+    if args.command == "list":
+        items = queue.items(args.sink)
+        for item in items:
+            next_attempt = datetime.fromtimestamp(item["next_attempt_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{item['sink']:<10} {item['item_key']:<36} {item['status']:<10} attempts={item['attempts']} "
+                  f"next={next_attempt}  {item['error'][:80]}")
+        print(f"{len(items)} items")
+    elif args.command == "requeue":
+        print(f"Requeued {queue.requeue(args.sink)} items")
+    elif args.command == "retry":
+        items = queue.claim_due(sink_filter, limit=1000)
+        delivered = sum(1 for item in items if retry_item(queue, item))
+        print(f"Delivered {delivered} of {len(items)} due items")
+    else:
+        retrier = DeadLetterRetrier(sink_filter, path=args.db)
+        retrier.start()
+        print("Dead-letter retrier running (Ctrl+C to stop)...")
+        try:
+            while retrier.is_alive():
+                retrier.join(1)
+        except KeyboardInterrupt:
+            retrier.stop()
+
+if __name__ == "__main__":
+    main()
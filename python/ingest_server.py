@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+import dead_letter
+import metrics
+import outbox
+import sinks
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE = os.path.join(SCRIPT_DIR, "ingested_lifelogs.jsonl")
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+# Seconds before lifelogs a sink failed to take are handed to it again
+SINK_RETRY_SECONDS = 60
+
+
+def _check_datetime(value, field, errors):
+    if not isinstance(value, str):
+        errors.append(f"{field} must be an ISO 8601 string")
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        errors.append(f"{field} is not a valid ISO 8601 datetime: {value!r}")
+        return None
+
+
+def _validate_content_node(node, path, errors):
+    if not isinstance(node, dict):
+        errors.append(f"{path} must be an object")
+        return
+    for field in ("type", "content"):
+        if field in node and not isinstance(node[field], str):
+            errors.append(f"{path}.{field} must be a string")
+    for field in ("startOffsetMs", "endOffsetMs"):
+        if field in node and not (isinstance(node[field], int) and not isinstance(node[field], bool)):
+            errors.append(f"{path}.{field} must be an integer")
+    for field in ("startTime", "endTime"):
+        if node.get(field) is not None:
+            _check_datetime(node[field], f"{path}.{field}", errors)
+    for field in ("speakerName", "speakerIdentifier"):
+        if node.get(field) is not None and not isinstance(node[field], str):
+            errors.append(f"{path}.{field} must be a string or null")
+    children = node.get("children", [])
+    if not isinstance(children, list):
+        errors.append(f"{path}.children must be an array")
+        return
+    for i, child in enumerate(children):
+        _validate_content_node(child, f"{path}.children[{i}]", errors)
+
+
+def validate_lifelog(lifelog):
+    """
+    Check a payload against the Lifelog schema in openapi.yml; returns a list of errors
+    """
+    errors = []
+    if not isinstance(lifelog, dict):
+        return ["lifelog must be an object"]
+
+    if not isinstance(lifelog.get("id"), str) or not lifelog["id"].strip():
+        errors.append("id is required and must be a non-empty string")
+    if "title" in lifelog and not isinstance(lifelog["title"], str):
+        errors.append("title must be a string")
+    if lifelog.get("markdown") is not None and not isinstance(lifelog["markdown"], str):
+        errors.append("markdown must be a string or null")
+
+    start = _check_datetime(lifelog.get("startTime"), "startTime", errors)
+    end = _check_datetime(lifelog.get("endTime"), "endTime", errors)
+    if start and end and (start.tzinfo is None) == (end.tzinfo is None) and end < start:
+        errors.append("endTime is before startTime")
+
+    contents = lifelog.get("contents", [])
+    if not isinstance(contents, list):
+        errors.append("contents must be an array")
+    else:
+        for i, node in enumerate(contents):
+            _validate_content_node(node, f"contents[{i}]", errors)
+    return errors
+
+
+def extract_lifelogs(payload):
+    """
+    Accept a single Lifelog, a list of them, or a LifelogsResponse ({"data": {"lifelogs": [...]}})
+    """
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict) and isinstance(payload.get("data"), dict) and "lifelogs" in payload["data"]:
+        return payload["data"]["lifelogs"]
+    return [payload]
+
+
+class LifelogStore:
+    """
+    Append-only JSON Lines file of ingested lifelogs, deduplicated by id
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ids = {lifelog["id"] for lifelog in self.lifelogs()}
+
+    def lifelogs(self):
+        """
+        Every stored lifelog, oldest first
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    lifelog = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(lifelog, dict) and "id" in lifelog:
+                    yield lifelog
+
+    def add(self, lifelogs):
+        """
+        Store lifelogs not seen before and return them
+        """
+        added = []
+        with self.lock:
+            with open(self.path, "a") as f:
+                for lifelog in lifelogs:
+                    if lifelog["id"] in self.ids:
+                        continue
+                    f.write(json.dumps(lifelog) + "\n")
+                    self.ids.add(lifelog["id"])
+                    added.append(lifelog)
+        return added
+
+
+class SinkWorker(threading.Thread):
+    """
+    Delivers stored lifelogs to the sinks in the background, batching whatever is queued
+
+    Queue items are (lifelog, sink names still to deliver to). A "<sink>\t<id>" line is
+    appended to `<store>.delivered` once a sink has taken a lifelog. A sink that fails gets
+    its lifelogs back after `retry_delay` seconds, and lifelogs that were stored but not
+    delivered everywhere when the server stopped are queued again on start, so neither a
+    sink error nor a crash loses them.
+    """
+    def __init__(self, sink_names, store=None, retry_delay=SINK_RETRY_SECONDS):
+        super().__init__(name="ingest-sinks", daemon=True)
+        self.sink_names = sink_names
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue()
+        self.delivered = 0
+        self.delivered_path = f"{store.path}.delivered" if store else None
+        if store:
+            self._requeue(store)
+
+    def submit(self, lifelogs, sink_names=None):
+        for lifelog in lifelogs:
+            self.queue.put((lifelog, tuple(sink_names or self.sink_names)))
+
+    def _requeue(self, store):
+        if not os.path.exists(self.delivered_path):
+            # Stores from before delivery tracking: everything in them was handed to the sinks
+            for name in self.sink_names:
+                self._mark_delivered(name, store.lifelogs())
+            return
+        delivered = {}
+        with open(self.delivered_path) as f:
+            for line in f:
+                name, _, lifelog_id = line.strip().rpartition("\t")
+                # Lines without a sink are from before per-sink tracking and cover every sink
+                delivered.setdefault(lifelog_id, set()).update([name] if name else self.sink_names)
+        pending = 0
+        for lifelog in store.lifelogs():
+            names = [name for name in self.sink_names if name not in delivered.get(lifelog["id"], ())]
+            if names:
+                self.submit([lifelog], names)
+                pending += 1
+        if pending:
+            print(f"Requeueing {pending} stored lifelogs that were not delivered to every sink yet")
+
+    def _mark_delivered(self, name, lifelogs):
+        if not self.delivered_path:
+            return
+        with open(self.delivered_path, "a") as f:
+            for lifelog in lifelogs:
+                f.write(f"{name}\t{lifelog['id']}\n")
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Sort by start time so batch sinks (one Mem note) read in order
+            batch.sort(key=lambda item: item[0].get("startTime") or "")
+            started = time.perf_counter()
+            for name in self.sink_names:
+                lifelogs = [lifelog for lifelog, names in batch if name in names]
+                if not lifelogs:
+                    continue
+                try:
+                    count = sinks.deliver(lifelogs, [name], raise_errors=True)[name]
+                except sinks.DeliveryError as e:
+                    print(f"Retrying {len(lifelogs)} lifelogs for {name} in {self.retry_delay:g}s: {e}")
+                    metrics.inc("ingest_delivery_failures_total", sink=name)
+                    timer = threading.Timer(self.retry_delay, self.submit, (lifelogs, [name]))
+                    timer.daemon = True
+                    timer.start()
+                    continue
+                metrics.inc("ingest_delivered_total", count, sink=name)
+                self._mark_delivered(name, lifelogs)
+                self.delivered += len(lifelogs)
+            metrics.observe("ingest_delivery_seconds", time.perf_counter() - started)
+            for _ in batch:
+                self.queue.task_done()
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, worker=None, token=None, verbose=False, outbox=None, sink_names=()):
+        super().__init__(address, IngestHandler)
+        self.store = store
+        self.worker = worker
+        self.outbox = outbox
+        self.sink_names = list(sink_names)
+        self.token = token
+        self.verbose = verbose
+        self.stats = {"accepted": 0, "duplicates": 0, "rejected": 0}
+        # Handler threads update the counters concurrently
+        self.stats_lock = threading.Lock()
+
+    def count(self, **deltas):
+        with self.stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        worker = self.server.worker
+        with self.server.stats_lock:
+            stats = dict(self.server.stats)
+        health = {
+            "status": "ok",
+            "stored": len(self.server.store.ids),
+            "queued": worker.queue.qsize() if worker else 0,
+            "delivered": worker.delivered if worker else 0,
+            "sinks": self.server.sink_names,
+            **stats,
+        }
+        if self.server.outbox:
+            health["outbox"] = self.server.outbox.backlog()
+        self._send_json(200, health)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/v1/lifelogs":
+            self._send_json(404, {"error": "Not found"})
+            return
+        if self.server.token and self.headers.get("X-API-Key") != self.server.token:
+            self._send_json(401, {"error": "Invalid or missing X-API-Key"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > MAX_BODY_BYTES else 400, {"error": "Missing or oversized body"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        lifelogs = extract_lifelogs(payload)
+        errors = {}
+        for i, lifelog in enumerate(lifelogs):
+            lifelog_errors = validate_lifelog(lifelog)
+            if lifelog_errors:
+                errors[str(i)] = lifelog_errors
+        if errors:
+            # All or nothing, so a relay can simply retry the whole request after fixing it
+            self.server.count(rejected=len(lifelogs))
+            metrics.inc("ingest_lifelogs_total", len(lifelogs), result="rejected")
+            self._send_json(400, {"error": "Invalid lifelog payload", "details": errors})
+            return
+
+        added = self.server.store.add(lifelogs)
+        duplicates = len(lifelogs) - len(added)
+        self.server.count(accepted=len(added), duplicates=duplicates)
+        metrics.inc("ingest_lifelogs_total", len(added), result="accepted")
+        if duplicates:
+            metrics.inc("ingest_lifelogs_total", duplicates, result="duplicate")
+
+        if self.server.outbox:
+            self.server.outbox.enqueue(added, self.server.sink_names)
+        elif self.server.worker:
+            self.server.worker.submit(added)
+        self._send_json(202, {"accepted": len(added), "duplicates": duplicates})
+
+
+def start_ingest_server(host="127.0.0.1", port=DEFAULT_PORT, store_path=DEFAULT_STORE, sink_names=(), token=None, verbose=False,
+                        outbox_path=None):
+    """
+    Start the ingestion server in a background thread and return it
+
+    With `outbox_path`, pushed lifelogs go to that durable outbox and each sink has its own worker
+    (see outbox.py) instead of one in-memory queue shared by all sinks.
+    """
+    store = LifelogStore(store_path)
+    worker = None
+    box = None
+    if sink_names and outbox_path:
+        box = outbox.Outbox(outbox_path)
+        outbox.start_workers(box, sink_names)
+    elif sink_names:
+        worker = SinkWorker(list(sink_names), store)
+        worker.start()
+    if sink_names:
+        # Writes that failed are retried in the background at their own pace
+        retry_sinks = [name for name in sink_names if name in dead_letter.HANDLERS]
+        if retry_sinks:
+            dead_letter.start_retrier(retry_sinks)
+    server = IngestServer((host, port), store, worker, token, verbose, box, sink_names)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accept pushed Limitless lifelogs and hand them to the sync sinks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("INGEST_PORT") or DEFAULT_PORT))
+    parser.add_argument("--store", default=os.getenv("INGEST_STORE") or DEFAULT_STORE, help="JSON Lines file for ingested lifelogs")
+    parser.add_argument("--sinks", default=os.getenv("INGEST_SINKS", "notion,mem_smart"),
+                        help=f"Comma-separated sinks ({', '.join(sinks.SINKS)}); empty to only store")
+    parser.add_argument("--outbox", action="store_true",
+                        help="Queue deliveries in the durable outbox (OUTBOX_DB) so each sink drains at its own pace")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        sink_names = sinks.parse_names(args.sinks)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # INGEST_TOKEN, when set, must be sent as X-API-Key by whatever pushes lifelogs
+    server = start_ingest_server(args.host, args.port, args.store, sink_names, os.getenv("INGEST_TOKEN"), args.verbose,
+                                 outbox.DEFAULT_DB if args.outbox else None)
+    metrics.start_http_server_from_env(offset=3)
+
+    print(f"Ingest server listening on {server.url}/v1/lifelogs")
+    print(f"Storing to {args.store}; sinks: {', '.join(sink_names) or 'none'}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nStopping ingest server...")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
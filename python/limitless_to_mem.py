@@ -1,8 +1,10 @@
+import argparse
 import os
 import json
-import requests
 from datetime import datetime, timedelta, timezone
-from _client import get_lifelogs
+from _client import get_lifelogs, request
+import tracing
+import dead_letter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +13,9 @@ load_dotenv()
 # File to store the last processed conversation timestamp
 LAST_PROCESSED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_processed_mem.json")
 
+# Base URL for the Mem.ai API (override to point at a local stand-in)
+MEM_API_URL = os.getenv("MEM_API_URL") or "https://api.mem.ai"
+
 def get_last_processed():
     """
     Get the last processed conversation timestamp for Mem.ai integration
@@ -36,6 +41,7 @@ def get_last_processed():
             "last_timestamp": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
         }
 
+@tracing.traced("checkpoint")
 def save_last_processed(conversation_id, timestamp):
     """
     Save the last processed conversation timestamp
@@ -48,6 +54,7 @@ def save_last_processed(conversation_id, timestamp):
     with open(LAST_PROCESSED_FILE, "w") as f:
         json.dump(data, f)
 
+@tracing.traced("fetch")
 def get_recent_conversations():
     """
     Get conversations from the last hour
@@ -121,13 +128,45 @@ def get_recent_conversations():
     print(f"Found {len(new_lifelogs)} new conversations")
     return new_lifelogs
 
-def create_mem_note(lifelogs):
+def post_mem_note(data, mem_api_key):
+    """
+    Create one Mem.ai note from a request body and return the response
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {mem_api_key}"
+    }
+    return request("POST", f"{MEM_API_URL}/v1/notes", headers=headers, json=data)
+
+def retry_mem_note(data):
+    """
+    Dead-letter retry handler: re-send a note body that failed before
+    """
+    response = post_mem_note(data, os.getenv("MEM_API_KEY"))
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:500]}")
+
+def save_checkpoint(lifelogs, update_checkpoint=True):
+    """
+    Save the ID of the latest conversation (lifelogs are newest first)
+    """
+    if lifelogs and update_checkpoint:
+        save_last_processed(
+            lifelogs[0].get("id", ""),
+            lifelogs[0].get("endTime", datetime.now(timezone.utc).isoformat())
+        )
+
+@tracing.traced("deliver")
+def create_mem_note(lifelogs, update_checkpoint=True):
     """
     Create a new note in Mem.ai with the provided conversations
+
+    Returns True if the note was created. Pass update_checkpoint=False for conversations that
+    did not come from the polling fetch so the poller's last processed ID is kept.
     """
     if not lifelogs:
         print("No new conversations to add to Mem.ai")
-        return
+        return False
     
     # Format the conversations as markdown
     current_hour = datetime.now().strftime('%Y-%m-%d %H:00')
@@ -159,12 +198,7 @@ def create_mem_note(lifelogs):
     mem_api_key = os.getenv("MEM_API_KEY")
     if not mem_api_key:
         print("Error: MEM_API_KEY not found in environment variables")
-        return
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {mem_api_key}"
-    }
+        return False
     
     data = {
         "content": markdown_content,
@@ -174,30 +208,35 @@ def create_mem_note(lifelogs):
     
     # Make the request
     try:
-        response = requests.post(
-            "https://api.mem.ai/v1/notes",
-            headers=headers,
-            json=data
-        )
-        
+        response = post_mem_note(data, mem_api_key)
+    except Exception as e:
+        print(f"Exception creating note in Mem.ai: {e}")
+        error = str(e)
+    else:
         if response.status_code == 200:
             print("Successfully created note in Mem.ai")
-            note_data = response.json()
-            print(f"Note URL: {note_data.get('url', 'Unknown')}")
+            # The note exists now: a response we cannot read must not send it to the retrier
+            try:
+                note_url = response.json().get("url", "Unknown")
+            except (ValueError, AttributeError):
+                note_url = "Unknown"
+            print(f"Note URL: {note_url}")
             
-            # Save the ID of the latest conversation
-            if lifelogs:
-                save_last_processed(
-                    lifelogs[0].get("id", ""),
-                    lifelogs[0].get("endTime", datetime.now(timezone.utc).isoformat())
-                )
-        else:
-            print(f"Error creating note in Mem.ai: {response.status_code}")
-            print(response.text)
-    
-    except Exception as e:
-        print(f"Exception creating note in Mem.ai: {e}")
+            # A note parked by an earlier failed run is not created again by the retrier
+            dead_letter.DeadLetterQueue().record_delivered("mem", [log.get("id") for log in lifelogs])
+            save_checkpoint(lifelogs, update_checkpoint)
+            return True
+        print(f"Error creating note in Mem.ai: {response.status_code}")
+        print(response.text)
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
 
+    # Parked for the background retrier so an outage does not lose the conversations; the
+    # checkpoint still moves past them so the next run does not send them a second time
+    dead_letter.DeadLetterQueue().add("mem", lifelogs[0].get("id") or current_hour, data, error)
+    save_checkpoint(lifelogs, update_checkpoint)
+    return False
+
+@tracing.traced("run")
 def main():
     # Check for required environment variables
     required_vars = ["LIMITLESS_API_KEY", "MEM_API_KEY"]
@@ -218,4 +257,10 @@ def main():
     print("Mem.ai sync complete!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync recent Limitless conversations to a Mem.ai note")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    
+    finish_trace = tracing.configure(args.trace, args.profile)
+    main()
+    finish_trace() 
\ No newline at end of file
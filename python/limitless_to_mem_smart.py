@@ -1,8 +1,10 @@
+import argparse
 import os
 import json
-import requests
 from datetime import datetime, timedelta, timezone
-from _client import get_lifelogs
+from _client import get_lifelogs, request
+import tracing
+import dead_letter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,6 +13,9 @@ load_dotenv()
 # File to store the last processed conversation timestamp
 LAST_PROCESSED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "last_processed_mem_smart.json")
 
+# Base URL for the Mem.ai API (override to point at a local stand-in)
+MEM_API_URL = os.getenv("MEM_API_URL") or "https://api.mem.ai"
+
 def get_last_processed():
     """
     Get the last processed conversation timestamp for Mem.ai integration
@@ -36,6 +41,7 @@ def get_last_processed():
             "last_timestamp": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
         }
 
+@tracing.traced("checkpoint")
 def save_last_processed(conversation_id, timestamp):
     """
     Save the last processed conversation timestamp
@@ -48,6 +54,7 @@ def save_last_processed(conversation_id, timestamp):
     with open(LAST_PROCESSED_FILE, "w") as f:
         json.dump(data, f)
 
+@tracing.traced("fetch")
 def get_recent_conversations():
     """
     Get conversations from the last hour
@@ -121,9 +128,10 @@ def get_recent_conversations():
     print(f"Found {len(new_lifelogs)} new conversations")
     return new_lifelogs
 
-def process_with_mem_it(conversation):
+@tracing.traced("format")
+def format_mem_it_input(conversation):
     """
-    Process a single conversation with the Mem It API
+    Format a single conversation as Mem It input text
     """
     title = conversation.get("title", "Untitled conversation")
     content = conversation.get("markdown", "")
@@ -147,6 +155,20 @@ def process_with_mem_it(conversation):
     # Add the conversation content
     input_text += content
     
+    return input_text
+
+@tracing.traced("lifelog")
+def process_with_mem_it(conversation):
+    """
+    Process a single conversation with the Mem It API
+
+    Returns True if a note was created, None if Mem It processed the conversation but
+    decided not to create a note (not worth retrying) and False if the request failed.
+    """
+    title = conversation.get("title", "Untitled conversation")
+    end_time = conversation.get("endTime", "")
+    input_text = format_mem_it_input(conversation)
+    
     # Prepare the request to Mem.ai
     mem_api_key = os.getenv("MEM_API_KEY")
     if not mem_api_key:
@@ -168,14 +190,20 @@ def process_with_mem_it(conversation):
     
     # Make the request
     try:
-        response = requests.post(
-            "https://api.mem.ai/v1/mem-it",
+        response = request(
+            "POST",
+            f"{MEM_API_URL}/v1/mem-it",
             headers=headers,
             json=data
         )
         
         if response.status_code == 200:
-            response_data = response.json()
+            # Mem It has processed the conversation: a response we cannot read must not send it to the retrier
+            try:
+                response_data = response.json()
+            except ValueError:
+                print(f"Successfully processed: {title} (unreadable response)")
+                return True
             
             # Check if there's a created note operation
             note_url = None
@@ -192,7 +220,7 @@ def process_with_mem_it(conversation):
                 return True
             else:
                 print(f"No note created for: {title}")
-                return False
+                return None
         else:
             print(f"Error processing with Mem It API: {response.status_code}")
             print(response.text)
@@ -202,6 +230,43 @@ def process_with_mem_it(conversation):
         print(f"Exception processing with Mem It API: {e}")
         return False
 
+def process_lifelogs(lifelogs, update_checkpoint=True):
+    """
+    Process conversations one by one with Mem It and return how many succeeded
+
+    Pass update_checkpoint=False for conversations that did not come from the polling fetch
+    so the poller's last processed ID is kept.
+    """
+    success_count = 0
+    for lifelog in lifelogs:
+        print(f"Processing: {lifelog.get('title', 'Untitled')}")
+        result = process_with_mem_it(lifelog)
+        if result is False:
+            # Parked for the background retrier so an outage does not lose the conversation
+            dead_letter.DeadLetterQueue().add("mem_smart", lifelog.get("id", ""), lifelog, "Mem It request failed")
+            continue
+        if result:
+            success_count += 1
+        # Processed (with or without a note): the retrier must not send it again
+        dead_letter.DeadLetterQueue().record_delivered("mem_smart", [lifelog.get("id")])
+    
+    # Conversations arrive newest first. Failed ones are parked in the dead-letter queue, so
+    # the checkpoint moves past the whole batch and the next run does not send them again.
+    if lifelogs and update_checkpoint:
+        save_last_processed(
+            lifelogs[0].get("id", ""),
+            lifelogs[0].get("endTime", datetime.now(timezone.utc).isoformat())
+        )
+    return success_count
+
+def retry_mem_it(conversation):
+    """
+    Dead-letter retry handler: process a conversation that failed before
+    """
+    if process_with_mem_it(conversation) is False:
+        raise RuntimeError("Mem It request failed")
+
+@tracing.traced("run")
 def main():
     # Check for required environment variables
     required_vars = ["LIMITLESS_API_KEY", "MEM_API_KEY"]
@@ -221,18 +286,15 @@ def main():
         return
     
     # Process each conversation individually with Mem It
-    success_count = 0
-    for lifelog in lifelogs:
-        print(f"Processing: {lifelog.get('title', 'Untitled')}")
-        if process_with_mem_it(lifelog):
-            success_count += 1
-            # Save the processed ID
-            save_last_processed(
-                lifelog.get("id", ""),
-                lifelog.get("endTime", datetime.now(timezone.utc).isoformat())
-            )
+    success_count = process_lifelogs(lifelogs)
     
     print(f"Mem.ai sync complete! Successfully processed {success_count} of {len(lifelogs)} conversations.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync recent Limitless conversations to Mem.ai with Mem It")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    
+    finish_trace = tracing.configure(args.trace, args.profile)
+    main()
+    finish_trace() 
\ No newline at end of file
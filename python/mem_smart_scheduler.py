@@ -1,16 +1,32 @@
-import schedule
-import time
-import subprocess
 import os
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime, timedelta
-import threading
+from datetime import datetime
+import dead_letter
+import metrics
+import sync_jobs
+from timer_scheduler import TimerScheduler
 
 # Global variables
-next_run_time = None
 last_run_status = "Not run yet"
 app = None
+scheduler = TimerScheduler()
+
+def refresh_labels():
+    """
+    Show the current status and the time of the next run
+    """
+    if app is None:
+        return
+    
+    next_run_time = scheduler.next_run("mem_smart")
+    if next_run_time and not scheduler.is_running("mem_smart"):
+        minutes = max(-(-(next_run_time - datetime.now()).total_seconds() // 60), 0)
+        app.time_label.config(text=f"Next run at {next_run_time:%H:%M} (in {minutes:.0f} min)")
+    else:
+        app.time_label.config(text="Running now...")
+    
+    app.status_label.config(text=f"Status: {last_run_status}")
 
 def update_gui():
     """
@@ -18,62 +34,41 @@ def update_gui():
     """
     if app is None:
         return
-        
-    global next_run_time, last_run_status
-    
-    # Update time remaining
-    if next_run_time:
-        now = datetime.now()
-        if next_run_time > now:
-            time_diff = next_run_time - now
-            minutes = time_diff.seconds // 60
-            seconds = time_diff.seconds % 60
-            app.time_label.config(text=f"Next run in: {minutes:02d}:{seconds:02d}")
-        else:
-            app.time_label.config(text="Running now...")
-    
-    # Update status
-    app.status_label.config(text=f"Status: {last_run_status}")
     
-    # Schedule the next update
-    app.after(1000, update_gui)  # Update every second
+    refresh_labels()
+    
+    # The display has minute resolution, so wake up once a minute on the minute
+    now = datetime.now()
+    app.after((60 - now.second) * 1000 - now.microsecond // 1000, update_gui)
 
 def run_sync_job():
     """
     Run the Mem.ai smart sync job as a subprocess
     """
-    global next_run_time, last_run_status
+    global last_run_status
     
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     print(f"[{current_time}] Running Mem.ai smart sync job...")
     last_run_status = "Running..."
     
-    if app:
-        app.status_label.config(text=f"Status: {last_run_status}")
-    
-    # Get the directory of the current script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Create the full path to the limitless_to_mem_smart.py script
-    sync_script_path = os.path.join(script_dir, "limitless_to_mem_smart.py")
+    refresh_labels()
     
     # Run the script as a subprocess
-    try:
-        result = subprocess.run(["python3", sync_script_path], 
-                               capture_output=True, 
-                               text=True, 
-                               check=True)
-        print(result.stdout)
+    result = sync_jobs.run_job("mem_smart")
+    if result["lock_wait"] >= 1:
+        print(f"Waited {result['lock_wait']:.1f}s for another mem_smart run to finish")
+    if result["coalesced"]:
+        print("Another run started after this one was triggered, nothing to do")
+        last_run_status = f"Covered by another run at {current_time}"
+    elif result["success"]:
+        print(result["stdout"])
         last_run_status = f"Success at {current_time}"
-    except subprocess.CalledProcessError as e:
-        print(f"Error running sync job: {e}")
-        print(e.stderr)
+    else:
+        print(f"Error running sync job: {sync_jobs.JOBS['mem_smart']['script']} failed")
+        print(result["stderr"])
         last_run_status = f"Failed at {current_time}"
     
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Mem.ai smart sync job completed")
-    
-    # Calculate next run time
-    next_run_time = datetime.now() + timedelta(hours=1)
 
 class SchedulerApp(tk.Tk):
     def __init__(self):
@@ -126,43 +121,33 @@ class SchedulerApp(tk.Tk):
     
     def run_now(self):
         """Run the sync job now"""
-        threading.Thread(target=run_sync_job).start()
+        scheduler.run_now("mem_smart")
     
     def quit_app(self):
         """Quit the application"""
         self.destroy()
         os._exit(0)  # Force exit all threads
 
-def run_scheduler_thread():
-    """
-    Thread function for the scheduler
-    """
-    global next_run_time
-    
-    # Schedule the job to run every hour
-    schedule.every(1).hours.do(run_sync_job)
-    
-    # Calculate initial next run time
-    next_run_time = datetime.now() + timedelta(hours=1)
-    
-    # Run once immediately on startup
-    print("Running initial Mem.ai smart sync job...")
-    run_sync_job()
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(1)  # Check every second instead of every minute to be more responsive
-
 def main():
     global app
     
+    # Expose request metrics in Prometheus format if METRICS_PORT is set
+    metrics.start_http_server_from_env(offset=2)
+    
     # Create the GUI
     app = SchedulerApp()
     
-    # Start the scheduler in a separate thread
-    scheduler_thread = threading.Thread(target=run_scheduler_thread)
-    scheduler_thread.daemon = True  # Allow the thread to be terminated when the main program exits
-    scheduler_thread.start()
+    # Run once immediately on startup, then every interval after each run finishes
+    # (or adaptively, following lifelog activity, when ADAPTIVE_POLLING is set)
+    print("Running initial Mem.ai smart sync job...")
+    scheduler.add_job("mem_smart", run_sync_job, sync_jobs.schedule_for("mem_smart"),
+                      run_immediately=True, on_finish=refresh_labels)
+    
+    # The scheduler thread sleeps until the next run is due
+    scheduler.start()
+    
+    # Failed mem_smart writes are retried in the background at their own pace
+    dead_letter.start_retrier(["mem_smart"])
     
     # Start the GUI update
     update_gui()
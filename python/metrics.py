@@ -0,0 +1,416 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Hostname fragments used to attribute outbound calls to an API
+API_HOSTS = {
+    "limitless": "limitless",
+    "notion": "notion",
+    "mem.ai": "mem",
+    "openai": "openai",
+}
+
+# Endpoint paths used to attribute calls to local stand-ins (mock_server.py)
+API_PATHS = {
+    "/v1/lifelogs": "limitless",
+    "/v1/pages": "notion",
+    "/v1/mem-it": "mem",
+    "/v1/notes": "mem",
+}
+
+# Histogram bucket upper bounds in seconds for whole sync runs
+RUN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+# Directory where schedulers drop their JSON snapshots for sync_monitor
+SNAPSHOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def inc(name, value=1, **labels):
+    """
+    Increment a counter
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """
+    Set a gauge to the current value of something (e.g. a queue depth)
+    """
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    Record a value in a histogram
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "buckets": list(buckets),
+                "counts": [0] * (len(buckets) + 1),
+                "sum": 0.0,
+                "count": 0,
+            }
+        # Last slot is the +Inf bucket
+        index = len(histogram["buckets"])
+        for i, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                index = i
+                break
+        histogram["counts"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+@contextmanager
+def timed(name, **labels):
+    """
+    Time the block into a histogram
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def api_for_url(url):
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    for fragment, api in API_HOSTS.items():
+        if fragment in host:
+            return api
+    for path, api in API_PATHS.items():
+        if parts.path.startswith(path):
+            return api
+    return host or "unknown"
+
+
+def record_request(api, method, status, elapsed, bytes_sent=0, bytes_received=0):
+    """
+    Record one outbound HTTP call
+    """
+    inc("http_requests_total", api=api, method=method, status=status)
+    observe("http_request_duration_seconds", elapsed, api=api, method=method)
+    if bytes_sent:
+        inc("http_request_bytes_total", bytes_sent, api=api, direction="sent")
+    if bytes_received:
+        inc("http_request_bytes_total", bytes_received, api=api, direction="received")
+
+
+@contextmanager
+def track_call(api, method="POST"):
+    """
+    Record a call made through a third-party SDK (e.g. OpenAI) as an outbound request
+    """
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        record_request(api, method, status, time.perf_counter() - started)
+
+
+def quantile(histogram, q):
+    """
+    Estimate a quantile from histogram buckets by linear interpolation
+    """
+    total = histogram["count"]
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    lower = 0.0
+    for bound, count in zip(histogram["buckets"], histogram["counts"]):
+        if count and seen + count >= target:
+            return lower + (bound - lower) * (target - seen) / count
+        seen += count
+        lower = bound
+    # Falls in the +Inf bucket, the best estimate is the largest finite bound
+    return histogram["buckets"][-1]
+
+
+def snapshot():
+    """
+    Return all metrics as a JSON-serializable dict (with p50/p95/p99 per histogram)
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        histograms = []
+        for (name, labels), histogram in sorted(_histograms.items()):
+            entry = {"name": name, "labels": dict(labels)}
+            entry.update({k: (list(v) if isinstance(v, list) else v) for k, v in histogram.items()})
+            for q in (0.5, 0.95, 0.99):
+                entry[f"p{int(q * 100)}"] = quantile(histogram, q)
+            histograms.append(entry)
+        gauges = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_gauges.items())
+        ]
+    return {"generated_at": time.time(), "counters": counters, "histograms": histograms, "gauges": gauges}
+
+
+def merge(data):
+    """
+    Add the values of a snapshot (e.g. from a child sync process) into this registry
+    """
+    with _lock:
+        for counter in data.get("counters", []):
+            key = _key(counter["name"], counter["labels"])
+            _counters[key] = _counters.get(key, 0) + counter["value"]
+        for entry in data.get("histograms", []):
+            key = _key(entry["name"], entry["labels"])
+            histogram = _histograms.get(key)
+            if histogram is None:
+                histogram = _histograms[key] = {
+                    "buckets": list(entry["buckets"]),
+                    "counts": [0] * len(entry["counts"]),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            if histogram["buckets"] != list(entry["buckets"]):
+                continue  # Incompatible layout, skip rather than corrupt
+            histogram["counts"] = [a + b for a, b in zip(histogram["counts"], entry["counts"])]
+            histogram["sum"] += entry["sum"]
+            histogram["count"] += entry["count"]
+        # Gauges are point-in-time values, so the merged-in one replaces ours
+        for gauge in data.get("gauges", []):
+            _gauges[_key(gauge["name"], gauge["labels"])] = gauge["value"]
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
+
+
+def write_snapshot(path):
+    """
+    Atomically write the current snapshot to a JSON file
+    """
+    data = snapshot()
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"metrics_{name}.json")
+
+
+def load_snapshots(directory=SNAPSHOT_DIR):
+    """
+    Load and combine every metrics_*.json snapshot in a directory
+    """
+    combined = {"counters": [], "histograms": [], "gauges": []}
+    if not os.path.isdir(directory):
+        return combined
+    for filename in sorted(os.listdir(directory)):
+        if filename.startswith("metrics_") and filename.endswith(".json"):
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            combined["counters"].extend(data.get("counters", []))
+            combined["histograms"].extend(data.get("histograms", []))
+            combined["gauges"].extend(data.get("gauges", []))
+    return combined
+
+
+def child_env(path):
+    """
+    Environment for a child sync process that should report its metrics to `path`
+    """
+    env = dict(os.environ)
+    env["LIMITLESS_METRICS_FILE"] = path
+    return env
+
+
+def collect_child(path):
+    """
+    Merge the metrics a child process wrote to `path` and remove the file
+    """
+    try:
+        with open(path) as f:
+            merge(json.load(f))
+    except (OSError, ValueError):
+        return
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def install_from_env():
+    """
+    Dump this process's metrics on exit when LIMITLESS_METRICS_FILE is set
+    """
+    import atexit
+
+    path = os.getenv("LIMITLESS_METRICS_FILE")
+    if path:
+        atexit.register(write_snapshot, path)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = [f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items]
+    return "{" + ",".join(escaped) + "}"
+
+
+def prometheus_text(data=None):
+    """
+    Render a snapshot in the Prometheus text exposition format
+    """
+    data = data or snapshot()
+    lines = []
+    seen_types = set()
+
+    for counter in data["counters"]:
+        if counter["name"] not in seen_types:
+            lines.append(f"# TYPE {counter['name']} counter")
+            seen_types.add(counter["name"])
+        lines.append(f"{counter['name']}{_format_labels(counter['labels'])} {counter['value']}")
+
+    for gauge in data.get("gauges", []):
+        if gauge["name"] not in seen_types:
+            lines.append(f"# TYPE {gauge['name']} gauge")
+            seen_types.add(gauge["name"])
+        lines.append(f"{gauge['name']}{_format_labels(gauge['labels'])} {gauge['value']}")
+
+    for entry in data["histograms"]:
+        name = entry["name"]
+        if name not in seen_types:
+            lines.append(f"# TYPE {name} histogram")
+            seen_types.add(name)
+        cumulative = 0
+        for bound, count in zip(entry["buckets"], entry["counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(entry['labels'], {'le': bound})} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(entry['labels'], {'le': '+Inf'})} {entry['count']}")
+        lines.append(f"{name}_sum{_format_labels(entry['labels'])} {entry['sum']}")
+        lines.append(f"{name}_count{_format_labels(entry['labels'])} {entry['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def summarize(data=None):
+    """
+    Per-API request totals and latency percentiles, for display
+    """
+    data = data or snapshot()
+    summary = {}
+
+    for counter in data["counters"]:
+        api = counter["labels"].get("api")
+        if not api:
+            continue
+        info = summary.setdefault(api, {"requests": 0, "errors": 0, "retries": 0, "bytes": 0, "latency": None})
+        if counter["name"] == "http_requests_total":
+            info["requests"] += counter["value"]
+            status = counter["labels"].get("status", "")
+            if not (status.isdigit() and int(status) < 400) and status != "ok":
+                info["errors"] += counter["value"]
+        elif counter["name"] == "http_retries_total":
+            info["retries"] += counter["value"]
+        elif counter["name"] == "http_request_bytes_total":
+            info["bytes"] += counter["value"]
+
+    # Combine histograms across methods and processes per API before taking percentiles
+    combined = {}
+    for entry in data["histograms"]:
+        api = entry["labels"].get("api")
+        if entry["name"] != "http_request_duration_seconds" or not api:
+            continue
+        histogram = combined.get(api)
+        if histogram is None:
+            combined[api] = {"buckets": entry["buckets"], "counts": list(entry["counts"]), "sum": entry["sum"], "count": entry["count"]}
+        elif histogram["buckets"] == entry["buckets"]:
+            histogram["counts"] = [a + b for a, b in zip(histogram["counts"], entry["counts"])]
+            histogram["sum"] += entry["sum"]
+            histogram["count"] += entry["count"]
+
+    for api, histogram in combined.items():
+        info = summary.setdefault(api, {"requests": 0, "errors": 0, "retries": 0, "bytes": 0, "latency": None})
+        info["latency"] = {f"p{int(q * 100)}": quantile(histogram, q) for q in (0.5, 0.95, 0.99)}
+
+    return summary
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            body = prometheus_text().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body = json.dumps(snapshot()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a background thread
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_http_server_from_env(offset=0):
+    """
+    Start the metrics endpoint on METRICS_PORT + offset if METRICS_PORT is set
+    """
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    try:
+        server = start_http_server(int(port) + offset, os.getenv("METRICS_HOST") or "127.0.0.1")
+    except OSError as e:
+        print(f"Could not start metrics endpoint on port {int(port) + offset}: {e}")
+        return None
+    print(f"Metrics available at http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
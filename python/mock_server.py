@@ -0,0 +1,462 @@
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Word pool used to build synthetic titles and transcript lines
+WORDS = (
+    "project roadmap budget meeting launch design review customer feedback "
+    "deadline coffee lunch weekend travel flight hotel doctor appointment "
+    "school homework soccer practice dinner recipe groceries invoice contract "
+    "hiring interview onboarding release bug deploy server database metrics "
+    "marketing campaign pricing partner quarter planning notes idea follow up"
+).split()
+
+SPEAKERS = ["Speaker 1", "Speaker 2", "Speaker 3", "Alex", "Jordan", "Sam"]
+
+
+def _sentence(rng, min_words=6, max_words=16):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _make_lifelog(rng, start, payload_bytes):
+    """
+    Build one synthetic lifelog matching the Lifelog schema in openapi.yml
+    """
+    title = _sentence(rng, 3, 7).rstrip(".")
+    duration_ms = rng.randint(60, 1800) * 1000
+
+    contents = [{
+        "type": "heading1",
+        "content": title,
+        "startOffsetMs": 0,
+        "endOffsetMs": duration_ms,
+        "children": [],
+    }]
+    markdown = f"# {title}\n\n"
+
+    # Keep adding sections until the markdown reaches the requested payload size
+    offset = 0
+    while len(markdown) < payload_bytes:
+        topic = _sentence(rng, 4, 8)
+        contents.append({
+            "type": "heading2",
+            "content": topic,
+            "startOffsetMs": offset,
+            "endOffsetMs": offset,
+            "children": [],
+        })
+        markdown += f"## {topic}\n\n"
+
+        for _ in range(rng.randint(2, 6)):
+            speaker = rng.choice(SPEAKERS + ["You"])
+            line = _sentence(rng)
+            line_ms = rng.randint(1500, 12000)
+            line_start = min(offset, duration_ms)
+            line_end = min(offset + line_ms, duration_ms)
+            contents.append({
+                "type": "blockquote",
+                "content": line,
+                "startOffsetMs": line_start,
+                "endOffsetMs": line_end,
+                "children": [],
+                "speakerName": speaker,
+                "speakerIdentifier": "user" if speaker == "You" else None,
+            })
+            markdown += f"> {speaker}: {line}\n\n"
+            # Occasionally let the next speaker talk over this one
+            offset += line_ms - (rng.randint(0, 800) if rng.random() < 0.2 else 0)
+
+    end = start + timedelta(milliseconds=duration_ms)
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128), version=4).hex,
+        "title": title,
+        "markdown": markdown,
+        "contents": contents,
+        "startTime": start,
+        "endTime": end,
+    }
+
+
+def generate_corpus(count=1000, days=30, end=None, seed=0, payload_bytes=2000, start=None):
+    """
+    Generate a deterministic synthetic corpus of lifelogs spread over the last N days
+
+    Pass `start` to spread them between `start` and `end` instead. Times are stored as
+    UTC datetimes and rendered into the requested timezone per response.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now(timezone.utc)
+    window_start = start or end - timedelta(days=days)
+    span_seconds = max(int((end - window_start).total_seconds()) - 1800, 1)
+
+    corpus = []
+    for _ in range(count):
+        start = window_start + timedelta(seconds=rng.randint(0, span_seconds))
+        corpus.append(_make_lifelog(rng, start, payload_bytes))
+
+    corpus.sort(key=lambda log: (log["startTime"], log["id"]))
+    return corpus
+
+
+def _encode_cursor(lifelog):
+    raw = f"{int(lifelog['startTime'].timestamp() * 1000)}:{lifelog['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    ms, lifelog_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)
+    return int(ms), lifelog_id
+
+
+def _parse_local_datetime(value, tz):
+    """
+    Parse the modified ISO-8601 format used by `start`/`end` (offsets are ignored)
+    """
+    value = value.strip().replace("T", " ")
+    # Drop any timezone suffix, the API interprets these in the requested timezone
+    for marker in ("Z", "+"):
+        if marker in value:
+            value = value.split(marker)[0]
+    if len(value) == 10:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    else:
+        parsed = datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S")
+    return parsed.replace(tzinfo=tz)
+
+
+def _render(lifelog, tz, include_markdown, include_headings):
+    contents = lifelog["contents"]
+    if not include_headings:
+        contents = [node for node in contents if not node["type"].startswith("heading")]
+
+    start = lifelog["startTime"]
+    rendered_contents = []
+    for node in contents:
+        node = dict(node)
+        node["startTime"] = (start + timedelta(milliseconds=node["startOffsetMs"])).astimezone(tz).isoformat()
+        node["endTime"] = (start + timedelta(milliseconds=node["endOffsetMs"])).astimezone(tz).isoformat()
+        rendered_contents.append(node)
+
+    return {
+        "id": lifelog["id"],
+        "title": lifelog["title"],
+        "markdown": lifelog["markdown"] if include_markdown else None,
+        "contents": rendered_contents,
+        "startTime": lifelog["startTime"].astimezone(tz).isoformat(),
+        "endTime": lifelog["endTime"].astimezone(tz).isoformat(),
+    }
+
+
+def query_lifelogs(corpus, params, max_limit=10):
+    """
+    Apply the /v1/lifelogs query parameters to the corpus and return a LifelogsResponse dict
+
+    Raises ValueError for parameters the real API would reject.
+    """
+    tz_name = params.get("timezone") or "UTC"
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Invalid timezone: {tz_name}")
+
+    direction = params.get("direction") or "desc"
+    if direction not in ("asc", "desc"):
+        raise ValueError(f"Invalid direction: {direction}")
+
+    limit = int(params.get("limit") or max_limit)
+    limit = max(1, min(limit, max_limit))
+
+    include_markdown = (params.get("includeMarkdown") or "true").lower() != "false"
+    include_headings = (params.get("includeHeadings") or "true").lower() != "false"
+
+    # Resolve the time window: `date` wins over `start`/`end`
+    window_start = window_end = None
+    if params.get("date"):
+        window_start = _parse_local_datetime(params["date"], tz)
+        window_end = window_start + timedelta(days=1)
+    else:
+        if params.get("start"):
+            window_start = _parse_local_datetime(params["start"], tz)
+        if params.get("end"):
+            window_end = _parse_local_datetime(params["end"], tz)
+
+    matches = [
+        log for log in corpus
+        if (window_start is None or log["startTime"] >= window_start)
+        and (window_end is None or log["startTime"] < window_end)
+    ]
+    if direction == "desc":
+        matches.reverse()
+
+    # Continue strictly after the item the cursor points at
+    if params.get("cursor"):
+        cursor_ms, cursor_id = _decode_cursor(params["cursor"])
+        for i, log in enumerate(matches):
+            if int(log["startTime"].timestamp() * 1000) == cursor_ms and log["id"] == cursor_id:
+                matches = matches[i + 1:]
+                break
+        else:
+            raise ValueError("Invalid cursor")
+
+    page = matches[:limit]
+    next_cursor = _encode_cursor(page[-1]) if len(matches) > limit else None
+
+    return {
+        "data": {
+            "lifelogs": [_render(log, tz, include_markdown, include_headings) for log in page]
+        },
+        "meta": {
+            "lifelogs": {
+                "nextCursor": next_cursor,
+                "count": len(page),
+            }
+        },
+    }
+
+
+class MockLimitlessHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(status, len(body))
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+
+        if url.path.rstrip("/") != "/v1/lifelogs":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        if server.api_key and self.headers.get("X-API-Key") != server.api_key:
+            self._send_json(401, {"error": "Invalid API key"})
+            return
+
+        # Simulated network/server latency
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        # Simulated upstream failures
+        if server.error_rate and random.random() < server.error_rate:
+            status = random.choice(server.error_statuses)
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self._send_json(status, {"error": f"Simulated error {status}"}, headers)
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            payload = query_lifelogs(server.corpus, params, server.max_limit)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self._send_json(200, payload)
+
+
+class MockLimitlessServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, corpus, api_key=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_statuses=(504, 429), max_limit=10, verbose=False):
+        super().__init__(address, MockLimitlessHandler)
+        self.corpus = corpus
+        self.api_key = api_key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.max_limit = max_limit
+        self.verbose = verbose
+        self.stats = {"requests": 0, "bytes": 0, "statuses": {}}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, status, nbytes):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += nbytes
+            self.stats["statuses"][status] = self.stats["statuses"].get(status, 0) + 1
+
+
+class MockSinkHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the Notion /v1/pages and Mem /v1/mem-it and /v1/notes endpoints
+    """
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, received, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(self.path, status, received, len(body))
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        received = len(self.rfile.read(length)) if length else 0
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if not server.take_token():
+            self._send_json(429, {"error": "Rate limited"}, received, {"Retry-After": "1"})
+            return
+
+        note_id = uuid.uuid4().hex
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/v1/pages":
+            self._send_json(200, {"object": "page", "id": note_id}, received)
+        elif path == "/v1/mem-it":
+            self._send_json(200, {"operations": [{
+                "type": "created-note",
+                "url": f"https://mem.ai/m/{note_id}",
+                "title": "Mock note",
+            }]}, received)
+        elif path == "/v1/notes":
+            self._send_json(200, {"id": note_id, "url": f"https://mem.ai/m/{note_id}"}, received)
+        else:
+            self._send_json(404, {"error": "Not found"}, received)
+
+
+class MockSinkServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, rate_limit=None, burst=None, verbose=False):
+        super().__init__(address, MockSinkHandler)
+        self.latency = latency
+        self.jitter = jitter
+        # Token bucket: `rate_limit` requests per second, bursting up to `burst`
+        self.rate_limit = rate_limit
+        self.burst = burst or (rate_limit or 1)
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.verbose = verbose
+        self.stats = {"requests": 0, "bytes_received": 0, "bytes_sent": 0, "statuses": {}, "paths": {}}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def take_token(self):
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def record(self, path, status, received, sent):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_received"] += received
+            self.stats["bytes_sent"] += sent
+            self.stats["statuses"][status] = self.stats["statuses"].get(status, 0) + 1
+            self.stats["paths"][path] = self.stats["paths"].get(path, 0) + 1
+
+
+def start_sink_server(host="127.0.0.1", port=0, **options):
+    """
+    Start a Notion/Mem stand-in server in a background thread
+
+    Use `server.url` as NOTION_API_URL and MEM_API_URL.
+    """
+    server = MockSinkServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def start_mock_server(corpus=None, host="127.0.0.1", port=0, **options):
+    """
+    Start a mock Limitless API server in a background thread
+
+    Returns the server; use `server.url` as LIMITLESS_API_URL and `server.shutdown()` to stop it.
+    """
+    if corpus is None:
+        corpus = generate_corpus()
+    server = MockLimitlessServer((host, port), corpus, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Limitless /v1/lifelogs API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--lifelogs", type=int, default=1000, help="Number of synthetic lifelogs to serve")
+    parser.add_argument("--days", type=int, default=30, help="Spread lifelogs over the last N days")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic corpus")
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="Approximate markdown size per lifelog")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-statuses", default="504,429", help="Comma-separated statuses for failures")
+    parser.add_argument("--max-limit", type=int, default=10, help="Maximum page size the server allows")
+    parser.add_argument("--api-key", default=None, help="Require this X-API-Key value")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    print(f"Generating {args.lifelogs} synthetic lifelogs over {args.days} days...")
+    corpus = generate_corpus(args.lifelogs, args.days, seed=args.seed, payload_bytes=args.payload_bytes)
+
+    server = MockLimitlessServer(
+        (args.host, args.port),
+        corpus,
+        api_key=args.api_key,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",") if s],
+        max_limit=args.max_limit,
+        verbose=args.verbose,
+    )
+    print(f"Mock Limitless API listening on {server.url}")
+    print(f"Use it with: LIMITLESS_API_URL={server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock server...")
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
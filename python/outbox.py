@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import tzlocal
+from dotenv import load_dotenv
+
+import metrics
+import sinks
+from watch_lifelogs import watch_lifelogs
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.getenv("OUTBOX_DB") or os.path.join(SCRIPT_DIR, "outbox.db")
+
+# A claimed batch not acknowledged within this many seconds is handed out again
+LEASE_SECONDS = 10 * 60
+
+# Lifelogs per sink call; the mem sink writes one note per call, so it takes bigger batches
+BATCH_SIZES = {"mem": 50}
+DEFAULT_BATCH_SIZE = 10
+
+# Delay before retrying a batch whose sink call raised, doubled per attempt up to the maximum
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 30 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lifelogs (
+    id TEXT PRIMARY KEY,
+    start_time TEXT,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    sink TEXT NOT NULL,
+    lifelog_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    delivered_at REAL,
+    PRIMARY KEY (sink, lifelog_id)
+);
+CREATE INDEX IF NOT EXISTS deliveries_ready ON deliveries (sink, status, available_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class Outbox:
+    """
+    Durable queue between fetching lifelogs and delivering them to the sinks
+
+    Every lifelog is stored once, with one delivery row per sink. The idempotency key of a
+    delivery is (sink, lifelog id), so enqueueing a lifelog again (an overlapping fetch, a
+    restarted fetcher) never delivers it twice. Delivery is at-least-once: a batch is
+    leased to a worker and only marked delivered after the sink call returns, so a worker
+    that dies mid-batch has it handed out again when the lease expires.
+    """
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        # Workers in this process are woken as soon as something is enqueued
+        self.wakeups = []
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """
+        A connection for one transaction, committed (or rolled back) and closed on exit
+        """
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+
+    def enqueue(self, lifelogs, sink_names):
+        """
+        Store lifelogs and queue them for each sink; returns how many deliveries are new
+        """
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            for lifelog in lifelogs:
+                conn.execute(
+                    """
+                    INSERT INTO lifelogs (id, start_time, payload, enqueued_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET payload = excluded.payload WHERE payload = 'null'
+                    """,
+                    (lifelog["id"], lifelog.get("startTime"), json.dumps(lifelog), now),
+                )
+                for sink in sink_names:
+                    added += conn.execute(
+                        "INSERT OR IGNORE INTO deliveries (sink, lifelog_id, available_at) VALUES (?, ?, ?)",
+                        (sink, lifelog["id"], now),
+                    ).rowcount
+        if added:
+            metrics.inc("outbox_enqueued_total", added)
+            for event in self.wakeups:
+                event.set()
+        return added
+
+    def claim(self, sink, limit=DEFAULT_BATCH_SIZE, lease=LEASE_SECONDS):
+        """
+        Lease up to `limit` ready lifelogs for a sink, oldest first
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers never lease the same rows
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """
+                SELECT d.lifelog_id, d.attempts, l.payload FROM deliveries d JOIN lifelogs l ON l.id = d.lifelog_id
+                WHERE d.sink = ? AND d.status IN ('pending', 'leased') AND d.available_at <= ?
+                ORDER BY l.start_time, d.lifelog_id
+                LIMIT ?
+                """,
+                (sink, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE deliveries SET status = 'leased', attempts = attempts + 1, available_at = ? WHERE sink = ? AND lifelog_id = ?",
+                [(now + lease, sink, row["lifelog_id"]) for row in rows],
+            )
+        return [json.loads(row["payload"]) for row in rows], max([row["attempts"] for row in rows], default=0)
+
+    def ack(self, sink, lifelog_ids):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE deliveries SET status = 'delivered', delivered_at = ? WHERE sink = ? AND lifelog_id = ?",
+                [(time.time(), sink, lifelog_id) for lifelog_id in lifelog_ids],
+            )
+
+    def release(self, sink, lifelog_ids, delay):
+        """
+        Give a leased batch back, to be retried after `delay` seconds
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE deliveries SET status = 'pending', available_at = ? WHERE sink = ? AND lifelog_id = ?",
+                [(time.time() + delay, sink, lifelog_id) for lifelog_id in lifelog_ids],
+            )
+
+    def next_available_at(self, sink):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT MIN(available_at) FROM deliveries WHERE sink = ? AND status IN ('pending', 'leased')", (sink,)
+            ).fetchone()[0]
+
+    def backlog(self):
+        """
+        {sink: {status: count}}
+        """
+        counts = {}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT sink, status, COUNT(*) AS n FROM deliveries GROUP BY sink, status"):
+                counts.setdefault(row["sink"], {})[row["status"]] = row["n"]
+        return counts
+
+    def get_meta(self, key, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def purge(self, older_than_days=7):
+        """
+        Drop the stored payload of lifelogs delivered to every sink more than `older_than_days` ago
+
+        The ids stay behind as idempotency keys, so a later fetch of the same lifelog is still ignored.
+        """
+        cutoff = time.time() - older_than_days * 86400
+        with self._connect() as conn:
+            return conn.execute(
+                """
+                UPDATE lifelogs SET payload = 'null' WHERE payload != 'null' AND enqueued_at < ? AND id NOT IN (
+                    SELECT lifelog_id FROM deliveries WHERE status != 'delivered' OR delivered_at >= ?
+                )
+                """,
+                (cutoff, cutoff),
+            ).rowcount
+
+
+class OutboxWorker(threading.Thread):
+    """
+    Drains one sink's queue at that sink's own pace
+
+    Each sink has its own worker, so a slow Mem It call holds up only Mem It deliveries,
+    never the fetcher or the other sinks.
+    """
+    def __init__(self, outbox, sink, batch_size=None, idle_wait=30):
+        super().__init__(name=f"outbox-{sink}", daemon=True)
+        self.outbox = outbox
+        self.sink = sink
+        self.batch_size = batch_size or BATCH_SIZES.get(sink, DEFAULT_BATCH_SIZE)
+        self.idle_wait = idle_wait
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.delivered = 0
+        outbox.wakeups.append(self.wakeup)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.wakeup.clear()
+            lifelogs, attempts = self.outbox.claim(self.sink, self.batch_size)
+            if not lifelogs:
+                next_at = self.outbox.next_available_at(self.sink)
+                delay = self.idle_wait if next_at is None else min(max(next_at - time.time(), 0.1), self.idle_wait)
+                self.wakeup.wait(delay)
+                continue
+
+            ids = [lifelog["id"] for lifelog in lifelogs]
+            started = time.perf_counter()
+            try:
+                # Entries the sink itself fails to write go to its dead-letter queue
+                sinks.SINKS[self.sink]["deliver"](lifelogs, update_checkpoint=False)
+            except Exception as e:
+                delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                print(f"[outbox] {self.sink} delivery failed, retrying {len(ids)} lifelogs in {delay}s: {e}")
+                self.outbox.release(self.sink, ids, delay)
+                metrics.inc("outbox_delivery_failures_total", sink=self.sink)
+                continue
+
+            self.outbox.ack(self.sink, ids)
+            self.delivered += len(ids)
+            metrics.observe("outbox_delivery_seconds", time.perf_counter() - started, sink=self.sink)
+            metrics.inc("outbox_delivered_total", len(ids), sink=self.sink)
+            print(f"[outbox] {self.sink}: delivered {len(ids)} lifelogs in {time.perf_counter() - started:.1f}s")
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+
+
+class OutboxFetcher(threading.Thread):
+    """
+    Enqueues newly finalized lifelogs without waiting for any sink
+
+    Resumes from the watcher's resume point (the oldest lifelog still settling, or the
+    newest one enqueued), which is kept in the outbox. Lifelogs seen again after a restart
+    are skipped by enqueue.
+    """
+    def __init__(self, outbox, sink_names, poll_interval=60, timezone=None, since=None):
+        super().__init__(name="outbox-fetcher", daemon=True)
+        self.outbox = outbox
+        self.sink_names = sink_names
+        self.poll_interval = poll_interval
+        self.timezone = timezone or str(tzlocal.get_localzone())
+        self.since = since
+        self.stop_event = threading.Event()
+
+    def run(self):
+        tz = ZoneInfo(self.timezone)
+        watermark = self.outbox.get_meta("fetch_watermark")
+        if watermark:
+            since = datetime.fromisoformat(watermark)
+        else:
+            # First run: today's conversations, like the daily sync
+            since = self.since or datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def save_watermark(resume_at):
+            self.outbox.set_meta("fetch_watermark", resume_at.isoformat())
+
+        for lifelog in watch_lifelogs(since=since, poll_interval=self.poll_interval, timezone=self.timezone,
+                                      stop=self.stop_event, on_resume=save_watermark):
+            added = self.outbox.enqueue([lifelog], self.sink_names)
+            if added:
+                print(f"[outbox] enqueued {lifelog.get('title') or 'Untitled'} ({lifelog['id']})")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def start_workers(outbox, sink_names):
+    workers = [OutboxWorker(outbox, sink) for sink in sink_names]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch lifelogs into a durable outbox and deliver them to each sink independently")
+    parser.add_argument("command", choices=["run", "fetch", "work", "status", "purge"], nargs="?", default="run",
+                        help="run = fetch and deliver (default), fetch or work = only one side, status = backlog per sink")
+    parser.add_argument("--sinks", default=os.getenv("OUTBOX_SINKS", "notion,mem_smart"),
+                        help=f"Comma-separated sinks ({', '.join(sinks.SINKS)})")
+    parser.add_argument("--poll", type=float, default=60, help="Seconds between fetches")
+    parser.add_argument("--since", help='First run only: start from this local time ("YYYY-MM-DD HH:MM"), default today')
+    parser.add_argument("--timezone", help="IANA timezone for --since and the API (default: local)")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    args = parser.parse_args()
+
+    try:
+        sink_names = sinks.parse_names(args.sinks)
+    except ValueError as e:
+        parser.error(str(e))
+
+    outbox = Outbox(args.db)
+    if args.command == "status":
+        for sink, counts in sorted(outbox.backlog().items()):
+            print(f"{sink:<10} " + "  ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+        return
+    if args.command == "purge":
+        print(f"Purged {outbox.purge()} delivered lifelogs")
+        return
+
+    if args.command in ("run", "fetch") and not os.getenv("LIMITLESS_API_KEY"):
+        print("Error: Missing environment variable: LIMITLESS_API_KEY")
+        return
+
+    timezone = args.timezone or str(tzlocal.get_localzone())
+    since = datetime.fromisoformat(args.since).replace(tzinfo=ZoneInfo(timezone)) if args.since else None
+
+    threads = []
+    if args.command in ("run", "fetch"):
+        fetcher = OutboxFetcher(outbox, sink_names, args.poll, timezone, since)
+        fetcher.start()
+        threads.append(fetcher)
+    if args.command in ("run", "work"):
+        threads.extend(start_workers(outbox, sink_names))
+
+    metrics.start_http_server_from_env(offset=4)
+    print(f"Outbox {args.command} started with sinks: {', '.join(sink_names)} (Ctrl+C to stop)")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping outbox...")
+        for thread in threads:
+            thread.stop()
+
+if __name__ == "__main__":
+    main()
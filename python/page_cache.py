@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import tzlocal
+from dotenv import load_dotenv
+
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.getenv("PAGE_CACHE_DB") or os.path.join(SCRIPT_DIR, ".page_cache.db")
+
+# Freshness by the last day a query covers (seconds)
+TODAY_TTL = float(os.getenv("PAGE_CACHE_TODAY_TTL") or 60)
+YESTERDAY_TTL = float(os.getenv("PAGE_CACHE_YESTERDAY_TTL") or 3600)
+PAST_TTL = float(os.getenv("PAGE_CACHE_PAST_TTL") or 30 * 86400)
+
+# Least recently used pages are evicted above this many compressed bytes
+MAX_BYTES = int(float(os.getenv("PAGE_CACHE_MAX_MB") or 200) * 1024 * 1024)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_access);
+"""
+
+
+def enabled():
+    return os.getenv("PAGE_CACHE", "1").lower() not in ("0", "off", "false", "no")
+
+
+def _last_day(params):
+    """
+    Last calendar day a query covers, or None when it reaches up to now
+    """
+    if params.get("date"):
+        return date.fromisoformat(str(params["date"]))
+    if params.get("end"):
+        return datetime.fromisoformat(str(params["end"])).date()
+    return None
+
+
+def ttl_for(params):
+    """
+    How long a page stays fresh: days that ended more than a day ago essentially never change
+    """
+    try:
+        last_day = _last_day(params)
+        today = datetime.now(ZoneInfo(params.get("timezone") or str(tzlocal.get_localzone()))).date()
+    except (ValueError, KeyError):
+        return TODAY_TTL
+    if last_day is None or last_day >= today:
+        return TODAY_TTL
+    if last_day == today - timedelta(days=1):
+        return YESTERDAY_TTL
+    return PAST_TTL
+
+
+def cache_key(api_key, url, params):
+    # The API key is hashed in so two accounts on one machine never share pages
+    material = json.dumps([api_key or "", url, sorted((k, str(v)) for k, v in params.items() if v is not None)])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class PageCache:
+    """
+    zlib-compressed API pages in SQLite, shared by every process on this machine
+
+    Entries expire by the date they cover (see ttl_for) and the total size is capped
+    by evicting the least recently used pages.
+    """
+    def __init__(self, path=DEFAULT_DB, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Return the cached body for `key` if it is still fresh, else None
+        """
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            row = conn.execute("SELECT body, expires_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                metrics.inc("page_cache_requests_total", result="miss")
+                return None
+            conn.execute("UPDATE pages SET last_access = ? WHERE key = ?", (now, key))
+        metrics.inc("page_cache_requests_total", result="hit")
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key, text, ttl):
+        body = zlib.compress(text.encode("utf-8"), 6)
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (key, body, size, fetched_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now + ttl, now),
+            )
+            self._evict(conn)
+        metrics.inc("page_cache_bytes_written_total", len(body))
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total > self.max_bytes:
+            # Expired pages go first, then the least recently used until 90% of the cap
+            evicted = conn.execute("DELETE FROM pages WHERE expires_at <= ?", (time.time(),)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            target = self.max_bytes * 0.9
+            for key, size in conn.execute("SELECT key, size FROM pages ORDER BY last_access").fetchall():
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            metrics.inc("page_cache_evictions_total", evicted)
+        metrics.set_gauge("page_cache_bytes", total)
+
+    def stats(self):
+        with self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"pages": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def shared():
+    """
+    The process-wide PageCache, or None if PAGE_CACHE is off or the file can't be opened
+    """
+    global _cache
+    if not enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                cache = PageCache()
+                cache._connect()
+                _cache = cache
+            except sqlite3.Error as e:
+                print(f"Page cache unavailable, fetching without it: {e}")
+                _cache = False
+    return _cache or None
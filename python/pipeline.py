@@ -0,0 +1,250 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from datetime import date
+
+import tzlocal
+from dotenv import load_dotenv
+
+import metrics
+import sinks
+from _client import iter_lifelog_pages
+from backfill import day_windows
+
+# Load environment variables
+load_dotenv()
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Sinks the pipeline can deliver to one conversation at a time (mem writes one note per batch)
+PIPELINE_SINKS = ("notion", "mem_smart", "markdown")
+
+
+class Stage:
+    """
+    One step of a Pipeline
+
+    `func(item)` returns an iterable of items for the next stage (or None). A generator
+    is consumed lazily, so a stage blocked on a full downstream queue stops producing.
+    """
+    def __init__(self, name, func, workers=1, queue_size=100):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {"items": 0, "outputs": 0, "errors": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0, "max_depth": 0}
+        self.lock = threading.Lock()
+        self.remaining = workers
+
+    def record_depth(self):
+        depth = self.queue.qsize()
+        metrics.set_gauge("pipeline_queue_depth", depth, stage=self.name)
+        with self.lock:
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+
+
+class Pipeline:
+    """
+    Runs a source and a chain of stages connected by bounded queues
+
+    Every stage has its own worker threads and an input queue of `queue_size` items. When
+    a queue is full, whoever feeds it waits, so a slow last stage throttles all the stages
+    before it, down to the source, and at most the queued items are held in memory.
+    """
+    def __init__(self, source, stages):
+        self.source = source
+        self.stages = stages
+
+    def _put(self, stage, item, producer):
+        started = time.perf_counter()
+        stage.queue.put(item)
+        waited = time.perf_counter() - started
+        stage.record_depth()
+        if waited > 0.001:
+            # Time the producer spent waiting for room downstream: the backpressure
+            metrics.inc("pipeline_blocked_seconds_total", waited, stage=producer)
+            with self.lock:
+                self.blocked[producer] = self.blocked.get(producer, 0.0) + waited
+
+    def _feed(self):
+        first = self.stages[0]
+        try:
+            for item in self.source:
+                self._put(first, item, "source")
+        except Exception as e:
+            print(f"[pipeline] source failed: {e}")
+            metrics.inc("pipeline_errors_total", stage="source")
+        finally:
+            for _ in range(first.workers):
+                first.queue.put(_DONE)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            stage.record_depth()
+            if item is _DONE:
+                break
+
+            started = time.perf_counter()
+            outputs = 0
+            try:
+                for output in stage.func(item) or ():
+                    outputs += 1
+                    if next_stage:
+                        self._put(next_stage, output, stage.name)
+            except Exception as e:
+                print(f"[pipeline] {stage.name} failed: {e}")
+                metrics.inc("pipeline_errors_total", stage=stage.name)
+                with stage.lock:
+                    stage.stats["errors"] += 1
+            elapsed = time.perf_counter() - started
+            metrics.inc("pipeline_items_total", stage=stage.name)
+            metrics.observe("pipeline_stage_seconds", elapsed, stage=stage.name)
+            with stage.lock:
+                stage.stats["items"] += 1
+                stage.stats["outputs"] += outputs
+                stage.stats["busy_seconds"] += elapsed
+
+        # The last worker of a stage to finish passes the end on to the next stage
+        with stage.lock:
+            stage.remaining -= 1
+            last = stage.remaining == 0
+        if last and next_stage:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_DONE)
+
+    def run(self):
+        """
+        Run to completion; returns per-stage stats
+        """
+        self.lock = threading.Lock()
+        self.blocked = {}
+        threads = [threading.Thread(target=self._feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            metrics.set_gauge("pipeline_queue_capacity", stage.queue.maxsize, stage=stage.name)
+            metrics.set_gauge("pipeline_workers", stage.workers, stage=stage.name)
+            threads.extend(
+                threading.Thread(target=self._work, args=(index,), name=f"pipeline-{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            )
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        stats = {}
+        for stage in self.stages:
+            stats[stage.name] = dict(
+                stage.stats,
+                blocked_seconds=round(self.blocked.get(stage.name, 0.0), 2),
+                busy_seconds=round(stage.stats["busy_seconds"], 2),
+                items_per_second=round(stage.stats["items"] / elapsed, 2) if elapsed else 0.0,
+            )
+        stats["seconds"] = round(elapsed, 2)
+        return stats
+
+
+def fetch_day(day, timezone):
+    """
+    Fetch stage: yield a day's lifelogs one page at a time
+    """
+    for lifelogs, _ in iter_lifelog_pages(
+        api_key=os.getenv("LIMITLESS_API_KEY"),
+        date=day,
+        timezone=timezone,
+        direction="asc",
+    ):
+        if lifelogs:
+            yield lifelogs
+
+
+def transform_page(lifelogs, sink_names, database_id):
+    """
+    Transform stage: one delivery task per lifelog and sink, with the Notion request body prebuilt
+    """
+    import daily_notion_sync
+
+    for lifelog in lifelogs:
+        for sink in sink_names:
+            if sink == "notion":
+                entry = daily_notion_sync.format_for_notion([lifelog])[0]
+                yield sink, lifelog, (entry, daily_notion_sync.notion_page_data(entry, database_id))
+            else:
+                yield sink, lifelog, None
+
+
+def deliver_task(task):
+    """
+    Deliver stage: write one lifelog to one sink (failures go to the sink's dead-letter queue)
+    """
+    sink, lifelog, prepared = task
+    if sink == "notion":
+        import daily_notion_sync
+
+        entry, data = prepared
+        delivered = daily_notion_sync.write_notion_page(entry, data, os.getenv("NOTION_API_KEY"))
+    else:
+        delivered = sinks.SINKS[sink]["deliver"]([lifelog], update_checkpoint=False)
+    if delivered:
+        metrics.inc("pipeline_delivered_total", sink=sink)
+    return None
+
+
+def sync_pipeline(days, sink_names, fetch_workers=2, transform_workers=1, deliver_workers=4, queue_size=20, timezone=None):
+    """
+    Build the fetch -> transform -> deliver pipeline for a list of YYYY-MM-DD days
+    """
+    timezone = timezone or str(tzlocal.get_localzone())
+    database_id = os.getenv("NOTION_DATABASE_ID")
+    return Pipeline(days, [
+        Stage("fetch", lambda day: fetch_day(day, timezone), fetch_workers, queue_size),
+        Stage("transform", lambda page: transform_page(page, sink_names, database_id), transform_workers, queue_size),
+        Stage("deliver", deliver_task, deliver_workers, queue_size),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream lifelogs through fetch -> transform -> deliver stages with bounded queues")
+    parser.add_argument("--start", default=date.today().isoformat(), help="First day (YYYY-MM-DD, default: today)")
+    parser.add_argument("--end", help="Last day, inclusive (default: --start)")
+    parser.add_argument("--sinks", default="notion", help=f"Comma-separated sinks ({', '.join(PIPELINE_SINKS)})")
+    parser.add_argument("--fetch-workers", type=int, default=2, help="Days fetched in parallel")
+    parser.add_argument("--transform-workers", type=int, default=1)
+    parser.add_argument("--deliver-workers", type=int, default=4, help="Concurrent sink writes")
+    parser.add_argument("--queue-size", type=int, default=20, help="Capacity of each stage's input queue")
+    parser.add_argument("--timezone", help="IANA timezone for the day windows (default: local)")
+    args = parser.parse_args()
+
+    try:
+        sink_names = sinks.parse_names(args.sinks)
+        start = date.fromisoformat(args.start)
+        end = date.fromisoformat(args.end) if args.end else start
+    except ValueError as e:
+        parser.error(str(e))
+    unsupported = [name for name in sink_names if name not in PIPELINE_SINKS]
+    if unsupported:
+        parser.error(f"Sinks not supported by the pipeline: {', '.join(unsupported)}")
+    if not os.getenv("LIMITLESS_API_KEY"):
+        print("Error: Missing environment variable: LIMITLESS_API_KEY")
+        return
+
+    metrics.start_http_server_from_env(offset=5)
+    pipeline = sync_pipeline(day_windows(start, end), sink_names, args.fetch_workers, args.transform_workers,
+                             args.deliver_workers, args.queue_size, args.timezone)
+    stats = pipeline.run()
+
+    print(f"Pipeline finished in {stats.pop('seconds')}s")
+    for name, stage in stats.items():
+        print(f"  {name:<10} {stage['items']} items ({stage['items_per_second']}/s), {stage['errors']} errors, "
+              f"max queue depth {stage['max_depth']}, blocked downstream {stage['blocked_seconds']}s")
+
+if __name__ == "__main__":
+    main()
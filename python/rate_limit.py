@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.getenv("RATE_LIMIT_DB") or os.path.join(SCRIPT_DIR, ".rate_limits.db")
+
+# Requests per second and burst size per API (as named by metrics.api_for_url)
+DEFAULT_BUDGETS = {
+    "limitless": (2.0, 5),
+    "notion": (3.0, 5),
+    "mem": (2.0, 5),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    api TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def parse_budgets(value):
+    """
+    Parse RATE_LIMITS, e.g. "limitless=2,notion=3/10" (rate per second, optional /burst)
+
+    "off" disables limiting; APIs that are not listed keep their default budget.
+    """
+    if value is None:
+        return dict(DEFAULT_BUDGETS)
+    if value.strip().lower() in ("", "0", "off", "false", "no"):
+        return {}
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        api, _, spec = item.partition("=")
+        rate, _, burst = spec.partition("/")
+        rate = float(rate)
+        if rate <= 0:
+            budgets.pop(api.strip(), None)
+        else:
+            budgets[api.strip()] = (rate, float(burst) if burst else max(rate, 1))
+    return budgets
+
+
+class RateLimiter:
+    """
+    Token buckets shared by every process on this machine
+
+    The buckets live in a small SQLite file, so the GUI schedulers, the daemon, the
+    monitor and one-off scripts draw from the same per-API budget instead of each
+    sending its own full rate. Taking a token is one short write transaction.
+    """
+    def __init__(self, budgets=None, path=DEFAULT_DB):
+        self.budgets = parse_budgets(os.getenv("RATE_LIMITS")) if budgets is None else budgets
+        self.path = path
+        self._local = threading.local()
+        self._disabled = False
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _take(self, api, rate, burst):
+        """
+        Take one token if there is one; otherwise return how long until there will be
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE api = ?", (api,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(now - row[1], 0) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO buckets (api, tokens, updated_at) VALUES (?, ?, ?)", (api, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, api):
+        """
+        Block until a request to `api` fits its budget; returns the seconds waited
+        """
+        budget = self.budgets.get(api)
+        if not budget or self._disabled:
+            return 0.0
+
+        started = time.perf_counter()
+        while True:
+            try:
+                wait = self._take(api, *budget)
+            except sqlite3.Error as e:
+                # Never let the limiter itself stop syncing
+                print(f"Rate limiter unavailable, continuing without it: {e}")
+                self._disabled = True
+                return 0.0
+            if not wait:
+                break
+            time.sleep(wait)
+
+        waited = time.perf_counter() - started
+        if waited > 0.001:
+            metrics.inc("rate_limit_waits_total", api=api)
+            metrics.observe("rate_limit_wait_seconds", waited, api=api)
+        return waited
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def acquire(api):
+    """
+    Wait for the shared limiter (configured from RATE_LIMITS and RATE_LIMIT_DB)
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter.acquire(api)
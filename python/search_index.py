@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import date
+
+import tzlocal
+from dotenv import load_dotenv
+
+import metrics
+from archive import to_epoch_ms
+
+# Load environment variables
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.getenv("SEARCH_INDEX_DB") or os.path.join(SCRIPT_DIR, "search_index.db")
+
+# bm25 column weights: title, markdown, speech, speakers
+WEIGHTS = (8.0, 1.0, 2.0, 0.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lifelogs (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    start_time TEXT,
+    start_ms INTEGER,
+    end_time TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lifelogs_start ON lifelogs (start_ms);
+CREATE VIRTUAL TABLE IF NOT EXISTS lifelog_text USING fts5(
+    title, markdown, speech, speakers,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS lifelog_speakers (
+    rowid INTEGER NOT NULL,
+    speaker TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (speaker, rowid)
+);
+"""
+
+
+def _walk(nodes):
+    for node in nodes or []:
+        yield node
+        yield from _walk(node.get("children"))
+
+
+def speech_lines(lifelog):
+    """
+    (speaker, text) for every blockquote in a lifelog's contents
+    """
+    return [
+        (node.get("speakerName") or "Unknown", node.get("content") or "")
+        for node in _walk(lifelog.get("contents"))
+        if node.get("type") == "blockquote" and node.get("content")
+    ]
+
+
+def _fts_query(text):
+    """
+    Quote every term so user input never trips the FTS5 query syntax
+    """
+    terms = re.findall(r'"[^"]+"|\S+', text)
+    return " ".join('"' + term.strip('"').replace('"', '""') + '"' for term in terms if term.strip('"'))
+
+
+def _speaker_name(name):
+    return " ".join(name.split())
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over lifelog titles, markdown and what each speaker said
+
+    One row per lifelog, replaced when the lifelog is indexed again, so indexing is
+    idempotent and can run incrementally from any ingestion path.
+    """
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            fresh = not self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'lifelog_speakers'").fetchone()
+            self.conn.executescript(_SCHEMA)
+            if fresh:
+                self._fill_speakers()
+
+    def _fill_speakers(self):
+        # Indexes from before the speakers table: names are the "speaker: " prefixes of the speech lines
+        for rowid, speech in self.conn.execute("SELECT rowid, speech FROM lifelog_text").fetchall():
+            names = {line.split(": ", 1)[0] for line in (speech or "").split("\n") if ": " in line}
+            self.conn.executemany("INSERT OR IGNORE INTO lifelog_speakers (rowid, speaker) VALUES (?, ?)",
+                                  [(rowid, _speaker_name(name)) for name in names if name.strip()])
+
+    def add(self, lifelogs):
+        """
+        Index (or re-index) lifelogs; returns how many were written
+        """
+        count = 0
+        with self.conn:
+            for lifelog in lifelogs:
+                if not lifelog.get("id"):
+                    continue
+                lines = speech_lines(lifelog)
+                row = self.conn.execute("SELECT rowid FROM lifelogs WHERE id = ?", (lifelog["id"],)).fetchone()
+                if row:
+                    self.conn.execute("DELETE FROM lifelog_text WHERE rowid = ?", (row["rowid"],))
+                    self.conn.execute("DELETE FROM lifelog_speakers WHERE rowid = ?", (row["rowid"],))
+                    self.conn.execute("DELETE FROM lifelogs WHERE rowid = ?", (row["rowid"],))
+                cursor = self.conn.execute(
+                    "INSERT INTO lifelogs (id, title, start_time, start_ms, end_time, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (lifelog["id"], lifelog.get("title"), lifelog.get("startTime"), to_epoch_ms(lifelog.get("startTime")),
+                     lifelog.get("endTime"), time.time()),
+                )
+                self.conn.execute(
+                    "INSERT INTO lifelog_text (rowid, title, markdown, speech, speakers) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        cursor.lastrowid,
+                        lifelog.get("title") or "",
+                        lifelog.get("markdown") or "",
+                        "\n".join(f"{speaker}: {text}" for speaker, text in lines),
+                        " ".join(sorted({speaker for speaker, _ in lines})),
+                    ),
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO lifelog_speakers (rowid, speaker) VALUES (?, ?)",
+                    [(cursor.lastrowid, _speaker_name(speaker)) for speaker in {speaker for speaker, _ in lines}],
+                )
+                count += 1
+        metrics.inc("search_indexed_total", count)
+        return count
+
+    def search(self, query, since=None, until=None, speaker=None, limit=20):
+        """
+        Ranked matches for `query` as dicts with id, title, start_time, score and snippet
+
+        `since`/`until` bound the start time (datetimes, dates or ISO strings; naive means UTC).
+        `speaker` keeps lifelogs in which a speaker with exactly that name (ignoring case)
+        said something; without a query they are listed newest first.
+        """
+        terms = _fts_query(query)
+        speaker = _speaker_name(speaker or "")
+        if not terms and not speaker:
+            return []
+
+        # Rank first and build snippets only for the page of results: snippet() is the
+        # expensive part, and a common term can match most of the history
+        if terms:
+            sql = f"""
+                SELECT l.rowid, l.id, l.title, l.start_time, l.end_time,
+                       bm25(lifelog_text, {', '.join(str(w) for w in WEIGHTS)}) AS score
+                FROM lifelog_text JOIN lifelogs l ON l.rowid = lifelog_text.rowid
+                WHERE lifelog_text MATCH ?
+            """
+            params = [terms]
+        else:
+            sql = "SELECT l.rowid, l.id, l.title, l.start_time, l.end_time, 0.0 AS score FROM lifelogs l WHERE 1"
+            params = []
+        if speaker:
+            # Whole names from their own table: "Bob" never matches "Jones Bob", and a
+            # phrase never runs across two speakers' names
+            sql += " AND l.rowid IN (SELECT rowid FROM lifelog_speakers WHERE speaker = ?)"
+            params.append(speaker)
+        if since is not None:
+            sql += " AND l.start_ms >= ?"
+            params.append(to_epoch_ms(since))
+        if until is not None:
+            sql += " AND l.start_ms < ?"
+            params.append(to_epoch_ms(until))
+        sql += " ORDER BY score, l.start_ms DESC LIMIT ?"
+        params.append(limit)
+
+        started = time.perf_counter()
+        rows = self.conn.execute(sql, params).fetchall()
+        snippets = {}
+        if rows and not terms:
+            # Nothing to highlight: show what the speaker said first
+            placeholders = ", ".join("?" for _ in rows)
+            prefix = speaker.lower() + ": "
+            for rowid, speech in self.conn.execute(
+                f"SELECT rowid, speech FROM lifelog_text WHERE rowid IN ({placeholders})", [row["rowid"] for row in rows]
+            ):
+                lines = [line for line in (speech or "").split("\n") if line.lower().startswith(prefix)]
+                snippets[rowid] = lines[0][:200] if lines else ""
+        elif rows:
+            placeholders = ", ".join("?" for _ in rows)
+            for rowid, speech, markdown in self.conn.execute(
+                f"""
+                SELECT rowid,
+                       snippet(lifelog_text, 2, '[', ']', ' ... ', 16),
+                       snippet(lifelog_text, 1, '[', ']', ' ... ', 16)
+                FROM lifelog_text WHERE lifelog_text MATCH ? AND rowid IN ({placeholders})
+                """,
+                [terms, *(row["rowid"] for row in rows)],
+            ):
+                snippets[rowid] = speech if "[" in (speech or "") else markdown
+        metrics.observe("search_query_seconds", time.perf_counter() - started)
+
+        results = []
+        for row in rows:
+            results.append({
+                "id": row["id"],
+                "title": row["title"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                # bm25() is lower-is-better; flip it so higher means more relevant
+                "score": round(-row["score"], 3),
+                "snippet": (snippets.get(row["rowid"]) or "").replace("\n", " "),
+            })
+        return results
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM lifelogs").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over past Limitless conversations")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Search the index")
+    search_parser.add_argument("query", nargs="+")
+    search_parser.add_argument("--since", help="Only conversations starting at or after this date/time (ISO 8601)")
+    search_parser.add_argument("--until", help="Only conversations starting before this date/time (ISO 8601)")
+    search_parser.add_argument("--speaker", help="Only conversations in which this speaker talked")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    index_parser = subparsers.add_parser("index", help="Index lifelogs from the local archive or the API")
+    index_parser.add_argument("--archive", action="store_true", help="Index everything in the local archive (archive.py)")
+    index_parser.add_argument("--start", help="First day to fetch from the API (YYYY-MM-DD)")
+    index_parser.add_argument("--end", default=date.today().isoformat(), help="Last day, inclusive (default: today)")
+    index_parser.add_argument("--timezone", help="IANA timezone for the days (default: local)")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    if args.command == "search":
+        started = time.perf_counter()
+        results = index.search(" ".join(args.query), args.since, args.until, args.speaker, args.limit)
+        elapsed = time.perf_counter() - started
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        for result in results:
+            print(f"{result['start_time'] or '':<25} {result['score']:>7}  {result['title'] or 'Untitled'} ({result['id']})")
+            print(f"    {result['snippet']}")
+        print(f"{len(results)} results from {len(index)} conversations in {elapsed * 1000:.1f} ms")
+    elif args.archive:
+        import archive
+
+        batch = []
+        total = 0
+        for lifelog in archive.LifelogArchive().range():
+            batch.append(lifelog)
+            if len(batch) >= 500:
+                total += index.add(batch)
+                batch = []
+        total += index.add(batch)
+        print(f"Indexed {total} lifelogs from the archive")
+    elif args.start:
+        from _client import get_lifelogs
+        from backfill import day_windows
+
+        timezone_name = args.timezone or str(tzlocal.get_localzone())
+        for day in day_windows(date.fromisoformat(args.start), date.fromisoformat(args.end)):
+            lifelogs = get_lifelogs(api_key=os.getenv("LIMITLESS_API_KEY"), date=day, limit=None,
+                                    timezone=timezone_name, direction="asc")
+            print(f"[{day}] indexed {index.add(lifelogs)} lifelogs")
+    else:
+        parser.error("index needs --archive or --start")
+
+if __name__ == "__main__":
+    main()
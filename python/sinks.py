@@ -0,0 +1,132 @@
+import os
+import re
+from datetime import datetime
+
+# Sink name -> {"deliver": function(lifelogs, update_checkpoint) -> delivered count, "description": ...}
+SINKS = {}
+
+# Where the markdown sink writes one file per lifelog
+MARKDOWN_DIR = os.getenv("MARKDOWN_EXPORT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+
+
+class DeliveryError(Exception):
+    """
+    Raised by deliver(raise_errors=True) when a sink failed
+
+    `errors` maps each failed sink to its exception and `results` has the counts of the
+    sinks that succeeded.
+    """
+    def __init__(self, errors, results):
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+        self.errors = errors
+        self.results = results
+
+
+def register(name, description):
+    """
+    Decorator that adds a delivery function to the sink registry
+    """
+    def decorator(func):
+        SINKS[name] = {"deliver": func, "description": description}
+        return func
+    return decorator
+
+
+# The sync modules are imported when a sink is used, so listing sinks stays cheap
+@register("notion", "One Notion database page per conversation")
+def deliver_to_notion(lifelogs, update_checkpoint=False):
+    import daily_notion_sync
+
+    entries = daily_notion_sync.format_for_notion(lifelogs)
+    return daily_notion_sync.send_to_notion(
+        entries,
+        os.getenv("NOTION_API_KEY"),
+        os.getenv("NOTION_DATABASE_ID"),
+        update_checkpoint=update_checkpoint
+    )
+
+
+@register("mem", "One Mem.ai note for the whole batch")
+def deliver_to_mem(lifelogs, update_checkpoint=False):
+    import limitless_to_mem
+
+    # Without a key nothing is sent or dead-lettered, so this must fail loudly rather than count 0
+    if not os.getenv("MEM_API_KEY"):
+        raise RuntimeError("MEM_API_KEY is not set")
+    # A note that could not be created is in the dead-letter queue, which retries it
+    return len(lifelogs) if limitless_to_mem.create_mem_note(lifelogs, update_checkpoint=update_checkpoint) else 0
+
+
+@register("mem_smart", "Each conversation processed with Mem It")
+def deliver_to_mem_smart(lifelogs, update_checkpoint=False):
+    import limitless_to_mem_smart
+
+    return limitless_to_mem_smart.process_lifelogs(lifelogs, update_checkpoint=update_checkpoint)
+
+
+@register("markdown", "One markdown file per conversation in MARKDOWN_EXPORT_DIR")
+def deliver_to_markdown(lifelogs, update_checkpoint=False):
+    os.makedirs(MARKDOWN_DIR, exist_ok=True)
+    for lifelog in lifelogs:
+        try:
+            day = datetime.fromisoformat(lifelog.get("startTime", "").replace("Z", "+00:00")).strftime("%Y-%m-%d")
+        except ValueError:
+            day = "undated"
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", lifelog["id"])
+        with open(os.path.join(MARKDOWN_DIR, f"{day}_{safe_id}.md"), "w") as f:
+            f.write(lifelog.get("markdown") or f"# {lifelog.get('title', 'Untitled conversation')}\n")
+    return len(lifelogs)
+
+
+@register("archive", "Local append-only archive (archive.py)")
+def deliver_to_archive(lifelogs, update_checkpoint=False):
+    import archive
+
+    archive.LifelogArchive().append(lifelogs)
+    return len(lifelogs)
+
+
+@register("search", "Local full-text search index (search_index.py)")
+def deliver_to_search(lifelogs, update_checkpoint=False):
+    import search_index
+
+    index = search_index.SearchIndex()
+    try:
+        return index.add(lifelogs)
+    finally:
+        index.close()
+
+
+def parse_names(value):
+    """
+    Split a comma-separated list of sink names, rejecting unknown ones
+    """
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in SINKS]
+    if unknown:
+        raise ValueError(f"Unknown sinks: {', '.join(unknown)} (available: {', '.join(SINKS)})")
+    return names
+
+
+def deliver(lifelogs, names, update_checkpoint=False, raise_errors=False):
+    """
+    Hand lifelogs to each named sink; returns {sink: delivered count}
+
+    A failing sink is reported and does not stop the others. With raise_errors, a
+    DeliveryError is raised once every sink was tried, so callers can retry the failed
+    sinks; otherwise a failed sink counts 0. (The Notion and Mem sinks hand their own
+    failures to the dead-letter queue and only raise when they could not do that.)
+    """
+    results = {}
+    errors = {}
+    for name in names:
+        try:
+            results[name] = SINKS[name]["deliver"](lifelogs, update_checkpoint=update_checkpoint)
+        except Exception as e:
+            print(f"Error delivering to {name}: {e}")
+            errors[name] = e
+    if errors and raise_errors:
+        raise DeliveryError(errors, results)
+    for name in errors:
+        results[name] = 0
+    return results
@@ -1,18 +1,24 @@
+import argparse
 import os
+from datetime import date
+import tzlocal
 from openai import OpenAI
 from _client import get_lifelogs
+import context_packer
+import metrics
 
 def summarize_lifelogs(lifelogs, should_stream=True):
   client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     
-  response = client.chat.completions.create(
-      model="gpt-4o-mini",
-      messages=[
-          {"role": "system", "content": "You are a helpful assistant that summarizes transcripts."},
-          {"role": "user", "content": f"Summarize the following transcripts: {lifelogs}"}
-      ],
-      stream=should_stream
-  )
+  with metrics.track_call("openai"):
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that summarizes transcripts."},
+            {"role": "user", "content": f"Summarize the following transcripts: {lifelogs}"}
+        ],
+        stream=should_stream
+    )
   if should_stream:
     for chunk in response:
       if chunk.choices[0].finish_reason is None:
@@ -21,14 +27,29 @@ def summarize_lifelogs(lifelogs, should_stream=True):
     return response.choices[0].message.content
 
 def main():
-    # Get transcripts, limiting size because OpenAI has a 128k context window
+    parser = argparse.ArgumentParser(description="Summarize a day of Limitless transcripts")
+    parser.add_argument("--date", default=date.today().isoformat(), help="Day to summarize (YYYY-MM-DD, default: today)")
+    parser.add_argument("--timezone", help="IANA timezone for the day (default: local)")
+    parser.add_argument("--query", help="Favor parts of the day about this")
+    parser.add_argument("--budget", type=int, default=context_packer.DEFAULT_BUDGET, help="Token budget for transcripts")
+    args = parser.parse_args()
+
+    # Get the whole day, with headings so the packer can split it into sections
+    timezone = args.timezone or str(tzlocal.get_localzone())
     lifelogs = get_lifelogs(
         api_key=os.getenv("LIMITLESS_API_KEY"),
-        limit=10
+        date=args.date,
+        timezone=timezone,
+        limit=None,
+        includeHeadings=True,
     )
 
+    # OpenAI has a 128k context window: keep the most relevant sections that fit
+    transcripts, stats = context_packer.pack(lifelogs, args.budget, args.query, timezone)
+    print(f"Summarizing {stats['packed']} of {stats['segments']} sections ({stats['tokens']} tokens)\n")
+
     # Summarize transcripts
-    summarize_lifelogs(lifelogs)
+    summarize_lifelogs(transcripts)
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+import dead_letter
+import metrics
+import sync_jobs
+from timer_scheduler import TimerScheduler, parse_spec
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PID_FILE = os.path.join(SCRIPT_DIR, "sync_daemon.pid")
+DEFAULT_STATUS_FILE = os.path.join(SCRIPT_DIR, "sync_daemon_status.json")
+
+# Same pair of jobs that run_all_sync.py starts
+DEFAULT_JOBS = "notion,mem_smart"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def acquire_pid_file(path):
+    """
+    Write our PID to `path`, refusing to start if another live daemon owns it
+    """
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                existing = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            existing = 0
+        if existing and existing != os.getpid() and _pid_alive(existing):
+            raise RuntimeError(f"Sync daemon already running with PID {existing} ({path})")
+
+    with open(path, "w") as f:
+        f.write(f"{os.getpid()}\n")
+
+
+def release_pid_file(path):
+    try:
+        with open(path) as f:
+            if int(f.read().strip() or 0) != os.getpid():
+                return
+        os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+class SyncDaemon:
+    """
+    Runs sync jobs on their schedules without a GUI
+
+    The timer scheduler sleeps until the next job is due; the main thread only waits
+    for a stop signal. The daemon's state is recorded in a status file.
+    """
+    def __init__(self, job_names, status_file=DEFAULT_STATUS_FILE, initial_run=True, schedules=None, jitter=0):
+        self.job_names = job_names
+        self.status_file = status_file
+        self.stop_event = threading.Event()
+        self.scheduler = TimerScheduler()
+        self.status_lock = threading.Lock()
+        self.started_at = datetime.now()
+
+        schedules = schedules or {}
+        self.jobs = {}
+        for name in job_names:
+            spec = parse_spec(schedules.get(name) or sync_jobs.schedule_for(name))
+            self.jobs[name] = {
+                "schedule": spec,
+                "running": False,
+                "last_run": None,
+                "last_result": None,
+                "last_duration": None,
+                "last_lock_wait": None,
+                "runs": 0,
+                "failures": 0,
+                "coalesced": 0,
+            }
+            self.scheduler.add_job(
+                name,
+                lambda name=name: self.run_job(name),
+                spec,
+                jitter=jitter,
+                run_immediately=initial_run,
+                on_finish=lambda: self.write_status("idle"),
+            )
+
+    def handle_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            print("Received SIGHUP, running all jobs now...")
+            self.scheduler.run_now()
+        else:
+            print(f"Received {signal.Signals(signum).name}, stopping after the current jobs...")
+            self.stop_event.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        signal.signal(signal.SIGINT, self.handle_signal)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.handle_signal)
+
+    def write_status(self, state):
+        with self.status_lock:
+            jobs = {}
+            for name, job in self.jobs.items():
+                next_run = self.scheduler.next_run(name)
+                jobs[name] = {
+                    "schedule": repr(job["schedule"]),
+                    "running": job["running"],
+                    "next_run": next_run.isoformat(timespec="seconds") if next_run else None,
+                    "last_run": job["last_run"].isoformat(timespec="seconds") if job["last_run"] else None,
+                    "last_result": job["last_result"],
+                    "last_duration_seconds": round(job["last_duration"], 2) if job["last_duration"] else None,
+                    "last_lock_wait_seconds": round(job["last_lock_wait"], 2) if job["last_lock_wait"] is not None else None,
+                    "runs": job["runs"],
+                    "failures": job["failures"],
+                    "coalesced": job["coalesced"],
+                }
+            running = [name for name, job in self.jobs.items() if job["running"]]
+            status = {
+                "pid": os.getpid(),
+                "state": "running" if running and state == "idle" else state,
+                "current_jobs": running,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "jobs": jobs,
+                "dead_letters": self.dead_letter_counts(),
+            }
+            directory = os.path.dirname(os.path.abspath(self.status_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp_path, self.status_file)
+
+    def dead_letter_counts(self):
+        try:
+            counts = dead_letter.DeadLetterQueue().counts()
+        except sqlite3.Error:
+            return None
+        return {name: counts[name] for name in self.job_names if name in counts}
+
+    def run_job(self, name):
+        job = self.jobs[name]
+        job["running"] = True
+        self.write_status("running")
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running {sync_jobs.JOBS[name]['description']}...")
+
+        result = sync_jobs.run_job(name)
+        job["running"] = False
+        job["last_lock_wait"] = result["lock_wait"]
+        if result["lock_wait"] >= 1:
+            print(f"Waited {result['lock_wait']:.1f}s for another {name} run to finish")
+        if result["coalesced"]:
+            job["coalesced"] += 1
+            print(f"{name}: another run started after this trigger, nothing to do")
+            return
+
+        if result["stdout"]:
+            print(result["stdout"], end="")
+        if not result["success"]:
+            print(f"{sync_jobs.JOBS[name]['script']} failed:")
+            print(result["stderr"], end="")
+
+        job["runs"] += 1
+        job["failures"] += 0 if result["success"] else 1
+        job["last_run"] = result["started_at"]
+        job["last_result"] = "success" if result["success"] else "failure"
+        job["last_duration"] = result["duration"]
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {name} finished in {result['duration']:.1f}s")
+
+    def run(self):
+        self.write_status("idle")
+        self.scheduler.start()
+        # Failed sink writes are retried in the background at their own pace
+        retrier = dead_letter.start_retrier(self.job_names)
+        # Waiting in short slices keeps the main thread responsive to signals on every platform
+        while not self.stop_event.wait(60):
+            pass
+        self.scheduler.stop(wait=True)
+        if retrier:
+            retrier.stop()
+        self.write_status("stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Limitless sync jobs headless, without a GUI")
+    parser.add_argument("--jobs", default=DEFAULT_JOBS, help=f"Comma-separated jobs to run ({', '.join(sync_jobs.JOBS)})")
+    parser.add_argument("--pid-file", default=DEFAULT_PID_FILE)
+    parser.add_argument("--status-file", default=DEFAULT_STATUS_FILE)
+    parser.add_argument("--no-initial-run", action="store_true", help="Wait one interval before the first run")
+    parser.add_argument("--schedule", action="append", default=[], metavar="JOB=SPEC",
+                        help='Override a job\'s schedule with an interval ("30m") or cron expression ("*/15 * * * *")')
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Poll more often while conversations are arriving and back off when idle (same as ADAPTIVE_POLLING=1)")
+    parser.add_argument("--jitter", type=float, default=0, help="Add up to this many random seconds to each run")
+    args = parser.parse_args()
+
+    job_names = [name.strip() for name in args.jobs.split(",") if name.strip()]
+    unknown = [name for name in job_names if name not in sync_jobs.JOBS]
+    if unknown or not job_names:
+        parser.error(f"Unknown or missing jobs: {', '.join(unknown) or '(none)'}")
+
+    if args.adaptive:
+        os.environ["ADAPTIVE_POLLING"] = "1"
+
+    schedules = {}
+    for item in args.schedule:
+        name, _, spec = item.partition("=")
+        if name not in job_names:
+            parser.error(f"--schedule for a job that is not running: {name}")
+        try:
+            schedules[name] = parse_spec(spec)
+        except ValueError as e:
+            parser.error(f"Invalid schedule for {name}: {e}")
+
+    try:
+        acquire_pid_file(args.pid_file)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    daemon = SyncDaemon(job_names, args.status_file, initial_run=not args.no_initial_run,
+                        schedules=schedules, jitter=args.jitter)
+    daemon.install_signal_handlers()
+
+    # Expose request metrics in Prometheus format if METRICS_PORT is set
+    metrics.start_http_server_from_env()
+
+    print(f"Sync daemon started (PID {os.getpid()}) with jobs: {', '.join(job_names)}")
+    try:
+        daemon.run()
+    finally:
+        release_pid_file(args.pid_file)
+        print("Sync daemon stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import metrics
+from _filelock import FileLock
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scheduler settings (ADAPTIVE_POLLING, METRICS_PORT, ...) can live in .env like the API keys
+load_dotenv()
+
+# Shared by all jobs when adaptive polling is on and LIMITLESS_ACTIVITY_FILE is not set
+DEFAULT_ACTIVITY_FILE = os.path.join(SCRIPT_DIR, ".activity.json")
+
+# Sync jobs shared by the GUI schedulers and the headless daemon
+# (min_interval/max_interval bound the interval when adaptive polling is on)
+JOBS = {
+    "notion": {
+        "script": "daily_notion_sync.py",
+        "interval": 15 * 60,
+        "min_interval": 2 * 60,
+        "max_interval": 60 * 60,
+        "description": "Limitless to Notion sync",
+    },
+    "mem": {
+        "script": "limitless_to_mem.py",
+        "interval": 60 * 60,
+        "min_interval": 5 * 60,
+        "max_interval": 2 * 60 * 60,
+        "description": "Limitless to Mem.ai sync",
+    },
+    "mem_smart": {
+        "script": "limitless_to_mem_smart.py",
+        "interval": 60 * 60,
+        "min_interval": 5 * 60,
+        "max_interval": 2 * 60 * 60,
+        "description": "Limitless to Mem.ai smart sync",
+    },
+}
+
+
+def adaptive_polling_enabled():
+    return os.getenv("ADAPTIVE_POLLING", "").lower() in ("1", "true", "yes")
+
+
+def schedule_for(name):
+    """
+    Schedule spec for a job: its fixed interval, or an AdaptivePoller when ADAPTIVE_POLLING is on
+
+    POLL_MIN_SECONDS and POLL_MAX_SECONDS override the job's floor and ceiling.
+    """
+    job = JOBS[name]
+    if not adaptive_polling_enabled():
+        return job["interval"]
+
+    import activity
+
+    # Sync scripts inherit this and record the lifelogs they fetch
+    os.environ.setdefault("LIMITLESS_ACTIVITY_FILE", DEFAULT_ACTIVITY_FILE)
+    return activity.AdaptivePoller(
+        floor=float(os.getenv("POLL_MIN_SECONDS") or job["min_interval"]),
+        ceiling=float(os.getenv("POLL_MAX_SECONDS") or job["max_interval"]),
+        initial=job["interval"],
+    )
+
+
+def lock_path(name):
+    return os.path.join(SCRIPT_DIR, f".sync_{name}.lock")
+
+
+def state_path(name):
+    return os.path.join(SCRIPT_DIR, f".sync_{name}.state.json")
+
+
+def _read_state(name):
+    try:
+        with open(state_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(name, state):
+    tmp_path = f"{state_path(name)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path(name))
+
+
+def run_job(name, triggered_at=None):
+    """
+    Run a sync job's script as a subprocess and collect its metrics
+
+    Only one run of a job happens at a time across all processes (GUI schedulers, the daemon,
+    manual runs). A caller that finds the job running waits for the lock; if a run started
+    after its trigger time in the meantime, that run already covers the trigger and the call
+    returns without running again, so a burst of triggers becomes a single follow-up run.
+
+    Returns a dict with "success", "coalesced", "started_at", "lock_wait", "duration",
+    "stdout" and "stderr".
+    """
+    job = JOBS[name]
+    sync_script_path = os.path.join(SCRIPT_DIR, job["script"])
+    triggered_at = time.time() if triggered_at is None else triggered_at
+
+    waiting = time.perf_counter()
+    with FileLock(lock_path(name)):
+        lock_wait = time.perf_counter() - waiting
+        metrics.observe("sync_lock_wait_seconds", lock_wait, buckets=metrics.RUN_BUCKETS, job=name)
+
+        if _read_state(name).get("last_started", 0) >= triggered_at:
+            metrics.inc("sync_runs_total", job=name, result="coalesced")
+            return {
+                "success": True,
+                "coalesced": True,
+                "started_at": datetime.now(),
+                "lock_wait": lock_wait,
+                "duration": 0.0,
+                "stdout": "",
+                "stderr": "",
+            }
+
+        _write_state(name, {"last_started": time.time(), "pid": os.getpid()})
+        return _run_locked(name, job, sync_script_path, lock_wait)
+
+
+def _run_locked(name, job, sync_script_path, lock_wait):
+    # The child process reports its request metrics to this file when it exits
+    metrics_file = os.path.join(SCRIPT_DIR, f".metrics_{name}_{os.getpid()}.json")
+    started_at = datetime.now()
+    started = time.perf_counter()
+
+    try:
+        result = subprocess.run(
+            [sys.executable, sync_script_path],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=metrics.child_env(metrics_file)
+        )
+        success, stdout, stderr = True, result.stdout, result.stderr
+    except subprocess.CalledProcessError as e:
+        success, stdout, stderr = False, e.stdout, e.stderr
+
+    duration = time.perf_counter() - started
+    metrics.inc("sync_runs_total", job=name, result="success" if success else "failure")
+    metrics.observe("sync_run_duration_seconds", duration, buckets=metrics.RUN_BUCKETS, job=name)
+    metrics.collect_child(metrics_file)
+    metrics.write_snapshot(metrics.snapshot_path(name))
+
+    state = _read_state(name)
+    state.update({
+        "last_finished": time.time(),
+        "last_result": "success" if success else "failure",
+        "last_duration": duration,
+        "last_lock_wait": lock_wait,
+    })
+    _write_state(name, state)
+
+    return {
+        "success": success,
+        "coalesced": False,
+        "started_at": started_at,
+        "lock_wait": lock_wait,
+        "duration": duration,
+        "stdout": stdout,
+        "stderr": stderr,
+    }
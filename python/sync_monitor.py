@@ -1,21 +1,34 @@
+import argparse
 import os
 import json
-import requests
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
+from contextlib import nullcontext, redirect_stdout
 from datetime import datetime, timedelta
-import tkinter as tk
-from tkinter import ttk, messagebox
 import threading
+import queue
 import time
 from dotenv import load_dotenv
 from _client import get_lifelogs
+import metrics
 
 # Load environment variables from .env file
 load_dotenv()
 
+# tkinter and matplotlib are slow to import and only needed by the GUI,
+# so they are loaded on first use instead of at module load
+tk = ttk = messagebox = None
+
+def load_gui_modules():
+    """Import tkinter on first use by a GUI code path"""
+    global tk, ttk, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as tkinter_ttk, messagebox as tkinter_messagebox
+        tk, ttk, messagebox = tkinter, tkinter_ttk, tkinter_messagebox
+
 class ConfigurationDialog:
     def __init__(self, parent=None):
+        load_gui_modules()
         self.result = None
         self.setup_dialog(parent)
     
@@ -235,35 +248,31 @@ class SyncMonitor:
             else:
                 self.sync_data[file] = {"last_processed": None, "count": 0}
     
+    def get_daily_dates(self, days_back=30):
+        """Get the date strings covered by the daily imports chart, oldest first"""
+        end_date = datetime.now()
+        return [
+            (end_date - timedelta(days=offset)).strftime('%Y-%m-%d')
+            for offset in range(days_back, -1, -1)
+        ]
+    
+    def get_daily_count(self, date_str):
+        """Get the number of lifelogs imported on a single day"""
+        try:
+            lifelogs = get_lifelogs(
+                api_key=self.api_key,
+                date=date_str,
+                limit=100,
+                direction="desc"
+            )
+            return len(lifelogs)
+        except Exception as e:
+            print(f"Error fetching data for {date_str}: {e}")
+            return 0
+    
     def get_daily_imports(self, days_back=30):
         """Get daily import counts from Limitless API"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
-        
-        daily_counts = {}
-        
-        # Get data for each day
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            try:
-                lifelogs = get_lifelogs(
-                    api_key=self.api_key,
-                    date=date_str,
-                    limit=100,
-                    direction="desc"
-                )
-                
-                daily_counts[date_str] = len(lifelogs)
-                
-            except Exception as e:
-                print(f"Error fetching data for {date_str}: {e}")
-                daily_counts[date_str] = 0
-            
-            current_date += timedelta(days=1)
-        
-        return daily_counts
+        return {date_str: self.get_daily_count(date_str) for date_str in self.get_daily_dates(days_back)}
     
     def get_sync_status(self):
         """Get current sync status for all integrations"""
@@ -316,8 +325,30 @@ class SyncMonitor:
         
         return status
     
+    def get_talk_stats(self, days_back=7):
+        """Get talk time per speaker, your share of speech, overlap and silence for recent days"""
+        # NumPy is only needed here, so it is imported on first use like the GUI modules
+        import talk_analytics
+        
+        end_date = datetime.now().date()
+        try:
+            return talk_analytics.analyze(end_date - timedelta(days=days_back - 1), end_date)
+        except Exception as e:
+            print(f"Error computing talk stats: {e}")
+            return None
+    
+    def get_request_metrics(self):
+        """Get per-API request metrics from the schedulers' snapshots and this process"""
+        data = metrics.load_snapshots()
+        own = metrics.snapshot()
+        data["counters"].extend(own["counters"])
+        data["histograms"].extend(own["histograms"])
+        return metrics.summarize(data)
+    
     def create_sync_chart(self):
         """Create a comprehensive sync monitoring chart"""
+        import matplotlib.pyplot as plt
+        
         daily_imports = self.get_daily_imports(30)
         sync_status = self.get_sync_status()
         
@@ -377,9 +408,225 @@ class SyncMonitor:
         
         return daily_imports, sync_status
 
+class SyncDataEngine:
+    """
+    Background worker that keeps a cached daily-import time series and sync status
+    
+    The GUI asks for a refresh and receives only what changed through `updates`, so
+    no API call or file read ever runs on the Tk main loop. Past days are fetched
+    once and kept; only today and yesterday are re-fetched on later refreshes.
+    """
+    def __init__(self, monitor, days_back=30):
+        self.monitor = monitor
+        self.days_back = days_back
+        self.updates = queue.Queue()
+        self.busy = False
+        self.lock = threading.Lock()
+        self.daily_counts = {}
+        self.version = 0
+        # (day, daily counts version) the talk stats were last computed for
+        self._talk_key = None
+        self._refresh = threading.Event()
+        self._include_history = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def request_refresh(self, include_history=False):
+        """Ask the worker for a refresh; the daily series is only loaded once something needs it"""
+        if include_history:
+            self._include_history = True
+        self.busy = True
+        self._refresh.set()
+    
+    def get_daily_counts(self):
+        """Return a copy of the cached daily series, oldest first"""
+        with self.lock:
+            return dict(sorted(self.daily_counts.items()))
+    
+    def _run(self):
+        while True:
+            # Sleep until a refresh is requested, no polling
+            self._refresh.wait()
+            self._refresh.clear()
+            include_history = self._include_history
+            self._include_history = False
+            try:
+                self._refresh_status()
+                if include_history or self.daily_counts:
+                    self._refresh_daily_counts()
+                    self._refresh_talk_stats()
+            except Exception as e:
+                print(f"Error refreshing sync data: {e}")
+            finally:
+                self.busy = self._refresh.is_set()
+                self.updates.put(("idle", None))
+    
+    def _refresh_status(self):
+        self.monitor.load_sync_history()
+        self.updates.put(("status", (self.monitor.get_sync_status(), self.monitor.get_request_metrics())))
+    
+    def _refresh_daily_counts(self):
+        dates = self.monitor.get_daily_dates(self.days_back)
+        recent = set(dates[-2:])
+        
+        # Drop days that rolled out of the window
+        with self.lock:
+            removed = [date_str for date_str in self.daily_counts if date_str not in dates]
+            for date_str in removed:
+                del self.daily_counts[date_str]
+        if removed:
+            self.updates.put(("daily", {"dates": dates, "changes": {}}))
+        
+        # Newest first so the bars that matter most fill in first
+        for date_str in reversed(dates):
+            if date_str in self.daily_counts and date_str not in recent:
+                continue
+            count = self.monitor.get_daily_count(date_str)
+            with self.lock:
+                if self.daily_counts.get(date_str) == count:
+                    continue
+                self.daily_counts[date_str] = count
+                self.version += 1
+            self.updates.put(("daily", {"dates": dates, "changes": {date_str: count}}))
+    
+    def _refresh_talk_stats(self):
+        # Talk stats only change when lifelogs arrive, which shows up as a changed daily
+        # count, or when the day rolls over; other refreshes reuse the last result
+        with self.lock:
+            key = (datetime.now().date(), self.version)
+        if key == self._talk_key:
+            return
+        talk_stats = self.monitor.get_talk_stats()
+        if talk_stats:
+            self._talk_key = key
+            self.updates.put(("talk", talk_stats))
+
+class SyncChartWindow:
+    """
+    Sync chart embedded in a Tk window that updates only the bars that changed
+    
+    The figure is kept while the window is hidden, so reopening it with unchanged
+    data shows the cached rendering instead of drawing again.
+    """
+    def __init__(self, parent):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Limitless Sync Chart")
+        self.window.geometry("1100x750")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+        
+        self.figure = Figure(figsize=(14, 10))
+        self.ax_daily, self.ax_status = self.figure.subplots(2, 1)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        self.dates = []
+        self.counts = {}
+        self.daily_bars = {}
+        self.average_line = None
+        self.services = []
+        self.status_bars = []
+        self.status_texts = []
+        self.dirty = False
+    
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+    
+    def hide(self):
+        self.window.withdraw()
+    
+    def _rebuild_daily(self):
+        ax = self.ax_daily
+        ax.clear()
+        heights = [self.counts.get(date_str, 0) for date_str in self.dates]
+        bars = ax.bar(self.dates, heights, color='skyblue', alpha=0.7)
+        self.daily_bars = dict(zip(self.dates, bars))
+        ax.set_title('Daily Limitless Imports (Last 30 Days)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Number of Imports')
+        ax.tick_params(axis='x', rotation=45)
+        self.average_line = ax.axhline(y=0, color='red', linestyle='--', alpha=0.7)
+        self._update_average()
+    
+    def _update_average(self):
+        loaded = [self.counts[date_str] for date_str in self.dates if date_str in self.counts]
+        avg_count = sum(loaded) / len(loaded) if loaded else 0
+        self.average_line.set_ydata([avg_count, avg_count])
+        self.average_line.set_label(f'Average: {avg_count:.1f}')
+        self.ax_daily.legend(loc="upper left")
+        self.ax_daily.set_ylim(0, max(loaded + [1]) * 1.15)
+    
+    def apply_daily(self, dates, changes):
+        """Apply a delta from the data engine"""
+        self.counts.update(changes)
+        if dates != self.dates:
+            # The 30-day window moved, the x axis has to be rebuilt
+            self.dates = list(dates)
+            self.counts = {date_str: count for date_str, count in self.counts.items() if date_str in dates}
+            self._rebuild_daily()
+        else:
+            for date_str, count in changes.items():
+                self.daily_bars[date_str].set_height(count)
+            self._update_average()
+        self.dirty = True
+    
+    def apply_status(self, sync_status):
+        services = list(sync_status.keys())
+        hours_ago = []
+        colors = []
+        for service in services:
+            hours = sync_status[service]["hours_ago"]
+            if hours == "N/A":
+                hours_ago.append(0)
+                colors.append('gray')
+            else:
+                hours_ago.append(hours)
+                colors.append('green' if hours < 24 else 'orange' if hours < 48 else 'red')
+        
+        ax = self.ax_status
+        if services != self.services:
+            ax.clear()
+            self.services = services
+            self.status_bars = list(ax.bar(services, hours_ago, color=colors, alpha=0.7))
+            ax.set_title('Sync Status - Hours Since Last Sync', fontsize=14, fontweight='bold')
+            ax.set_ylabel('Hours Ago')
+            self.status_texts = [
+                ax.text(bar.get_x() + bar.get_width()/2, 0, '', ha='center', va='bottom', fontweight='bold')
+                for bar in self.status_bars
+            ]
+        
+        changed = False
+        for bar, text, hours, color in zip(self.status_bars, self.status_texts, hours_ago, colors):
+            label = f'{hours}h' if hours > 0 else ''
+            if bar.get_height() != hours or text.get_text() != label:
+                bar.set_height(hours)
+                bar.set_color(color)
+                text.set_text(label)
+                text.set_y(hours + 0.5)
+                changed = True
+        if changed:
+            ax.set_ylim(0, max(hours_ago) * 1.2 if any(hours_ago) else 24)
+            self.dirty = True
+    
+    def flush(self):
+        """Redraw once if anything changed since the last draw"""
+        if self.dirty:
+            self.figure.tight_layout()
+            self.canvas.draw_idle()
+            self.dirty = False
+
 class SyncMonitorGUI:
     def __init__(self):
+        load_gui_modules()
         self.monitor = SyncMonitor()
+        self.engine = SyncDataEngine(self.monitor)
+        self.chart_window = None
+        self.polling = False
+        self.last_status = None
+        self.talk_stats = None
         self.setup_gui()
         
     def setup_gui(self):
@@ -401,11 +648,11 @@ class SyncMonitorGUI:
         title_label.pack(pady=(0, 20))
         
         # Status frame
-        status_frame = ttk.LabelFrame(main_frame, text="Current Sync Status", padding="10")
-        status_frame.pack(fill=tk.X, pady=(0, 20))
+        self.status_frame = ttk.LabelFrame(main_frame, text="Current Sync Status", padding="10")
+        self.status_frame.pack(fill=tk.X, pady=(0, 20))
         
         self.status_labels = {}
-        self.update_status_display(status_frame)
+        ttk.Label(self.status_frame, text="Loading...").grid(row=0, column=0, sticky=tk.W)
         
         # Buttons frame
         button_frame = ttk.Frame(main_frame)
@@ -447,7 +694,8 @@ class SyncMonitorGUI:
         
         # Start auto-refresh if enabled
         self.auto_refresh_enabled = False
-        self.update_summary()
+        self.auto_refresh_job = None
+        self.refresh_status()
         
     def open_configuration(self):
         """Open the configuration dialog"""
@@ -458,46 +706,50 @@ class SyncMonitorGUI:
             # Reload the monitor with new configuration
             load_dotenv(override=True)
             self.monitor = SyncMonitor()
+            self.engine.monitor = self.monitor
             self.refresh_status()
             messagebox.showinfo("Success", "Configuration updated! The monitor has been refreshed with your new settings.")
         
-    def update_status_display(self, parent):
+    def update_status_display(self, parent, sync_status):
         """Update the status display in the GUI"""
-        # Clear existing labels
-        for widget in parent.winfo_children():
-            widget.destroy()
-        
-        sync_status = self.monitor.get_sync_status()
-        
-        for i, (service, info) in enumerate(sync_status.items()):
-            # Service name
-            service_label = ttk.Label(parent, text=f"{service}:", font=("Arial", 10, "bold"))
-            service_label.grid(row=i, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+        # Only rebuild the rows when the set of services changed, otherwise update labels in place
+        if list(sync_status.keys()) != list(self.status_labels.keys()):
+            for widget in parent.winfo_children():
+                widget.destroy()
+            self.status_labels = {}
             
-            # Status with color
+            for i, service in enumerate(sync_status):
+                # Service name
+                service_label = ttk.Label(parent, text=f"{service}:", font=("Arial", 10, "bold"))
+                service_label.grid(row=i, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+                
+                # Status with color
+                status_label = ttk.Label(parent)
+                status_label.grid(row=i, column=1, sticky=tk.W, padx=(0, 20), pady=2)
+                
+                # Last sync time
+                time_label = ttk.Label(parent)
+                time_label.grid(row=i, column=2, sticky=tk.W, padx=(0, 20), pady=2)
+                
+                # Count
+                count_label = ttk.Label(parent)
+                count_label.grid(row=i, column=3, sticky=tk.W, pady=2)
+                
+                self.status_labels[service] = {
+                    "status": status_label,
+                    "time": time_label,
+                    "count": count_label
+                }
+        
+        for service, info in sync_status.items():
+            labels = self.status_labels[service]
             status_color = "green" if info["status"] == "Up to date" else "orange" if info["status"] == "Behind" else "gray"
-            status_label = ttk.Label(parent, text=info["status"], foreground=status_color)
-            status_label.grid(row=i, column=1, sticky=tk.W, padx=(0, 20), pady=2)
-            
-            # Last sync time
-            time_label = ttk.Label(parent, text=f"Last: {info['last_sync']}")
-            time_label.grid(row=i, column=2, sticky=tk.W, padx=(0, 20), pady=2)
-            
-            # Count
-            count_label = ttk.Label(parent, text=f"Count: {info['count']}")
-            count_label.grid(row=i, column=3, sticky=tk.W, pady=2)
-            
-            self.status_labels[service] = {
-                "status": status_label,
-                "time": time_label,
-                "count": count_label
-            }
+            labels["status"].config(text=info["status"], foreground=status_color)
+            labels["time"].config(text=f"Last: {info['last_sync']}")
+            labels["count"].config(text=f"Count: {info['count']}")
     
-    def update_summary(self):
+    def update_summary(self, sync_status, request_metrics):
         """Update the summary text"""
-        self.monitor.load_sync_history()  # Reload data
-        sync_status = self.monitor.get_sync_status()
-        
         summary = "Sync Status Summary:\n\n"
         
         total_synced = 0
@@ -514,6 +766,30 @@ class SyncMonitorGUI:
             if info['status'] == "Up to date":
                 up_to_date_count += 1
         
+        if request_metrics:
+            summary += "🌐 API Requests:\n"
+            for api, info in sorted(request_metrics.items()):
+                latency = info["latency"] or {}
+                percentiles = " / ".join(
+                    f"{latency[p] * 1000:.0f}ms" if latency.get(p) is not None else "-"
+                    for p in ("p50", "p95", "p99")
+                )
+                summary += f"   {api}: {info['requests']} requests, {info['errors']} errors, {info['retries']} retries, "
+                summary += f"{info['bytes'] / 1e6:.1f} MB, p50/p95/p99 {percentiles}\n"
+            summary += "\n"
+        
+        if self.talk_stats:
+            total = self.talk_stats["total"]
+            share = f"{total['user_share'] * 100:.0f}%" if total["user_share"] is not None else "-"
+            summary += f"🗣️ Talk Time (last {len(self.talk_stats['days'])} days):\n"
+            summary += f"   Conversations: {total['conversations']}, {total['conversation_seconds'] / 3600:.1f} h recorded\n"
+            summary += f"   Speech: {total['speech_seconds'] / 3600:.1f} h, silence: {total['silence_seconds'] / 3600:.1f} h, "
+            summary += f"overlap: {total['overlap_seconds'] / 60:.0f} min\n"
+            summary += f"   Your share of speech: {share}\n"
+            for name, seconds in list(total["speakers"].items())[:5]:
+                summary += f"   {name}: {seconds / 3600:.1f} h\n"
+            summary += "\n"
+        
         summary += f"📈 Overall:\n"
         summary += f"   Total Items Synced: {total_synced}\n"
         summary += f"   Services Up to Date: {up_to_date_count}/{len(sync_status)}\n"
@@ -521,27 +797,57 @@ class SyncMonitorGUI:
         
         self.summary_text.delete(1.0, tk.END)
         self.summary_text.insert(1.0, summary)
-        
-        # Schedule next update if auto-refresh is enabled
-        if self.auto_refresh_enabled:
-            self.root.after(30000, self.update_summary)  # 30 seconds
+    
+    def process_updates(self):
+        """Apply deltas from the data engine; keeps polling only while the engine is working"""
+        while True:
+            try:
+                kind, payload = self.engine.updates.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "status":
+                sync_status, request_metrics = payload
+                self.last_status = payload
+                self.update_status_display(self.status_frame, sync_status)
+                self.update_summary(sync_status, request_metrics)
+                if self.chart_window:
+                    self.chart_window.apply_status(sync_status)
+            elif kind == "talk":
+                self.talk_stats = payload
+                if self.last_status:
+                    self.update_summary(*self.last_status)
+            elif kind == "daily" and self.chart_window:
+                self.chart_window.apply_daily(payload["dates"], payload["changes"])
+            elif kind == "idle":
+                self.chart_button.config(text="Generate Sync Chart", state='normal')
+        
+        if self.chart_window:
+            self.chart_window.flush()
+        
+        if self.engine.busy or not self.engine.updates.empty():
+            self.root.after(200, self.process_updates)
+        else:
+            self.polling = False
+    
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(200, self.process_updates)
     
     def generate_chart(self):
-        """Generate and display the sync chart"""
+        """Show the sync chart, filling it in as the data engine delivers days"""
         try:
-            self.chart_button.config(state='disabled')
-            self.chart_button.config(text="Generating...")
-            
-            # Run chart generation in a separate thread
-            def generate():
-                try:
-                    daily_imports, sync_status = self.monitor.create_sync_chart()
-                    self.root.after(0, lambda: self.chart_button.config(text="Generate Sync Chart", state='normal'))
-                except Exception as e:
-                    print(f"Error generating chart: {e}")
-                    self.root.after(0, lambda: self.chart_button.config(text="Generate Sync Chart", state='normal'))
+            if self.chart_window is None:
+                self.chart_window = SyncChartWindow(self.root)
+                # Seed the chart with whatever the engine already has cached
+                daily_counts = self.engine.get_daily_counts()
+                self.chart_window.apply_daily(self.monitor.get_daily_dates(self.engine.days_back), daily_counts)
+            self.chart_window.show()
             
-            threading.Thread(target=generate, daemon=True).start()
+            self.chart_button.config(text="Loading...", state='disabled')
+            self.engine.request_refresh(include_history=True)
+            self.start_polling()
             
         except Exception as e:
             print(f"Error: {e}")
@@ -549,34 +855,91 @@ class SyncMonitorGUI:
     
     def refresh_status(self):
         """Refresh the status display"""
-        self.update_summary()
-        
-        # Update status display
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.LabelFrame) and "Current Sync Status" in child.cget("text"):
-                        self.update_status_display(child)
-                        break
+        self.engine.request_refresh()
+        self.start_polling()
+    
+    def auto_refresh(self):
+        self.auto_refresh_job = None
+        if self.auto_refresh_enabled:
+            self.refresh_status()
+            self.auto_refresh_job = self.root.after(30000, self.auto_refresh)  # 30 seconds
     
     def toggle_auto_refresh(self):
         """Toggle auto-refresh functionality"""
         self.auto_refresh_enabled = self.auto_refresh_var.get()
+        if self.auto_refresh_job:
+            self.root.after_cancel(self.auto_refresh_job)
+            self.auto_refresh_job = None
         if self.auto_refresh_enabled:
-            self.update_summary()
+            self.auto_refresh()
     
     def run(self):
         """Start the GUI"""
         self.root.mainloop()
 
+def get_headless_report(days_back=7):
+    """Collect sync status, request metrics and daily counts without any GUI"""
+    monitor = SyncMonitor()
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "sync_status": monitor.get_sync_status(),
+        "request_metrics": monitor.get_request_metrics(),
+        "daily_imports": {},
+        "talk_stats": None,
+    }
+    if days_back > 0 and monitor.api_key:
+        # get_daily_imports counts back from today, so days_back - 1 gives the same days as the talk stats
+        report["daily_imports"] = monitor.get_daily_imports(days_back - 1)
+        report["talk_stats"] = monitor.get_talk_stats(days_back)
+    return report
+
+def print_headless_report(report):
+    """Print a headless report as plain text"""
+    for service, info in report["sync_status"].items():
+        print(f"{service:<14} {info['status']:<15} last: {info['last_sync']:<17} count: {info['count']}")
+    
+    for api, info in sorted(report["request_metrics"].items()):
+        latency = info["latency"] or {}
+        p95 = f"{latency['p95'] * 1000:.0f}ms" if latency.get("p95") is not None else "-"
+        print(f"{api:<14} {info['requests']} requests, {info['errors']} errors, p95 {p95}")
+    
+    if report["daily_imports"]:
+        print("\nDaily imports:")
+        for date_str, count in report["daily_imports"].items():
+            print(f"  {date_str}  {count:>4}  {'#' * min(count, 60)}")
+    
+    if report["talk_stats"]:
+        import talk_analytics
+        
+        print("\nTalk time:")
+        talk_analytics.print_stats(report["talk_stats"])
+
 def main():
     """Main function to run the sync monitor"""
+    parser = argparse.ArgumentParser(description="Monitor Limitless sync status")
+    parser.add_argument("--status", action="store_true", help="Print sync status and exit (no GUI)")
+    parser.add_argument("--json", action="store_true", help="Print sync status as JSON and exit (no GUI)")
+    parser.add_argument("--days", type=int, default=7,
+                        help="Days of daily import counts and talk stats for --status/--json (0 to skip API calls)")
+    args = parser.parse_args()
+    
+    if args.status or args.json:
+        # With --json, stdout carries only the JSON; fetch progress and errors go to stderr
+        with redirect_stdout(sys.stderr) if args.json else nullcontext():
+            report = get_headless_report(args.days)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_headless_report(report)
+        return
+    
     print("Starting Limitless Sync Monitor...")
     print("This will show you sync status and generate charts of your imports")
     
     # Check if configuration is complete
     if not check_configuration():
         print("No valid configuration found. Opening setup dialog...")
+        load_gui_modules()
         
         # Create a temporary root window for the configuration dialog
         temp_root = tk.Tk()
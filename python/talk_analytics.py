@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext, redirect_stdout
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import tzlocal
+from dotenv import load_dotenv
+
+import metrics
+from archive import to_epoch_ms
+
+# Load environment variables
+load_dotenv()
+
+
+def _walk(nodes):
+    for node in nodes or []:
+        yield node
+        yield from _walk(node.get("children"))
+
+
+class TalkIntervals:
+    """
+    Every spoken line of a set of lifelogs as parallel NumPy arrays
+
+    `start`/`end` are absolute epoch milliseconds (lifelog startTime plus the node's
+    startOffsetMs/endOffsetMs), `speaker` indexes into `speakers`, and `user` marks lines
+    the API attributed to the device owner (speakerIdentifier "user"). Conversations
+    (whole lifelogs) are kept in `conversation_start`/`conversation_end`.
+    """
+    def __init__(self, start, end, speaker, user, speakers, conversation_start, conversation_end):
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.user = user
+        self.speakers = speakers
+        self.conversation_start = conversation_start
+        self.conversation_end = conversation_end
+
+    def __len__(self):
+        return len(self.start)
+
+
+def load_intervals(lifelogs):
+    """
+    Collect the blockquote intervals of `lifelogs` into a TalkIntervals
+    """
+    starts, ends, speakers, users = [], [], [], []
+    conversation_starts, conversation_ends = [], []
+    codes = {}
+    for lifelog in lifelogs:
+        base = to_epoch_ms(lifelog.get("startTime"))
+        if base is None:
+            continue
+        conversation_starts.append(base)
+        conversation_ends.append(to_epoch_ms(lifelog.get("endTime")) or base)
+        for node in _walk(lifelog.get("contents")):
+            if node.get("type") != "blockquote":
+                continue
+            start, end = node.get("startOffsetMs"), node.get("endOffsetMs")
+            if start is None or end is None or end <= start:
+                continue
+            starts.append(base + start)
+            ends.append(base + end)
+            speakers.append(codes.setdefault(node.get("speakerName") or "Unknown", len(codes)))
+            users.append(node.get("speakerIdentifier") == "user")
+
+    return TalkIntervals(
+        np.array(starts, dtype=np.int64),
+        np.array(ends, dtype=np.int64),
+        np.array(speakers, dtype=np.int32),
+        np.array(users, dtype=bool),
+        list(codes),
+        np.array(conversation_starts, dtype=np.int64),
+        np.array(conversation_ends, dtype=np.int64),
+    )
+
+
+def day_edges(first_day, last_day, timezone):
+    """
+    Epoch milliseconds of local midnight for every day from first_day to the day after last_day
+    """
+    tz = ZoneInfo(timezone)
+    days = (last_day - first_day).days + 2
+    return np.array([
+        int(datetime.combine(first_day + timedelta(days=i), datetime.min.time(), tz).timestamp() * 1000)
+        for i in range(days)
+    ], dtype=np.int64)
+
+
+def _day_index(times, edges):
+    # -1 before the first day, len(edges) - 1 after the last
+    return np.searchsorted(edges, times, side="right") - 1
+
+
+def _sweep(intervals, edges):
+    """
+    Speech time (any speaker) and overlap time (two or more at once) per day, in ms
+
+    All line starts and ends are sorted into one event stream; a running sum of +1/-1
+    gives how many people are talking between consecutive events.
+    """
+    days = len(edges) - 1
+    if not len(intervals):
+        return np.zeros(days), np.zeros(days)
+    times = np.concatenate([intervals.start, intervals.end])
+    deltas = np.concatenate([np.ones(len(intervals), np.int32), -np.ones(len(intervals), np.int32)])
+    # Ends sort before starts at the same instant, so back-to-back lines don't count as overlap
+    order = np.lexsort((deltas, times))
+    times = times[order]
+    active = np.cumsum(deltas[order])[:-1]
+    lengths = np.diff(times)
+    day = _day_index(times[:-1], edges)
+    inside = (day >= 0) & (day < days)
+    speech = np.bincount(day[inside], weights=(lengths * (active >= 1))[inside], minlength=days)
+    overlap = np.bincount(day[inside], weights=(lengths * (active >= 2))[inside], minlength=days)
+    return speech, overlap
+
+
+def talk_stats(intervals, first_day, last_day, timezone):
+    """
+    Per-day and total talk statistics for first_day..last_day (inclusive) in `timezone`
+
+    Returns {"days": [...], "total": {...}}. Each entry has conversations, conversation,
+    speech, silence, overlap and user seconds, the user's share of speech and seconds per
+    speaker. Lines and conversations are counted on the day they started.
+    """
+    edges = day_edges(first_day, last_day, timezone)
+    days = len(edges) - 1
+    speaker_count = len(intervals.speakers)
+
+    durations = (intervals.end - intervals.start).astype(np.float64)
+    day = _day_index(intervals.start, edges)
+    inside = (day >= 0) & (day < days)
+    per_speaker = np.bincount(
+        day[inside] * speaker_count + intervals.speaker[inside],
+        weights=durations[inside],
+        minlength=days * speaker_count,
+    ).reshape(days, speaker_count)
+    user = np.bincount(day[inside], weights=(durations * intervals.user)[inside], minlength=days)
+
+    conversation_day = _day_index(intervals.conversation_start, edges)
+    conversation_inside = (conversation_day >= 0) & (conversation_day < days)
+    conversations = np.bincount(conversation_day[conversation_inside], minlength=days)
+    conversation_ms = np.bincount(
+        conversation_day[conversation_inside],
+        weights=(intervals.conversation_end - intervals.conversation_start)[conversation_inside].astype(np.float64),
+        minlength=days,
+    )
+
+    speech, overlap = _sweep(intervals, edges)
+    silence = np.maximum(conversation_ms - speech, 0)
+
+    def entry(conversations, conversation_ms, speech, silence, overlap, user, speaker_ms):
+        talk = speaker_ms.sum()
+        return {
+            "conversations": int(conversations),
+            "conversation_seconds": round(float(conversation_ms) / 1000, 1),
+            "speech_seconds": round(float(speech) / 1000, 1),
+            "silence_seconds": round(float(silence) / 1000, 1),
+            "overlap_seconds": round(float(overlap) / 1000, 1),
+            "user_seconds": round(float(user) / 1000, 1),
+            "user_share": round(float(user / talk), 3) if talk else None,
+            "speakers": {
+                intervals.speakers[i]: round(float(speaker_ms[i]) / 1000, 1)
+                for i in np.argsort(-speaker_ms) if speaker_ms[i] > 0
+            },
+        }
+
+    return {
+        "days": [
+            dict(date=(first_day + timedelta(days=i)).isoformat(), **entry(
+                conversations[i], conversation_ms[i], speech[i], silence[i], overlap[i], user[i], per_speaker[i]))
+            for i in range(days)
+        ],
+        "total": entry(conversations.sum(), conversation_ms.sum(), speech.sum(), silence.sum(), overlap.sum(),
+                       user.sum(), per_speaker.sum(axis=0)),
+    }
+
+
+def archived_days(timezone):
+    """
+    First and last day (in `timezone`) the local archive holds completely, or None
+
+    The archive is filled by whole days from its oldest lifelog on, but the day of its
+    newest lifelog may still be growing, so that day is not counted.
+    """
+    import archive
+
+    if not os.path.exists(os.path.join(archive.DEFAULT_DIR, "lifelogs.dat")):
+        return None
+    stats = archive.LifelogArchive().stats()
+    if not stats["first"]:
+        return None
+    tz = ZoneInfo(timezone)
+    first = datetime.fromisoformat(stats["first"]).astimezone(tz).date()
+    last = datetime.fromisoformat(stats["last"]).astimezone(tz).date() - timedelta(days=1)
+    return (first, last) if first <= last else None
+
+
+def load_lifelogs(first_day, last_day, timezone, source="auto"):
+    """
+    Lifelogs for first_day..last_day from the local archive or the API
+
+    "auto" reads the days the archive (archive.py) holds completely from it and the
+    rest of the range from the API.
+    """
+    import archive
+
+    if source == "auto":
+        covered = archived_days(timezone)
+        first = max(first_day, covered[0]) if covered else None
+        last = min(last_day, covered[1]) if covered else None
+        if not covered or first > last:
+            return load_lifelogs(first_day, last_day, timezone, "api")
+        lifelogs = []
+        if first_day < first:
+            lifelogs.extend(load_lifelogs(first_day, first - timedelta(days=1), timezone, "api"))
+        lifelogs.extend(load_lifelogs(first, last, timezone, "archive"))
+        if last < last_day:
+            lifelogs.extend(load_lifelogs(last + timedelta(days=1), last_day, timezone, "api"))
+        return lifelogs
+    edges = day_edges(first_day, last_day, timezone)
+    if source == "archive":
+        start = datetime.fromtimestamp(edges[0] / 1000, ZoneInfo("UTC"))
+        end = datetime.fromtimestamp(edges[-1] / 1000, ZoneInfo("UTC"))
+        return list(archive.LifelogArchive().range(start, end))
+
+    from _client import get_lifelogs
+
+    lifelogs = []
+    for i in range(len(edges) - 1):
+        lifelogs.extend(get_lifelogs(
+            api_key=os.getenv("LIMITLESS_API_KEY"),
+            date=(first_day + timedelta(days=i)).isoformat(),
+            timezone=timezone,
+            limit=None,
+            includeMarkdown=False,
+        ))
+    return lifelogs
+
+
+def analyze(first_day, last_day, timezone=None, source="auto"):
+    """
+    Load first_day..last_day and compute talk_stats for it
+    """
+    timezone = timezone or str(tzlocal.get_localzone())
+    lifelogs = load_lifelogs(first_day, last_day, timezone, source)
+    started = time.perf_counter()
+    stats = talk_stats(load_intervals(lifelogs), first_day, last_day, timezone)
+    metrics.observe("talk_analytics_seconds", time.perf_counter() - started)
+    return stats
+
+
+def format_duration(seconds):
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}h{minutes % 60:02d}m"
+
+
+def print_stats(stats, top_speakers=3):
+    print(f"{'Date':<11} {'Conv':>4} {'Recorded':>9} {'Speech':>8} {'Silence':>8} {'Overlap':>8} {'You':>5}  Top speakers")
+    for day in stats["days"] + [dict(stats["total"], date="Total")]:
+        share = f"{day['user_share'] * 100:.0f}%" if day["user_share"] is not None else "-"
+        speakers = ", ".join(f"{name} {format_duration(seconds)}" for name, seconds in list(day["speakers"].items())[:top_speakers])
+        print(f"{day['date']:<11} {day['conversations']:>4} {format_duration(day['conversation_seconds']):>9} "
+              f"{format_duration(day['speech_seconds']):>8} {format_duration(day['silence_seconds']):>8} "
+              f"{format_duration(day['overlap_seconds']):>8} {share:>5}  {speakers}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talk time per speaker, your share of speech, overlap and silence")
+    parser.add_argument("--start", help="First day (YYYY-MM-DD, default: --days before --end)")
+    parser.add_argument("--end", default=date.today().isoformat(), help="Last day, inclusive (default: today)")
+    parser.add_argument("--days", type=int, default=7, help="Days to cover when --start is not given")
+    parser.add_argument("--timezone", help="IANA timezone for the days (default: local)")
+    parser.add_argument("--source", choices=("auto", "archive", "api"), default="auto",
+                        help="Where to read lifelogs (auto: the archive if there is one)")
+    parser.add_argument("--json", action="store_true", help="Print the stats as JSON")
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end)
+    start = date.fromisoformat(args.start) if args.start else end - timedelta(days=args.days - 1)
+    # With --json, stdout carries only the JSON; fetch progress goes to stderr
+    with redirect_stdout(sys.stderr) if args.json else nullcontext():
+        stats = analyze(start, end, args.timezone, args.source)
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_stats(stats)
+
+if __name__ == "__main__":
+    main()
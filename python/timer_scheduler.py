@@ -0,0 +1,296 @@
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Longest single sleep. Deadlines are wall-clock times, so the loop re-checks them
+# periodically in case the machine was suspended or the clock was changed.
+MAX_SLEEP = 300
+
+_INTERVAL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# (low, high) for minute, hour, day of month, month, day of week
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+
+class IntervalSpec:
+    """
+    Run every `seconds`, measured from the end of the previous run
+    """
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive, got {seconds}")
+        self.seconds = seconds
+
+    def next_after(self, dt):
+        return dt + timedelta(seconds=self.seconds)
+
+    def record_run(self):
+        """
+        Called by the scheduler after each run, before the next deadline is computed
+        """
+
+    def __repr__(self):
+        return f"IntervalSpec({self.seconds})"
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Invalid cron step in {field!r}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            # "5/15" means every 15 starting at 5
+            end = high if step > 1 else start
+        # Day of week 7 is Sunday as well
+        if high == 6 and end == 7:
+            values.add(0)
+            end = 6
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field {field!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSpec:
+    """
+    Standard 5-field cron expression: minute hour day-of-month month day-of-week
+    """
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, _CRON_RANGES)
+        )
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _matches_day(self, dt):
+        day_match = dt.day in self.days
+        weekday_match = dt.isoweekday() % 7 in self.weekdays
+        # As in cron, a restricted day of month and day of week match if either does
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday_match
+        if self.any_weekday:
+            return day_match
+        return day_match or weekday_match
+
+    def next_after(self, dt):
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers every valid date, including February 29
+        limit = candidate + timedelta(days=4 * 366)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = (candidate.year + 1, 1) if candidate.month == 12 else (candidate.year, candidate.month + 1)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __repr__(self):
+        return f"CronSpec({self.expression!r})"
+
+
+def parse_spec(spec):
+    """
+    Turn a schedule spec into an IntervalSpec or CronSpec
+
+    Accepts seconds as a number, an interval string ("900", "15m", "1h", "1d")
+    or a 5-field cron expression ("*/15 * * * *", "0 4 * * *").
+    """
+    if isinstance(spec, (IntervalSpec, CronSpec)):
+        return spec
+    if isinstance(spec, (int, float)):
+        return IntervalSpec(spec)
+    text = spec.strip()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smhd]?)", text)
+    if match:
+        return IntervalSpec(float(match.group(1)) * _INTERVAL_UNITS[match.group(2)])
+    return CronSpec(text)
+
+
+class _Job:
+    def __init__(self, name, func, spec, jitter, on_finish):
+        self.name = name
+        self.func = func
+        self.spec = spec
+        self.jitter = jitter
+        self.on_finish = on_finish
+        self.next_run = None
+        self.running = False
+        self.thread = None
+        self.version = 0
+        self.runs = 0
+        self.skipped = 0
+        self.pending = False
+        self.coalesced = 0
+
+
+class TimerScheduler:
+    """
+    Runs jobs at computed deadlines instead of polling
+
+    A single thread sleeps until the earliest deadline (or until run_now/add_job wakes it)
+    and starts each due job in its own thread. A job that is still running when it comes
+    due again is skipped, never run twice in parallel. run_now() calls made during a run
+    are coalesced into a single follow-up run.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._jobs = {}
+        self._sequence = itertools.count()
+        self._stopping = False
+        self._thread = None
+
+    def add_job(self, name, func, spec, jitter=0, run_immediately=False, on_finish=None):
+        """
+        Schedule `func` under `name`
+
+        `jitter` adds up to that many random seconds to each deadline. `on_finish` is called
+        with no arguments after each run, once the next deadline is known.
+        """
+        job = _Job(name, func, parse_spec(spec), jitter, on_finish)
+        with self._cond:
+            self._jobs[name] = job
+            self._schedule(job, time.time() if run_immediately else None)
+            self._cond.notify_all()
+        return job
+
+    def _schedule(self, job, when=None):
+        if when is None:
+            when = job.spec.next_after(datetime.now()).timestamp()
+            if job.jitter:
+                when += random.uniform(0, job.jitter)
+        job.next_run = when
+        # Older heap entries for this job are ignored once the version changes
+        job.version += 1
+        heapq.heappush(self._heap, (when, next(self._sequence), job.name, job.version))
+
+    def run_now(self, name=None):
+        """
+        Make one job (or all jobs) due immediately, or right after the current run
+        """
+        with self._cond:
+            for job in ([self._jobs[name]] if name else list(self._jobs.values())):
+                if job.running:
+                    if job.pending:
+                        job.coalesced += 1
+                    job.pending = True
+                else:
+                    self._schedule(job, time.time())
+            self._cond.notify_all()
+
+    def next_run(self, name):
+        """
+        Next deadline of a job as a datetime, or None while an interval job is running
+        """
+        with self._cond:
+            job = self._jobs[name]
+            return datetime.fromtimestamp(job.next_run) if job.next_run else None
+
+    def is_running(self, name):
+        with self._cond:
+            return self._jobs[name].running
+
+    def _start_job(self, job):
+        if job.running:
+            job.skipped += 1
+            print(f"Skipping {job.name}: the previous run is still in progress")
+            # Interval jobs are rescheduled when the running one finishes
+            if isinstance(job.spec, IntervalSpec):
+                job.next_run = None
+            else:
+                self._schedule(job)
+            return
+
+        job.running = True
+        if isinstance(job.spec, IntervalSpec):
+            job.next_run = None
+        else:
+            # Cron jobs keep to the clock no matter how long a run takes
+            self._schedule(job)
+        job.thread = threading.Thread(target=self._run_job, args=(job,), name=f"job-{job.name}", daemon=True)
+        job.thread.start()
+
+    def _run_job(self, job):
+        try:
+            job.func()
+        except Exception as e:
+            print(f"Job {job.name} failed: {e}")
+        finally:
+            with self._cond:
+                job.running = False
+                job.runs += 1
+                if isinstance(job.spec, IntervalSpec):
+                    job.spec.record_run()
+                if job.pending and not self._stopping:
+                    job.pending = False
+                    self._schedule(job, time.time())
+                elif isinstance(job.spec, IntervalSpec) and not self._stopping and job.next_run is None:
+                    self._schedule(job)
+                self._cond.notify_all()
+            if job.on_finish:
+                job.on_finish()
+
+    def run(self):
+        """
+        Scheduler loop; blocks until stop() is called
+        """
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, name, version = heapq.heappop(self._heap)
+                    job = self._jobs.get(name)
+                    if job is not None and job.version == version:
+                        self._start_job(job)
+
+                timeout = MAX_SLEEP
+                if self._heap:
+                    timeout = min(max(self._heap[0][0] - now, 0), MAX_SLEEP)
+                self._cond.wait(timeout)
+
+    def start(self):
+        """
+        Run the scheduler loop in a background daemon thread
+        """
+        self._thread = threading.Thread(target=self.run, name="timer-scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, wait=True, timeout=None):
+        """
+        Stop scheduling new runs and optionally wait for running jobs to finish
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads = [job.thread for job in self._jobs.values() if job.running and job.thread]
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        if wait:
+            for thread in threads:
+                thread.join(timeout)
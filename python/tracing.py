@@ -0,0 +1,235 @@
+import functools
+import json
+import os
+import threading
+import time
+
+# Tracing is off unless enabled, so span() costs one attribute check in production
+_enabled = False
+_lock = threading.Lock()
+_spans = []
+_local = threading.local()
+_epoch = time.perf_counter()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start", "parent", "depth")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _local.stack.pop()
+        path = self.name
+        parent = self.parent
+        while parent is not None:
+            path = f"{parent.name};{path}"
+            parent = parent.parent
+        record = {
+            "name": self.name,
+            "path": path,
+            "start": self.start - _epoch,
+            "duration": end - self.start,
+            "depth": self.depth,
+            "thread": threading.get_ident(),
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        with _lock:
+            _spans.append(record)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def span(name, **attrs):
+    """
+    Context manager for a (possibly nested) timed span
+
+        with tracing.span("fetch_page", cursor=cursor):
+            ...
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def traced(name=None):
+    """
+    Decorator that wraps every call of a function in a span
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+
+
+def export_json(path):
+    """
+    Write all finished spans as a JSON list
+    """
+    with open(path, "w") as f:
+        json.dump({"pid": os.getpid(), "spans": spans()}, f)
+
+
+def export_chrome_trace(path):
+    """
+    Write all finished spans in the Chrome trace event format (chrome://tracing, Perfetto)
+    """
+    pid = os.getpid()
+    events = []
+    for record in spans():
+        events.append({
+            "name": record["name"],
+            "ph": "X",
+            "ts": record["start"] * 1e6,
+            "dur": record["duration"] * 1e6,
+            "pid": pid,
+            "tid": record["thread"],
+            "args": dict(record.get("attrs", {}), **({"error": record["error"]} if "error" in record else {})),
+        })
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def export(path):
+    """
+    Export to `path`, as a Chrome trace when the filename ends in .trace.json or .chrome.json
+    """
+    if path.endswith((".trace.json", ".chrome.json")):
+        export_chrome_trace(path)
+    else:
+        export_json(path)
+
+
+def breakdown(records=None):
+    """
+    Aggregate spans by call path into a flame-style text tree
+
+    Each line shows total time, share of the root, call count and self time.
+    """
+    records = spans() if records is None else records
+    totals = {}
+    for record in records:
+        info = totals.setdefault(record["path"], {"total": 0.0, "count": 0, "children": 0.0})
+        info["total"] += record["duration"]
+        info["count"] += 1
+        if ";" in record["path"]:
+            parent_path = record["path"].rsplit(";", 1)[0]
+            totals.setdefault(parent_path, {"total": 0.0, "count": 0, "children": 0.0})["children"] += record["duration"]
+
+    root_total = sum(info["total"] for path, info in totals.items() if ";" not in path) or 1.0
+
+    lines = [f"{'span':<50} {'total':>10} {'%':>6} {'calls':>7} {'self':>10}"]
+
+    def walk(prefix, depth):
+        children = [
+            path for path in totals
+            if path.startswith(prefix) and ";" not in path[len(prefix):]
+        ] if prefix else [path for path in totals if ";" not in path]
+        for path in sorted(children, key=lambda p: -totals[p]["total"]):
+            info = totals[path]
+            name = "  " * depth + path.rsplit(";", 1)[-1]
+            self_time = max(info["total"] - info["children"], 0.0)
+            lines.append(
+                f"{name:<50} {info['total'] * 1000:>8.1f}ms {info['total'] / root_total * 100:>5.1f}% "
+                f"{info['count']:>7} {self_time * 1000:>8.1f}ms"
+            )
+            walk(path + ";", depth + 1)
+
+    walk("", 0)
+    return "\n".join(lines)
+
+
+def add_arguments(parser):
+    """
+    Add the standard --trace/--profile flags to an argparse parser
+    """
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write spans to FILE (.trace.json for Chrome trace format, otherwise JSON)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a flame-style time breakdown after the run")
+
+
+def configure(trace_file=None, profile=False):
+    """
+    Enable tracing for a run and return a function that finishes it (export and/or print)
+
+    LIMITLESS_TRACE can be used instead of --trace, e.g. for scripts started by a scheduler.
+    """
+    trace_file = trace_file or os.getenv("LIMITLESS_TRACE")
+    if not trace_file and not profile:
+        return lambda: None
+
+    enable()
+
+    def finish():
+        if trace_file:
+            export(trace_file)
+            print(f"Trace written to {trace_file}")
+        if profile:
+            print("\nTime breakdown:")
+            print(breakdown())
+
+    return finish
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext, redirect_stdout
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import tzlocal
+from dotenv import load_dotenv
+
+from _client import get_lifelogs
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_POLL_SECONDS = 10
+
+# A lifelog is final once it ended this long ago, or its content stopped changing for this long
+DEFAULT_SETTLE_SECONDS = 60
+
+# The API's start filter has 1-second resolution, so each poll re-reads one extra second
+OVERLAP = timedelta(seconds=1)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _query_start(since):
+    # What the API's start filter actually covers: one second of overlap, whole seconds only
+    return (since - OVERLAP).replace(microsecond=0)
+
+
+def _fingerprint(lifelog):
+    # Entries still being processed grow: their end time, markdown and contents change
+    return (lifelog.get("endTime"), len(lifelog.get("markdown") or ""), len(lifelog.get("contents") or []))
+
+
+def watch_lifelogs(api_key=None, since=None, poll_interval=DEFAULT_POLL_SECONDS, settle=DEFAULT_SETTLE_SECONDS,
+                   timezone=None, includeMarkdown=True, includeHeadings=False, stop=None, api_url=None, on_resume=None):
+    """
+    Yield every newly finalized lifelog exactly once, oldest first, like `tail -f`
+
+    Each poll asks only for lifelogs starting at or after the oldest one still settling
+    (or the newest one already yielded), so a poll usually returns a handful of entries
+    instead of the whole day. `since` is a datetime, defaulting to now. `stop` is an
+    optional threading.Event that ends the generator.
+
+    `on_resume(since)` is called after each poll's lifelogs were consumed, with the time
+    the next poll starts from. Passing that back as `since` after a restart never skips a
+    lifelog that was still settling (it may yield some lifelogs again).
+    """
+    api_key = api_key or os.getenv("LIMITLESS_API_KEY")
+    timezone = timezone or str(tzlocal.get_localzone())
+    tz = ZoneInfo(timezone)
+    since = (since or datetime.now(tz)).astimezone(tz)
+    settle = timedelta(seconds=settle)
+    client_options = {"api_url": api_url} if api_url else {}
+
+    # id -> (fingerprint, unchanged since, start time) for lifelogs not yet yielded
+    pending = {}
+    # id -> start time of yielded lifelogs that later polls can still return
+    emitted = {}
+
+    while not (stop and stop.is_set()):
+        try:
+            lifelogs = get_lifelogs(
+                api_key=api_key,
+                limit=None,
+                includeMarkdown=includeMarkdown,
+                includeHeadings=includeHeadings,
+                timezone=timezone,
+                direction="asc",
+                start=_query_start(since).strftime("%Y-%m-%d %H:%M:%S"),
+                # Each poll must see changes made since the last one
+                cache_ttl=0,
+                **client_options
+            )
+        except Exception as e:
+            print(f"Error polling lifelogs: {e}")
+            lifelogs = None
+
+        if lifelogs is not None:
+            now = datetime.now(tz)
+            returned = set()
+            ready = []
+            for lifelog in lifelogs:
+                lifelog_id = lifelog.get("id")
+                if not lifelog_id or lifelog_id in emitted:
+                    continue
+                returned.add(lifelog_id)
+                start = _parse_time(lifelog["startTime"])
+                fingerprint = _fingerprint(lifelog)
+                previous = pending.get(lifelog_id)
+                unchanged_since = previous[1] if previous and previous[0] == fingerprint else now
+                pending[lifelog_id] = (fingerprint, unchanged_since, start)
+
+                end = _parse_time(lifelog["endTime"]) if lifelog.get("endTime") else now
+                if now - end >= settle or now - unchanged_since >= settle:
+                    ready.append((start, lifelog_id, lifelog))
+
+            # Entries that vanished from the results (deleted) should not hold the window back
+            pending = {lifelog_id: entry for lifelog_id, entry in pending.items() if lifelog_id in returned}
+
+            for start, lifelog_id, lifelog in sorted(ready, key=lambda item: (item[0], item[1])):
+                del pending[lifelog_id]
+                emitted[lifelog_id] = start
+                yield lifelog
+
+            # Resume from the oldest lifelog still settling, otherwise from the newest one yielded
+            if pending:
+                since = min(entry[2] for entry in pending.values())
+            elif emitted:
+                since = max([since] + list(emitted.values()))
+            # Keep every yielded id the next poll can return again, down to the same rounded start
+            query_start = _query_start(since)
+            emitted = {lifelog_id: start for lifelog_id, start in emitted.items() if start >= query_start}
+            if on_resume:
+                on_resume(since)
+
+        if stop:
+            stop.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print new Limitless lifelogs as they are finalized (like tail -f)")
+    parser.add_argument("--since", help='Start from this local time ("YYYY-MM-DD HH:MM") instead of now')
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS, help="Seconds between polls")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Seconds a lifelog must be unchanged (or ended) before it is printed")
+    parser.add_argument("--timezone", help="IANA timezone for --since and the API (default: local)")
+    parser.add_argument("--json", action="store_true", help="Print each lifelog as a JSON line")
+    args = parser.parse_args()
+
+    timezone = args.timezone or str(tzlocal.get_localzone())
+    since = datetime.fromisoformat(args.since).replace(tzinfo=ZoneInfo(timezone)) if args.since else None
+
+    if not args.json:
+        print(f"Watching for new lifelogs every {args.poll:g}s (Ctrl+C to stop)...")
+    # In --json mode stdout carries only JSON Lines; fetch progress and retry messages go to stderr
+    out = sys.stdout
+    try:
+        with redirect_stdout(sys.stderr) if args.json else nullcontext():
+            for lifelog in watch_lifelogs(since=since, poll_interval=args.poll, settle=args.settle,
+                                          timezone=timezone, includeMarkdown=args.json):
+                if args.json:
+                    print(json.dumps(lifelog), file=out, flush=True)
+                else:
+                    started = _parse_time(lifelog["startTime"]).astimezone(ZoneInfo(timezone))
+                    print(f"[{started.strftime('%Y-%m-%d %H:%M')}] {lifelog.get('title') or 'Untitled'} ({lifelog['id']})", flush=True)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()